@@ -0,0 +1,266 @@
+"""Asyncio front end for EnhancedMemoryStore."""
+
+import asyncio
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Generic, TypeVar
+
+from .enhanced_memory_store import EnhancedMemoryStore
+
+_RequestT = TypeVar("_RequestT")
+_ResultT = TypeVar("_ResultT")
+_T = TypeVar("_T")
+
+# (store method, positional arguments) of a queued write
+_WriteRequest = tuple[str, tuple[str, ...]]
+# (store method, query, keyword arguments) of a queued search
+_SearchRequest = tuple[str, str, dict[str, Any]]
+
+
+class _Coalescer(Generic[_RequestT, _ResultT]):
+    """
+    Queue of async calls that are run in batches on an executor.
+
+    Calls made while a batch is running, or within window seconds of the
+    first queued call, are handed to run_batch together.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[list[_RequestT]], list[_ResultT]],
+        executor: ThreadPoolExecutor,
+        window: float = 0.0,
+    ):
+        """
+        Initialize the coalescer.
+
+        Args:
+            run_batch: Blocking function mapping a list of requests to a list
+                of results in the same order
+            executor: Executor run_batch is called on
+            window: Seconds to wait for more requests before running a batch
+        """
+        self.run_batch = run_batch
+        self.executor = executor
+        self.window = window
+        self.batches_run = 0
+        self._pending: list[tuple[_RequestT, asyncio.Future[_ResultT]]] = []
+        self._drainer: asyncio.Task[None] | None = None
+
+    async def submit(self, request: _RequestT) -> _ResultT:
+        """Queue a request and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[_ResultT] = loop.create_future()
+        self._pending.append((request, future))
+        if self._drainer is None or self._drainer.done():
+            self._drainer = loop.create_task(self._drain())
+        return await future
+
+    async def wait_idle(self) -> None:
+        """Wait until every queued request has been run."""
+        while self._drainer is not None and not self._drainer.done():
+            await self._drainer
+
+    async def _drain(self) -> None:
+        """Run queued requests batch by batch until the queue is empty."""
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            # Yield (or wait out the window) so concurrent callers can join
+            await asyncio.sleep(self.window)
+            batch, self._pending = self._pending, []
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, self.run_batch, [request for request, _ in batch]
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self.batches_run += 1
+
+            for (_, future), result in zip(batch, results, strict=True):
+                # Callers that were cancelled have already given up
+                if not future.done():
+                    future.set_result(result)
+
+
+class AsyncEnhancedMemoryStore:
+    """
+    Non-blocking wrapper around EnhancedMemoryStore for asyncio callers.
+
+    Model inference, FAISS searches and file writes run on a bounded thread
+    pool, one at a time under a lock, so the event loop is never blocked.
+    Concurrent writes are applied in a single batch() with one encode and
+    one save; concurrent searches share one batched query encode.
+    """
+
+    def __init__(
+        self,
+        store: EnhancedMemoryStore | None = None,
+        max_workers: int = 2,
+        coalesce_window: float = 0.0,
+        **store_kwargs: Any,
+    ):
+        """
+        Initialize the async store.
+
+        Args:
+            store: Store to wrap; defaults to an EnhancedMemoryStore built
+                from store_kwargs. Do not use it directly while async calls
+                are in flight.
+            max_workers: Threads in the executor running blocking work
+            coalesce_window: Seconds to wait for concurrent calls to join a
+                batch; 0 batches only calls made in the same event loop tick
+                or while the previous batch was running
+            **store_kwargs: EnhancedMemoryStore arguments when store is None
+        """
+        self.store = store or EnhancedMemoryStore(**store_kwargs)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="memory-store"
+        )
+        self._lock = threading.Lock()
+        self._writes: _Coalescer[_WriteRequest, str] = _Coalescer(
+            self._run_writes, self._executor, coalesce_window
+        )
+        self._searches: _Coalescer[_SearchRequest, list[dict[str, Any]]] = _Coalescer(
+            self._run_searches, self._executor, coalesce_window
+        )
+
+    async def __aenter__(self) -> "AsyncEnhancedMemoryStore":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    def _run_writes(self, requests: list[_WriteRequest]) -> list[str]:
+        """
+        Apply queued writes in one batch: one encode and one save.
+
+        Returns:
+            Each write's result, such as a memory ID, in request order
+        """
+        with self._lock, self.store.batch():
+            return [getattr(self.store, method)(*args) for method, args in requests]
+
+    def _run_searches(
+        self, requests: list[_SearchRequest]
+    ) -> list[list[dict[str, Any]]]:
+        """Run queued searches after encoding all of their queries at once."""
+        with self._lock:
+            queries = [
+                query
+                for _, query, kwargs in requests
+                if kwargs.get("search_mode") != "lexical"
+            ]
+            if self.store.text_database and queries:
+                # Fills the query cache, so each search below skips the model
+                self.store._encode_queries(queries)
+            return [
+                getattr(self.store, method)(query=query, **kwargs)
+                for method, query, kwargs in requests
+            ]
+
+    async def _run(self, function: Callable[..., _T], *args: Any) -> _T:
+        """Run a blocking store call on the executor."""
+
+        def locked() -> _T:
+            with self._lock:
+                return function(*args)
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, locked)
+
+    async def astore_interaction(
+        self, agent_name: str, input_message: str, output_message: str
+    ) -> str:
+        """
+        Store an interaction; see EnhancedMemoryStore.store_interaction.
+
+        Returns:
+            The memory ID of the interaction, once its batch has been applied
+        """
+        return await self._writes.submit(
+            ("store_interaction", (agent_name, input_message, output_message))
+        )
+
+    async def astore_fact(self, agent_name: str, fact: str) -> str:
+        """
+        Store a fact; see EnhancedMemoryStore.store_fact.
+
+        Returns:
+            The memory ID of the fact, once its batch has been applied
+        """
+        return await self._writes.submit(("store_fact", (agent_name, fact)))
+
+    async def asemantic_search(
+        self,
+        query: str,
+        top_k: int = 5,
+        agent_filter: str | None = None,
+        min_similarity: float = 0.3,
+        type_filter: str | None = None,
+        since: str | datetime | None = None,
+        until: str | datetime | None = None,
+        search_mode: str = "vector",
+        recency_half_life: float | None = None,
+    ) -> list[dict[str, Any]]:
+        """Search memories; see EnhancedMemoryStore.semantic_search."""
+        return await self._searches.submit(
+            (
+                "semantic_search",
+                query,
+                {
+                    "top_k": top_k,
+                    "agent_filter": agent_filter,
+                    "min_similarity": min_similarity,
+                    "type_filter": type_filter,
+                    "since": since,
+                    "until": until,
+                    "search_mode": search_mode,
+                    "recency_half_life": recency_half_life,
+                },
+            )
+        )
+
+    async def aget_relevant_context(
+        self,
+        agent_name: str,
+        query: str,
+        context_limit: int = 5,
+        agent_boost: float = 1.0,
+        candidate_pool: int = 4,
+        recency_half_life: float | None = None,
+    ) -> list[dict[str, Any]]:
+        """Get context for an agent; see EnhancedMemoryStore.get_relevant_context."""
+        return await self._searches.submit(
+            (
+                "get_relevant_context",
+                query,
+                {
+                    "agent_name": agent_name,
+                    "context_limit": context_limit,
+                    "agent_boost": agent_boost,
+                    "candidate_pool": candidate_pool,
+                    "recency_half_life": recency_half_life,
+                },
+            )
+        )
+
+    async def aget_memory_analytics(self) -> dict[str, Any]:
+        """Get analytics; see EnhancedMemoryStore.get_memory_analytics."""
+        return await self._run(self.store.get_memory_analytics)
+
+    async def asave_embeddings(self) -> None:
+        """Save the vector index and metadata without blocking the event loop."""
+        await self._writes.wait_idle()
+        await self._run(self.store.save_embeddings)
+
+    async def aclose(self) -> None:
+        """Finish queued calls, close the store and stop the executor."""
+        await self._writes.wait_idle()
+        await self._searches.wait_idle()
+        await self._run(self.store.close)
+        self._executor.shutdown(wait=True)
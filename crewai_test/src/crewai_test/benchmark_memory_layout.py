@@ -0,0 +1,126 @@
+"""Resident memory of vector store metadata: list of dicts against MemoryRecords.
+
+Run ``python -m crewai_test.benchmark_memory_layout [n_entries ...]``; each
+layout is built in a fresh subprocess so their heaps do not mix. Defaults to
+100k and 1M entries.
+"""
+
+import gc
+import hashlib
+import os
+import subprocess
+import sys
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+LAYOUTS = ("dicts", "columnar")
+
+
+def synthetic_entries(n_entries: int) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Yield texts and metadata shaped like EnhancedMemoryStore facts and interactions."""
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for i in range(n_entries):
+        agent_name = f"agent_{i % 8}"
+        timestamp = (start + timedelta(seconds=37 * i)).isoformat()
+        # Random-looking 16-hex-digit IDs, like new_memory_id
+        memory_id = hashlib.blake2b(i.to_bytes(8, "little"), digest_size=8).hexdigest()
+        if i % 3:
+            fact = f"Finding {i}: adoption of model family {i % 97} grew in sector {i % 13}"
+            yield f"Agent: {agent_name}\nFact: {fact}", {
+                "agent_name": agent_name,
+                "type": "fact",
+                "timestamp": timestamp,
+                "memory_id": memory_id,
+                "fact": fact,
+            }
+        else:
+            question = f"Research topic {i % 503}"
+            answer = f"Summary {i}: " + "sources agree on the trend. " * 12
+            yield (
+                f"Agent: {agent_name}\nInput: {question}\nOutput: {answer}",
+                {
+                    "agent_name": agent_name,
+                    "type": "interaction",
+                    "timestamp": timestamp,
+                    "memory_id": memory_id,
+                    "input": question,
+                    "output": answer[:200] + "..." if len(answer) > 200 else answer,
+                },
+            )
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # No procfs: peak RSS, in kilobytes on Linux and bytes on macOS
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measure_layout(layout: str, n_entries: int) -> int:
+    """Build n_entries in a layout in this process; return the RSS growth in bytes."""
+    from .memory_records import MemoryRecords
+
+    gc.collect()
+    before = rss_bytes()
+    if layout == "dicts":
+        texts: list[str] = []
+        metadatas: list[dict[str, Any]] = []
+        for text, metadata in synthetic_entries(n_entries):
+            texts.append(text)
+            metadatas.append(metadata)
+        kept: Any = (texts, metadatas)
+    else:
+        kept = MemoryRecords()
+        for text, metadata in synthetic_entries(n_entries):
+            kept.append(text, metadata)
+    gc.collect()
+    return rss_bytes() - before
+
+
+def run_benchmark(
+    sizes: tuple[int, ...] = (100_000, 1_000_000)
+) -> list[dict[str, Any]]:
+    """Print the RSS of each layout at each size, measured in subprocesses."""
+    report = []
+    for n_entries in sizes:
+        row: dict[str, Any] = {"entries": n_entries}
+        for layout in LAYOUTS:
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    __spec__.name,
+                    "--child",
+                    layout,
+                    str(n_entries),
+                ],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            row[layout] = int(output.strip())
+        report.append(row)
+
+    print("📊 RSS growth holding vector store texts and metadata")
+    print(f"{'entries':>10}{'dicts MiB':>12}{'columnar MiB':>15}{'saved':>8}")
+    for row in report:
+        print(
+            f"{row['entries']:>10}{row['dicts'] / 2**20:>12.1f}"
+            f"{row['columnar'] / 2**20:>15.1f}"
+            f"{1 - row['columnar'] / row['dicts']:>8.0%}"
+        )
+    return report
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        print(measure_layout(sys.argv[2], int(sys.argv[3])))
+    else:
+        run_benchmark(tuple(int(arg) for arg in sys.argv[1:]) or (100_000, 1_000_000))
@@ -0,0 +1,92 @@
+"""Recall, latency and size benchmarks of vector indexes against exact flat search.
+
+Run ``python -m crewai_test.benchmark_vector_index [n_vectors] [--storage]``;
+--storage compares float32, float16 and int8 vector storage instead of
+ANN index types.
+"""
+
+import sys
+from typing import Any
+
+import numpy as np
+
+from .vector_index import IndexConfig, compare_index_configs
+
+
+def synthetic_embeddings(
+    n_vectors: int, dim: int = 384, n_topics: int = 200, seed: int = 0
+) -> np.ndarray:
+    """Generate normalized vectors clustered around topics, like memory embeddings."""
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    vectors = topics[rng.integers(0, n_topics, n_vectors)]
+    vectors += 0.5 * rng.standard_normal((n_vectors, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def run_benchmark(
+    n_vectors: int = 50_000, n_queries: int = 200, top_k: int = 10
+) -> list[dict[str, Any]]:
+    """Print build time, query latency and recall for each index type."""
+    corpus = synthetic_embeddings(n_vectors + n_queries)
+    vectors, queries = corpus[:n_vectors], corpus[n_vectors:]
+
+    configs = [
+        IndexConfig(index_type=index_type)
+        for index_type in ("hnsw", "ivf_flat", "ivf_pq")
+    ]
+    report = compare_index_configs(vectors, queries, configs, top_k)
+
+    _print_report(report, n_vectors, n_queries, top_k)
+    return report
+
+
+def run_storage_benchmark(
+    n_vectors: int = 50_000, n_queries: int = 200, top_k: int = 10
+) -> list[dict[str, Any]]:
+    """Print bytes per vector, query latency and top-k overlap per storage type."""
+    corpus = synthetic_embeddings(n_vectors + n_queries)
+    vectors, queries = corpus[:n_vectors], corpus[n_vectors:]
+
+    configs = [
+        IndexConfig(index_type=index_type, storage=storage)
+        for index_type in ("flat", "hnsw")
+        for storage in ("float32", "float16", "int8")
+        # The float32 flat baseline is always reported
+        if (index_type, storage) != ("flat", "float32")
+    ]
+    report = compare_index_configs(vectors, queries, configs, top_k)
+    _print_report(report, n_vectors, n_queries, top_k)
+    return report
+
+
+def _print_report(
+    report: list[dict[str, Any]], n_vectors: int, n_queries: int, top_k: int
+) -> None:
+    """Print a compare_index_configs report as a table."""
+    print(f"📊 {n_vectors} vectors, {n_queries} queries, recall@{top_k}")
+    print(
+        f"{'index':<10}{'storage':<9}{'build s':>10}{'query ms':>12}"
+        f"{'bytes/vec':>11}{'recall':>10}"
+    )
+    for row in report:
+        if "error" in row:
+            print(
+                f"{row['index_type']:<10}{row['storage']:<9}  skipped: {row['error']}"
+            )
+            continue
+        print(
+            f"{row['index_type']:<10}{row['storage']:<9}{row['build_seconds']:>10.2f}"
+            f"{row['query_ms']:>12.3f}{row['bytes_per_vector']:>11.1f}"
+            f"{row['recall']:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    n = int(args[0]) if args else 50_000
+    if "--storage" in sys.argv:
+        run_storage_benchmark(n)
+    else:
+        run_benchmark(n)
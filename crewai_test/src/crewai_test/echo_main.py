@@ -6,8 +6,6 @@ import sys
 import warnings
 from datetime import datetime
 
-from crewai_test.echo_crew import EchoCrew
-
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
 
@@ -15,6 +13,8 @@ def run_echo():
     """
     Run the echo crew with a simple test message.
     """
+    from crewai_test.echo_crew import EchoCrew
+
     # Get message from command line or use default
     test_message = sys.argv[1] if len(sys.argv) > 1 else "Hello, Echo Crew!"
 
@@ -0,0 +1,68 @@
+"""Bounded LRU cache for query embeddings."""
+
+import threading
+from collections import OrderedDict
+from typing import Any
+
+
+class QueryEmbeddingCache:
+    """LRU cache of query embeddings keyed on model name and normalized text."""
+
+    def __init__(self, max_size: int = 256):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of embeddings kept; 0 disables caching
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, str], Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model_name: str, query: str) -> tuple[str, str]:
+        """Build a cache key, collapsing insignificant whitespace in the query."""
+        return model_name, " ".join(query.split())
+
+    def get(self, model_name: str, query: str) -> Any | None:
+        """Return the cached embedding for a query, or None on a miss."""
+        key = self.make_key(model_name, query)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, model_name: str, query: str, embedding: Any) -> None:
+        """Store an embedding, evicting the least recently used entry if full."""
+        if self.max_size <= 0:
+            return
+        key = self.make_key(model_name, query)
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached embeddings and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Get hit/miss counters for analytics."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
@@ -0,0 +1,137 @@
+"""Embedding backends and a process-wide registry of lazily loaded models."""
+
+import threading
+from abc import ABC, abstractmethod
+from typing import Any
+
+import numpy as np
+
+# Runtimes supported by SentenceTransformerBackend
+RUNTIMES = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+# Dynamically quantized ONNX export shipped with sentence-transformers models
+DEFAULT_ONNX_INT8_FILE = "onnx/model_quint8_avx2.onnx"
+
+
+class EmbeddingBackend(ABC):
+    """
+    Interface for text embedding backends used by EnhancedMemoryStore.
+
+    Subclasses set name and implement dimension and encode.
+    """
+
+    name: str = ""
+
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        """Size of the vectors returned by encode."""
+
+    @abstractmethod
+    def encode(
+        self,
+        texts: list[str],
+        batch_size: int = 32,
+        normalize_embeddings: bool = True,
+    ) -> np.ndarray:
+        """Embed texts as a (len(texts), dimension) float32 matrix."""
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """SentenceTransformers model on PyTorch or ONNX Runtime, optionally int8."""
+
+    def __init__(
+        self,
+        model_name: str,
+        runtime: str = "torch",
+        onnx_file: str = DEFAULT_ONNX_INT8_FILE,
+    ):
+        """
+        Load a SentenceTransformers model.
+
+        Args:
+            model_name: SentenceTransformers model name or path
+            runtime: "torch", "torch-int8" (dynamic int8 quantization of the
+                linear layers), "onnx" or "onnx-int8" (ONNX Runtime with a
+                quantized export; faster on CPU-only hosts)
+            onnx_file: Quantized ONNX file inside the model repo for onnx-int8
+        """
+        if runtime not in RUNTIMES:
+            raise ValueError(f"Unknown runtime {runtime!r}; expected one of {RUNTIMES}")
+        self.name = model_name
+        self.runtime = runtime
+        self.model = _load_sentence_transformer(model_name, runtime, onnx_file)
+
+    @property
+    def dimension(self) -> int:
+        """Embedding size reported by the model."""
+        return int(self.model.get_sentence_embedding_dimension())
+
+    def encode(
+        self,
+        texts: list[str],
+        batch_size: int = 32,
+        normalize_embeddings: bool = True,
+    ) -> np.ndarray:
+        """Embed texts as a float32 matrix."""
+        embeddings = self.model.encode(
+            texts, batch_size=batch_size, normalize_embeddings=normalize_embeddings
+        )
+        return np.asarray(embeddings, dtype=np.float32)
+
+
+def _load_sentence_transformer(model_name: str, runtime: str, onnx_file: str) -> Any:
+    """Load a SentenceTransformer, importing the library (and torch) on demand."""
+    from sentence_transformers import SentenceTransformer
+
+    if runtime == "onnx":
+        return SentenceTransformer(model_name, backend="onnx")
+    if runtime == "onnx-int8":
+        return SentenceTransformer(
+            model_name, backend="onnx", model_kwargs={"file_name": onnx_file}
+        )
+
+    if runtime == "torch-int8":
+        import torch
+
+        # Dynamic quantization runs on CPU only
+        return torch.quantization.quantize_dynamic(
+            SentenceTransformer(model_name, device="cpu"),
+            {torch.nn.Linear},
+            dtype=torch.qint8,
+        )
+    return SentenceTransformer(model_name)
+
+
+_backends: dict[tuple[str, str], EmbeddingBackend] = {}
+_lock = threading.Lock()
+
+
+def get_embedding_backend(model_name: str, runtime: str = "torch") -> EmbeddingBackend:
+    """
+    Get the shared backend for a model name and runtime, loading it on first use.
+
+    Every store using the same model shares one instance, so model load time
+    and memory do not grow with the number of stores.
+    """
+    key = (model_name, runtime)
+    backend = _backends.get(key)
+    if backend is None:
+        with _lock:
+            # Another thread may have finished loading while we waited
+            backend = _backends.get(key)
+            if backend is None:
+                backend = SentenceTransformerBackend(model_name, runtime)
+                _backends[key] = backend
+    return backend
+
+
+def loaded_models() -> list[str]:
+    """Names of the models loaded so far."""
+    return [model_name for model_name, _ in _backends]
+
+
+def clear_embedding_models() -> None:
+    """Drop all loaded models so they are reloaded on next use."""
+    with _lock:
+        _backends.clear()
@@ -1,25 +1,139 @@
 """Enhanced memory store with embeddings support for semantic search and cross-agent memory sharing."""
 
+import atexit
+import hashlib
 import json
+import os
+import queue
+import threading
+import time
+from collections.abc import Iterable, Iterator, MutableMapping, Sequence
+from contextlib import contextmanager
+from dataclasses import replace
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
-from .memory_store import SimpleMemoryStore
+from .embedding_cache import QueryEmbeddingCache
+from .embedding_models import EmbeddingBackend, get_embedding_backend
+from .file_lock import file_lock, file_version
+from .lexical_index import BM25Index, reciprocal_rank_fusion
+from .memory_export import (
+    DEFAULT_CHUNK_SIZE,
+    chunked,
+    read_header,
+    read_records,
+    write_records,
+)
+from .memory_records import MemoryRecords, MetadataColumn, encode_ids
+from .memory_store import CONTENT_KEYS, SimpleMemoryStore, local_timestamp
+from .metadata_index import MetadataIndex, renumber_rows
+from .retention import RetentionPolicy, policy_for, select_evictions
+from .sqlite_memory_store import SqliteMemoryStore
+from .vector_index import (
+    IndexConfig,
+    build_index,
+    compare_index_configs,
+    configure_search,
+    index_type_of,
+    reconstruct_all,
+    score_rows,
+    search_many,
+    storage_of,
+)
 
+SEARCH_MODES = ("vector", "hybrid", "lexical")
 
-class EnhancedMemoryStore(SimpleMemoryStore):
-    """Enhanced memory store with vector embeddings for semantic search and agent memory sharing."""
+# Whether identical memories of different agents share a row
+DEDUP_SCOPES = ("agent", "global")
+
+# Candidates each retriever contributes to hybrid fusion, per requested result
+_FUSION_DEPTH = 4
+
+# Minimum cosine similarity of context items, as semantic_search's default
+_CONTEXT_MIN_SIMILARITY = 0.3
+
+# Stores that have not been closed yet; flushed when the interpreter exits.
+# Held strongly, so a store dropped without close() still saves its rows.
+_open_stores: "set[EnhancedMemoryStore]" = set()
+
+
+@atexit.register
+def _close_open_stores() -> None:
+    """Flush and close every store the program did not close itself."""
+    for store in list(_open_stores):
+        store.close()
+
+
+class TextColumn(Sequence[str | None]):
+    """
+    Sequence of row texts, rebuilding those of structured store memories.
+
+    Rebuilt texts are looked up in the structured store on access, in batches
+    when iterating or slicing; None stands for a memory that no longer exists.
+    """
+
+    __slots__ = ("_store",)
+
+    # Rows per structured store lookup when iterating
+    _CHUNK = 512
+
+    def __init__(self, store: "EnhancedMemoryStore"):
+        self._store = store
+
+    def __len__(self) -> int:
+        return len(self._store.records)
+
+    def __getitem__(self, row: Any) -> Any:
+        if isinstance(row, slice):
+            return self._store._texts(list(range(*row.indices(len(self)))))
+        n_rows = len(self)
+        if row < 0:
+            row += n_rows
+        if not 0 <= row < n_rows:
+            raise IndexError("row out of range")
+        return self._store._texts([int(row)])[0]
+
+    def __iter__(self) -> Iterator[str | None]:
+        for start in range(0, len(self), self._CHUNK):
+            yield from self[start : start + self._CHUNK]
+
+
+class EnhancedMemoryStore:
+    """
+    Enhanced memory store with vector embeddings for semantic search and agent memory sharing.
+
+    Several processes can share the same files. Saves take an exclusive
+    file lock and, if another process saved since this store last read the
+    files, rebase this store's unsaved memories onto the saved ones instead
+    of overwriting them. Encoding never happens under the file lock.
+
+    Interactions and facts are kept once, in the structured store, under a
+    stable memory ID. Vector index rows reference that ID and rebuild their
+    text and content metadata from the structured store when a search
+    returns them. Removing a memory from the structured store removes it
+    from search results, and retention evictions delete it there.
+    """
 
     def __init__(
         self,
         storage_path: str = "enhanced_memory_store.json",
         embeddings_path: str = "memory_embeddings.index",
-        embedding_model: str = "all-MiniLM-L6-v2",
+        embedding_model: str | EmbeddingBackend = "all-MiniLM-L6-v2",
+        structured_store: SimpleMemoryStore | SqliteMemoryStore | None = None,
+        encode_batch_size: int = 64,
+        query_cache: QueryEmbeddingCache | None = None,
+        deduplicate: bool = True,
+        index_config: IndexConfig | None = None,
+        embedding_runtime: str = "torch",
+        write_behind: bool = False,
+        save_interval: float = 5.0,
+        read_your_writes: bool = True,
+        retention: list[RetentionPolicy] | None = None,
+        dedup_scope: str = "agent",
     ):
         """
         Initialize enhanced memory store with embeddings support.
@@ -27,41 +141,157 @@ class EnhancedMemoryStore(SimpleMemoryStore):
         Args:
             storage_path: Path to JSON file for structured memory data
             embeddings_path: Path to FAISS index file for vector embeddings
-            embedding_model: SentenceTransformers model name for embeddings
+            embedding_model: SentenceTransformers model name, or an
+                EmbeddingBackend instance, used for embeddings
+            structured_store: Store used for structured interaction/fact data;
+                defaults to a SimpleMemoryStore at storage_path
+            encode_batch_size: Default number of texts per model forward pass
+                for bulk ingestion
+            query_cache: Cache of query embeddings, which may be shared
+                between stores; defaults to a private 256-entry cache
+            deduplicate: Reuse the existing vector for identical texts,
+                bumping its last_seen/count metadata instead of re-encoding
+            index_config: ANN index type, vector storage precision and build
+                parameters; the store starts with an exact flat index and
+                migrates once the corpus reaches index_config.migrate_threshold
+            embedding_runtime: Runtime for a named model: "torch",
+                "torch-int8", "onnx" or "onnx-int8"
+            write_behind: Queue vector writes for a background thread that
+                encodes and indexes them in batches, so store_* calls return
+                without waiting for the model; call flush() or close() to
+                make them durable
+            save_interval: Minimum seconds between saves by the write-behind
+                thread
+            read_your_writes: Default search consistency in write-behind
+                mode; True waits for queued writes to be indexed before
+                searching, False searches whatever is indexed already
+            retention: Per agent/type limits (max entries, TTL, eviction
+                order) applied whenever the embeddings are saved; evicted
+                memories are removed from the index and the structured store
+            dedup_scope: "agent" deduplicates each agent's memories on their
+                own; "global" also folds another agent's identical memory
+                into the existing row, which keeps its agent and memory ID
         """
-        super().__init__(storage_path)
+        if dedup_scope not in DEDUP_SCOPES:
+            raise ValueError(
+                f"Unknown dedup_scope {dedup_scope!r}; expected one of {DEDUP_SCOPES}"
+            )
+        self.structured_store = structured_store or SimpleMemoryStore(storage_path)
+        self.storage_path = self.structured_store.storage_path
 
         self.embeddings_path = Path(embeddings_path)
-        self.embedding_model = SentenceTransformer(embedding_model)
-        self.embedding_dim = 384  # Dimension for all-MiniLM-L6-v2
-
-        # Initialize FAISS index for vector search
-        self.index = faiss.IndexFlatIP(
-            self.embedding_dim
-        )  # Inner product for cosine similarity
-        self.text_database: list[str] = (
-            []
-        )  # Store original texts corresponding to embeddings
-        self.metadata_database: list[dict[str, Any]] = (
-            []
-        )  # Store metadata for each embedding
+        self.embeddings_lock_path = Path(f"{embeddings_path}.lock")
+        # Named models are loaded from the shared registry on first encode
+        self._embedding_model: EmbeddingBackend | None = None
+        if isinstance(embedding_model, EmbeddingBackend):
+            self._embedding_model = embedding_model
+            self.embedding_model_name = embedding_model.name
+        else:
+            self.embedding_model_name = embedding_model
+        self.embedding_runtime = embedding_runtime
+        self._query_cache_model = f"{self.embedding_model_name}:{embedding_runtime}"
+
+        # Known from the loaded index, or from the model on the first add
+        self.embedding_dim: int | None = None
+        self.encode_batch_size = encode_batch_size
+        self.query_cache = query_cache or QueryEmbeddingCache()
+        self.index_config = index_config or IndexConfig()
+
+        # FAISS index for vector search, created once the dimension is known
+        self.index: Any = None
+        # Texts and metadata of each embedding, stored column by column
+        self.records = MemoryRecords()
+
+        # Content hash -> row in the index/databases, for deduplication
+        self.deduplicate = deduplicate
+        self.dedup_scope = dedup_scope
+        self.content_ids: dict[str, int] = {}
+        self.duplicates_skipped = 0
+
+        # Agent/type/timestamp indexes for pre-filtered search
+        self.metadata_index = MetadataIndex()
+        # BM25 inverted index for lexical and hybrid search
+        self.lexical_index = BM25Index()
+        # Rows whose structured store memory no longer exists
+        self._stale_rows: set[int] = set()
+        # Rows referencing a structured store memory
+        self._record_backed = 0
+
+        # Vector writes deferred by batch()
+        self._batch_depth = 0
+        self._pending_texts: list[str] = []
+        self._pending_metadata: list[dict[str, Any]] = []
+
+        # Guards the index and databases against the write-behind thread
+        self._lock = threading.RLock()
+        self.write_behind = write_behind
+        self.save_interval = save_interval
+        self.read_your_writes = read_your_writes
+
+        # Retention policies and what they have evicted so far
+        self.retention = list(retention or [])
+        self._track_retrieval = any(
+            p.max_entries is not None and p.eviction == "least_recently_retrieved"
+            for p in self.retention
+        )
+        self.eviction_stats: dict[str, Any] = {
+            "evicted": 0,
+            "evicted_by_reason": {"ttl": 0, "max_entries": 0},
+            "evicted_by_agent": {},
+            "structured_trimmed": 0,
+            "last_eviction": None,
+        }
+        self._write_queue: queue.Queue[
+            tuple[list[str], list[dict[str, Any]]] | None
+        ] = queue.Queue()
+        self._worker: threading.Thread | None = None
+        self._last_save = time.monotonic()
 
         self.load_embeddings()
+        _open_stores.add(self)
+
+    @property
+    def embedding_model(self) -> EmbeddingBackend:
+        """The embedding backend, loaded from the shared registry on first use."""
+        if self._embedding_model is None:
+            self._embedding_model = get_embedding_backend(
+                self.embedding_model_name, self.embedding_runtime
+            )
+        return self._embedding_model
 
     def load_embeddings(self) -> None:
-        """Load existing embeddings index and metadata."""
+        """
+        Load existing embeddings index and metadata.
+
+        Raises:
+            ValueError: If the index was built with a different model or
+                embedding dimension than this store is configured for
+        """
+        with file_lock(self.embeddings_lock_path, shared=True):
+            self._load_embeddings()
+
+    def _load_embeddings(self) -> None:
+        """Load the index and metadata; the caller holds the file lock."""
+        metadata_path = self.embeddings_path.with_suffix(".metadata.json")
+        self._disk_version = file_version(metadata_path)
+        stored_model: str | None = None
+        stored_dim: int | None = None
         if self.embeddings_path.exists():
             try:
                 # Load FAISS index
                 self.index = faiss.read_index(str(self.embeddings_path))
+                configure_search(self.index, self.index_config)
+                self.embedding_dim = self.index.d
 
                 # Load text and metadata databases
-                metadata_path = self.embeddings_path.with_suffix(".metadata.json")
                 if metadata_path.exists():
                     with open(metadata_path) as f:
                         data = json.load(f)
-                        self.text_database = data.get("texts", [])
-                        self.metadata_database = data.get("metadata", [])
+                        self.records = MemoryRecords.from_lists(
+                            data.get("texts", []), data.get("metadata", [])
+                        )
+                        stored_model = data.get("model")
+                        stored_dim = data.get("dimension", self.index.d)
 
                 print(
                     f"✅ Loaded {len(self.text_database)} embeddings from {self.embeddings_path}"
@@ -69,142 +299,1195 @@ class EnhancedMemoryStore(SimpleMemoryStore):
             except Exception as e:
                 print(f"⚠️  Could not load embeddings: {e}. Starting fresh.")
                 self._initialize_fresh_index()
+                stored_model = None
         else:
             self._initialize_fresh_index()
 
+        # Files written before the model was recorded have no name to compare:
+        # only their dimension is checked, by _index_for on the first add, so
+        # another model of the same dimension is not caught. The next save
+        # records this store's model.
+        if stored_model is not None and (
+            stored_model != self.embedding_model_name or stored_dim != self.index.d
+        ):
+            raise ValueError(
+                f"{self.embeddings_path} holds {stored_dim}-d embeddings from "
+                f"{stored_model!r} (index is {self.index.d}-d); this store is "
+                f"configured for {self.embedding_model_name!r}"
+            )
+
+        # Rows from _saved_rows on, and count bumps of saved rows, exist only
+        # in this process until the next save
+        self._saved_rows = len(self.text_database)
+        self._pending_bumps: dict[str, tuple[Any, int]] = {}
+        self._unsaved_changes = False
+        self._reindex_rows()
+
     def _initialize_fresh_index(self) -> None:
-        """Initialize a fresh FAISS index."""
-        self.index = faiss.IndexFlatIP(self.embedding_dim)
-        self.text_database = []
-        self.metadata_database = []
+        """Reset to an empty store; the index is created on the first add."""
+        self.index = None
+        self.embedding_dim = None
+        self.records = MemoryRecords()
+
+    def _index_for(self, embeddings: np.ndarray) -> Any:
+        """Get the index for new embeddings, creating it from their dimension."""
+        dim = embeddings.shape[1]
+        if self.index is None:
+            self.embedding_dim = dim
+            try:
+                self.index = build_index(
+                    replace(self.index_config, index_type="flat"), dim, embeddings
+                )
+            except ValueError:
+                # int8 storage is trained once enough vectors are stored
+                self.index = faiss.IndexFlatIP(dim)
+        elif dim != self.index.d:
+            raise ValueError(
+                f"{self.embedding_model_name!r} produces {dim}-d embeddings but "
+                f"the index at {self.embeddings_path} is {self.index.d}-d"
+            )
+        return self.index
 
     def save_embeddings(self) -> None:
-        """Save embeddings index and metadata to disk."""
-        try:
-            # Save FAISS index
-            faiss.write_index(self.index, str(self.embeddings_path))
+        """
+        Save embeddings index and metadata to disk.
 
-            # Save text and metadata databases
+        Memories saved by other processes since this store last read the
+        files are merged in first, then the retention policies are applied.
+        Without retention policies, a store with no unsaved changes writes
+        nothing.
+        """
+        with self._lock:
+            self._last_save = time.monotonic()
+            if self.index is None:
+                return
+            if not (self._unsaved_changes or self._stale_rows or self.retention):
+                return
             metadata_path = self.embeddings_path.with_suffix(".metadata.json")
-            with open(metadata_path, "w") as f:
-                json.dump(
-                    {"texts": self.text_database, "metadata": self.metadata_database},
-                    f,
-                    indent=2,
-                    default=str,
+            try:
+                with file_lock(self.embeddings_lock_path):
+                    version = file_version(metadata_path)
+                    if version is not None and version != self._disk_version:
+                        self._merge_from_disk()
+                    if self._stale_rows:
+                        self._drop_stale_rows()
+                    if self.retention:
+                        self._evict_rows(time.time())
+                    self._write_embeddings()
+            except Exception as e:
+                print(f"❌ Error saving embeddings: {e}")
+
+    def apply_retention(self) -> dict[str, Any]:
+        """
+        Evict memories outside the retention policies now.
+
+        Returns:
+            Cumulative eviction stats, as reported by get_memory_analytics
+        """
+        if self.index is None:
+            self._trim_structured(time.time())
+        else:
+            self.save_embeddings()
+        return self.eviction_stats
+
+    def _evict_rows(self, now: float) -> None:
+        """
+        Remove indexed memories that their retention policy evicts, and trim
+        the structured store in the same pass.
+
+        Flat indexes drop rows in place. ANN indexes are rebuilt, so their
+        evictions wait until they add up to 1% of the index; the structured
+        store waits with them, so it never deletes a memory a row still
+        references.
+        """
+        times = np.frombuffer(self.metadata_index.row_times, dtype=np.float64)
+        retrieved = self.records.epochs("last_retrieved")
+        evictions: list[tuple[str, str, np.ndarray]] = []
+        for agent_name in self.metadata_index.agent_rows:
+            for memory_type in self.metadata_index.type_rows:
+                policy = policy_for(self.retention, agent_name, memory_type)
+                if policy is None:
+                    continue
+                rows = self.metadata_index.rows_of(agent_name, memory_type)
+                expired, overflow = select_evictions(
+                    policy, rows, times[rows], retrieved[rows], now
                 )
+                evictions.append((agent_name, "ttl", expired))
+                evictions.append((agent_name, "max_entries", overflow))
+
+        n_evicted = sum(len(rows) for _, _, rows in evictions)
+        if (
+            index_type_of(self.index) != "flat"
+            and 0 < n_evicted < len(self.text_database) // 100
+        ):
+            return
+        if n_evicted:
+            self._apply_evictions(evictions)
+        self._trim_structured(now)
+
+    def _apply_evictions(self, evictions: list[tuple[str, str, np.ndarray]]) -> None:
+        """
+        Remove evicted rows and their structured memories, and count them.
+
+        Args:
+            evictions: Agent name, reason ("ttl" or "max_entries") and row
+                ids of each group of evicted rows
+        """
+        evicted = np.unique(np.concatenate([rows for _, _, rows in evictions]))
+        memory_ids = [self.records.value(row, "memory_id") for row in evicted.tolist()]
+        self._remove_rows(evicted)
+        stats = self.eviction_stats
+        # The evicted memories' only copy is in the structured store
+        stats["structured_trimmed"] += self.structured_store.delete(
+            [memory_id for memory_id in memory_ids if memory_id is not None]
+        )
+        for agent_name, reason, rows in evictions:
+            stats["evicted_by_reason"][reason] += len(rows)
+            by_agent = stats["evicted_by_agent"]
+            by_agent[agent_name] = by_agent.get(agent_name, 0) + len(rows)
+        stats["evicted"] += len(evicted)
+        stats["last_eviction"] = datetime.now(timezone.utc).isoformat()
+        print(f"🧹 Evicted {len(evicted)} memories past their retention policy")
 
-            print(
-                f"💾 Saved {len(self.text_database)} embeddings to {self.embeddings_path}"
+    def _remove_rows(self, rows: np.ndarray) -> None:
+        """
+        Delete rows from the index and databases, renumbering the rest.
+
+        The per-row indexes drop the removed ids and shift the others down,
+        so no text is re-hashed, re-tokenized or read back from the
+        structured store.
+        """
+        rows = np.unique(np.asarray(rows, dtype=np.int64))
+        keep = np.ones(len(self.text_database), dtype=bool)
+        keep[rows] = False
+        kept = np.flatnonzero(keep)
+
+        if index_type_of(self.index) == "flat":
+            # Flat indexes compact in place, keeping row ids positional
+            self.index.remove_ids(faiss.IDSelectorBatch(rows))
+        else:
+            vectors = self.index.reconstruct_batch(kept)
+            config = replace(self.index_config, index_type=index_type_of(self.index))
+            try:
+                index = build_index(config, self.index.d, vectors)
+            except ValueError:
+                # Too few memories left to train the ANN index
+                index = faiss.IndexFlatIP(self.index.d)
+            index.add(vectors)
+            self.index = index
+
+        texts = self.records.texts
+        self._record_backed -= sum(texts[row] is None for row in rows.tolist())
+        self.records = self.records.take(kept)
+        self._saved_rows = int(keep[: self._saved_rows].sum())
+        self._unsaved_changes = True
+
+        self.metadata_index.remove_rows(rows)
+        self.lexical_index.remove_rows(rows)
+        if self.content_ids:
+            hashes = np.array(list(self.content_ids), dtype=object)
+            survives, new_rows = renumber_rows(
+                np.fromiter(self.content_ids.values(), np.int64, len(hashes)), rows
             )
-        except Exception as e:
-            print(f"❌ Error saving embeddings: {e}")
+            self.content_ids = dict(
+                zip(hashes[survives].tolist(), new_rows.tolist(), strict=True)
+            )
+        if self._stale_rows:
+            _, stale = renumber_rows(np.array(sorted(self._stale_rows)), rows)
+            self._stale_rows = set(stale.tolist())
+
+    def _trim_structured(self, now: float) -> None:
+        """
+        Apply the retention limits to structured memories no row references.
+
+        Without an index that is every memory, trimmed oldest first. With
+        one, indexed memories are deleted by row eviction in the policy's
+        order, so this only drops unreferenced memories, like superseded
+        duplicates: expired ones, then the oldest while the group is over
+        max_entries.
+        """
+        for agent_name, counts in self.structured_store.get_memory_summary().items():
+            for memory_type in ("fact", "interaction"):
+                policy = policy_for(self.retention, agent_name, memory_type)
+                if policy is None:
+                    continue
+                since = None
+                if policy.ttl_seconds is not None:
+                    since = datetime.fromtimestamp(
+                        now - policy.ttl_seconds, timezone.utc
+                    )
+                if self.index is None:
+                    trimmed = self.structured_store.trim(
+                        agent_name, memory_type, policy.max_entries, since
+                    )
+                else:
+                    trimmed = self.structured_store.delete(
+                        self._unreferenced_overflow(
+                            agent_name,
+                            memory_type,
+                            counts[f"{memory_type}_count"],
+                            policy.max_entries,
+                            since,
+                        )
+                    )
+                self.eviction_stats["structured_trimmed"] += trimmed
+
+    def _unreferenced_overflow(
+        self,
+        agent_name: str,
+        memory_type: str,
+        count: int,
+        max_entries: int | None,
+        since: datetime | None,
+    ) -> list[str]:
+        """
+        Get the IDs of an agent's unreferenced memories outside a policy.
+
+        Args:
+            agent_name: Agent whose memories are checked
+            memory_type: "fact" or "interaction"
+            count: Structured memories the agent has of that type
+            max_entries: Most memories kept; None for no limit
+            since: Memories stamped before this are expired; None for no TTL
+
+        Returns:
+            Memory IDs to delete, oldest first
+        """
+        expired: list[dict[str, Any]] = []
+        if since is not None:
+            cutoff = local_timestamp(since)
+            expired = [
+                entry
+                for entry in self.structured_store.get_memories_between(
+                    agent_name, memory_type, until=since
+                )
+                if entry["timestamp"] < cutoff
+            ]
+        excess = count - max_entries if max_entries is not None else 0
+        if not expired and excess <= 0:
+            return []
+
+        rows = self.metadata_index.rows_of(agent_name, memory_type)
+        referenced = {self.records.value(row, "memory_id") for row in rows.tolist()}
+        drop = [entry["id"] for entry in expired if entry["id"] not in referenced]
+        if excess > len(drop):
+            entries = (
+                self.structured_store.get_agent_history(agent_name)
+                if memory_type == "interaction"
+                else self.structured_store.get_agent_facts(agent_name)
+            )
+            dropped = set(drop)
+            for entry in entries:
+                if len(drop) >= excess:
+                    break
+                if entry["id"] not in referenced and entry["id"] not in dropped:
+                    drop.append(entry["id"])
+        return drop
+
+    def _write_embeddings(self) -> None:
+        """Write the index and metadata files; the caller holds the file lock."""
+        # Write both files before replacing either, so a failure leaves the
+        # previous pair intact
+        metadata_path = self.embeddings_path.with_suffix(".metadata.json")
+        index_tmp = self.embeddings_path.with_suffix(".index.tmp")
+        metadata_tmp = self.embeddings_path.with_suffix(".metadata.json.tmp")
+        faiss.write_index(self.index, str(index_tmp))
+        with open(metadata_tmp, "w") as f:
+            header = {
+                "model": self.embedding_model_name,
+                "dimension": self.index.d,
+                # Null for structured store memories
+                "texts": self.records.texts,
+            }
+            # Metadata dicts are materialized one row at a time
+            f.write(json.dumps(header, default=str)[:-1] + ', "metadata": [')
+            for row, metadata in enumerate(self.records.iter_metadata()):
+                f.write(("," if row else "") + "\n" + json.dumps(metadata, default=str))
+            f.write("\n]}")
+        os.replace(index_tmp, self.embeddings_path)
+        os.replace(metadata_tmp, metadata_path)
+
+        self._disk_version = file_version(metadata_path)
+        self._saved_rows = len(self.text_database)
+        self._pending_bumps = {}
+        self._unsaved_changes = False
+        print(
+            f"💾 Saved {len(self.text_database)} embeddings to {self.embeddings_path}"
+        )
+
+    def _merge_from_disk(self) -> None:
+        """
+        Rebase unsaved rows and count bumps onto the files another process saved.
+
+        Unsaved rows whose text the other process also stored are folded into
+        its row. The caller holds self._lock and the file lock.
+
+        Raises:
+            ValueError: If the saved index uses another model or dimension
+        """
+        metadata_path = self.embeddings_path.with_suffix(".metadata.json")
+        disk_index = faiss.read_index(str(self.embeddings_path))
+        with open(metadata_path) as f:
+            data = json.load(f)
+        if data.get(
+            "model", self.embedding_model_name
+        ) != self.embedding_model_name or (
+            self.index is not None and disk_index.d != self.index.d
+        ):
+            raise ValueError(
+                f"{self.embeddings_path} was saved by a store using "
+                f"{data.get('model')!r} ({disk_index.d}-d)"
+            )
+        records = MemoryRecords.from_lists(
+            data.get("texts", []), data.get("metadata", [])
+        )
+
+        # Pick up the structured store memories the other process references
+        self.structured_store.refresh()
+        disk_texts = self._texts(list(range(len(records))), records)
+        disk_rows = {
+            self._content_hash(text): row
+            for row, text in enumerate(disk_texts)
+            if text is not None
+        }
+        bumps = dict(self._pending_bumps)
+        new_rows = []
+        unsaved = list(range(self._saved_rows, len(self.records)))
+        for row, text in zip(unsaved, self._texts(unsaved), strict=True):
+            key = self._content_hash(text) if text is not None else None
+            if self.deduplicate and key in disk_rows:
+                metadata = self.metadata_database[row]
+                _, count = bumps.get(key, (None, 0))
+                bumps[key] = (
+                    metadata.get("last_seen") or metadata.get("timestamp"),
+                    count + metadata.get("count", 1),
+                )
+            else:
+                new_rows.append(row)
+
+        for key, (last_seen, count) in bumps.items():
+            if key in disk_rows:
+                existing = records.metadata[disk_rows[key]]
+                existing["last_seen"] = last_seen
+                existing["count"] = existing.get("count", 1) + count
+
+        if new_rows:
+            disk_index.add(
+                self.index.reconstruct_batch(np.array(new_rows, dtype=np.int64))
+            )
+        configure_search(disk_index, self.index_config)
+
+        self.index = disk_index
+        self.embedding_dim = disk_index.d
+        self._saved_rows = len(records)
+        for row in new_rows:
+            records.append(self.records.texts[row], self.records.metadata_dict(row))
+        self.records = records
+        # Kept until written, in case another process saves first again
+        self._pending_bumps = bumps
+        self._disk_version = file_version(metadata_path)
+        self._reindex_rows()
+
+    def refresh(self) -> None:
+        """Pick up memories that other processes sharing the files have saved."""
+        metadata_path = self.embeddings_path.with_suffix(".metadata.json")
+        with self._lock, file_lock(self.embeddings_lock_path, shared=True):
+            version = file_version(metadata_path)
+            if version is not None and version != self._disk_version:
+                self._merge_from_disk()
+        self.structured_store.refresh()
+
+    @property
+    def has_unsaved_changes(self) -> bool:
+        """Whether the index or its rows changed since they were last saved."""
+        return self._unsaved_changes or bool(self._stale_rows)
+
+    @property
+    def text_database(self) -> "TextColumn":
+        """Embedded text of each row, None where its memory no longer exists."""
+        return TextColumn(self)
+
+    def _texts(
+        self, rows: list[int], records: MemoryRecords | None = None
+    ) -> list[str | None]:
+        """
+        Get the embedded texts of rows, rebuilding structured store memories.
+
+        Args:
+            rows: Row ids
+            records: Records the rows belong to; defaults to this store's
+
+        Returns:
+            Texts in row order; None where the referenced memory is gone
+        """
+        if records is None:
+            records = self.records
+        texts = [records.texts[row] for row in rows]
+        missing = {
+            i: records.value(row, "memory_id")
+            for i, row in enumerate(rows)
+            if texts[i] is None
+        }
+        if missing:
+            found = self.structured_store.get_records(list(missing.values()))
+            for i, memory_id in missing.items():
+                if memory_id in found:
+                    texts[i] = self._record_content(found[memory_id])[0]
+        return texts
+
+    def _materialize(self, rows: list[int]) -> list[tuple[str, dict[str, Any]] | None]:
+        """
+        Build the text and full metadata of rows for search results.
+
+        Returns:
+            (text, metadata) per row; None where the referenced memory is gone
+        """
+        memory_ids = [
+            self.records.value(row, "memory_id")
+            for row in rows
+            if self.records.texts[row] is None
+        ]
+        found = self.structured_store.get_records(memory_ids) if memory_ids else {}
+        entries: list[tuple[str, dict[str, Any]] | None] = []
+        for row in rows:
+            text = self.records.texts[row]
+            metadata = self.records.metadata_dict(row)
+            if text is None:
+                record = found.get(metadata.get("memory_id", ""))
+                if record is None:
+                    entries.append(None)
+                    continue
+                text, content = self._record_content(record)
+                metadata.update(content)
+            entries.append((text, metadata))
+        return entries
+
+    def _drop_stale_rows(self) -> None:
+        """Remove rows whose memory was deleted from the structured store."""
+        # Another process may have stored the memory since we last looked
+        self.structured_store.refresh()
+        rows = sorted(self._stale_rows)
+        self._stale_rows = set()
+        gone = [
+            row
+            for row, text in zip(rows, self._texts(rows), strict=True)
+            if text is None
+        ]
+        if gone:
+            self._remove_rows(np.array(gone, dtype=np.int64))
+            print(f"🧹 Dropped {len(gone)} memories deleted from the structured store")
+
+    @property
+    def metadata_database(self) -> MetadataColumn:
+        """Dict-like metadata view of each row."""
+        return self.records.metadata
+
+    def _content_hash(self, text: str) -> str:
+        """
+        Hash the embedded text for deduplication.
+
+        The text starts with the agent name, which scopes repeats to the
+        agent; with dedup_scope "global" that line is left out.
+        """
+        if self.dedup_scope == "global" and text.startswith("Agent: "):
+            text = text.partition("\n")[2]
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _mark_seen_again(
+        existing: MutableMapping[str, Any], incoming: dict[str, Any]
+    ) -> None:
+        """Update metadata of a stored memory that was written again."""
+        existing["last_seen"] = incoming.get("timestamp")
+        existing["count"] = existing.get("count", 1) + 1
+        same_agent = incoming.get("agent_name") == existing.get("agent_name")
+        if "memory_id" in incoming and same_agent:
+            # Follow the newest copy, which retention trims last; another
+            # agent's copy is trimmed by that agent's limits, so keep our own
+            existing["memory_id"] = incoming["memory_id"]
+
+    def _drop_duplicates(
+        self, texts: list[str], metadatas: list[dict[str, Any]]
+    ) -> tuple[list[str], list[dict[str, Any]], list[int]]:
+        """
+        Filter out texts that are already indexed or repeated within the input.
+
+        Duplicates bump the metadata of the entry they repeat and are not
+        encoded or added to the index again.
+
+        Returns:
+            The new texts, their metadata and their positions in the input
+        """
+        if not self.deduplicate:
+            return texts, metadatas, list(range(len(texts)))
+
+        new_texts: list[str] = []
+        new_metadatas: list[dict[str, Any]] = []
+        positions: list[int] = []
+        new_rows: dict[str, int] = {}
+        for position, (text, metadata) in enumerate(zip(texts, metadatas, strict=True)):
+            key = self._content_hash(text)
+            if key in self.content_ids:
+                row = self.content_ids[key]
+                existing = self.metadata_database[row]
+                if row < self._saved_rows:
+                    # Replayed onto the saved row if another process saves first
+                    _, count = self._pending_bumps.get(key, (None, 0))
+                    self._pending_bumps[key] = (metadata.get("timestamp"), count + 1)
+            elif key in new_rows:
+                existing = new_metadatas[new_rows[key]]
+            else:
+                new_rows[key] = len(new_texts)
+                new_texts.append(text)
+                new_metadatas.append(metadata)
+                positions.append(position)
+                continue
+            self._mark_seen_again(existing, metadata)
+            self.duplicates_skipped += 1
+            self._unsaved_changes = True
+
+        return new_texts, new_metadatas, positions
+
+    def _append_rows(self, texts: list[str], metadatas: list[dict[str, Any]]) -> None:
+        """Add and index rows; texts of structured store memories are not kept."""
+        first_row = len(self.records)
+        self._unsaved_changes = True
+        for text, metadata in zip(texts, metadatas, strict=True):
+            self.records.append(None if "memory_id" in metadata else text, metadata)
+        self._register_rows(first_row, texts)
+
+    def _register_rows(
+        self, first_row: int, texts: Sequence[str | None] | None = None
+    ) -> None:
+        """
+        Index content hashes, metadata and terms of rows from first_row onwards.
+
+        Args:
+            first_row: First row to index
+            texts: Texts of the rows, if already at hand
+        """
+        rows = list(range(first_row, len(self.records)))
+        if texts is None:
+            texts = self._texts(rows)
+        for row, text in zip(rows, texts, strict=True):
+            self._record_backed += self.records.texts[row] is None
+            if text is None:
+                # Its memory was removed from the structured store
+                self._stale_rows.add(row)
+                text = ""
+            elif self.deduplicate:
+                self.content_ids[self._content_hash(text)] = row
+            metadata = self.metadata_database[row]
+            self.metadata_index.add_row(
+                metadata.get("agent_name", "unknown"),
+                metadata.get("type", "unknown"),
+                metadata.epoch,
+            )
+            self.lexical_index.add(text)
+
+    def _reindex_rows(self) -> None:
+        """Rebuild the per-row indexes after rows were loaded, merged or removed."""
+        self.content_ids = {}
+        self.metadata_index = MetadataIndex()
+        self.lexical_index = BM25Index()
+        self._stale_rows = set()
+        self._record_backed = 0
+        self._register_rows(0)
 
     def add_to_vector_store(self, text: str, metadata: dict[str, Any]) -> None:
         """
         Add text to vector store with embeddings.
 
+        Inside batch() the text is queued and embedded when the batch exits.
+        Text that is already indexed only has its metadata bumped.
+
         Args:
             text: Text to embed and store
-            metadata: Associated metadata (agent_name, timestamp, type, etc.)
+            metadata: Associated metadata (agent_name, timestamp, type, etc.).
+                With a memory_id, the text is rebuilt from that structured
+                store memory instead of being kept again.
         """
+        if self._batch_depth > 0:
+            self._pending_texts.append(text)
+            self._pending_metadata.append(metadata)
+            return
+        if self.write_behind:
+            self._enqueue([text], [metadata])
+            return
+
+        texts, _, _ = self._drop_duplicates([text], [metadata])
+        if not texts:
+            return
+
         try:
             # Generate embedding
             embedding = self.embedding_model.encode([text], normalize_embeddings=True)
             embedding = embedding.astype(np.float32)
 
             # Add to FAISS index
-            self.index.add(embedding)
+            self._index_for(embedding).add(embedding)
 
             # Add to databases
-            self.text_database.append(text)
-            self.metadata_database.append(metadata)
+            self._append_rows([text], [metadata])
 
             # Save periodically
-            if len(self.text_database) % 10 == 0:
+            if self._maybe_migrate_index() or len(self.text_database) % 10 == 0:
                 self.save_embeddings()
 
         except Exception as e:
             print(f"❌ Error adding to vector store: {e}")
 
+    def add_many_to_vector_store(
+        self,
+        texts: list[str],
+        metadatas: list[dict[str, Any]],
+        batch_size: int | None = None,
+    ) -> None:
+        """
+        Add many texts to the vector store with one batched encode.
+
+        All vectors are added to the FAISS index in a single call and the
+        store is saved once. Inside batch(), or in write-behind mode, the
+        texts are queued instead.
+
+        Args:
+            texts: Texts to embed and store
+            metadatas: Metadata for each text, in the same order
+            batch_size: Texts per model forward pass; defaults to
+                encode_batch_size
+        """
+        if len(texts) != len(metadatas):
+            raise ValueError("texts and metadatas must have the same length")
+        if not texts:
+            return
+
+        if self._batch_depth > 0:
+            self._pending_texts.extend(texts)
+            self._pending_metadata.extend(metadatas)
+            return
+        if self.write_behind:
+            self._enqueue(texts, metadatas)
+            return
+
+        try:
+            self._index_texts(texts, metadatas, batch_size)
+            self.save_embeddings()
+        except Exception as e:
+            print(f"❌ Error adding to vector store: {e}")
+
+    def _index_texts(
+        self,
+        texts: list[str],
+        metadatas: list[dict[str, Any]],
+        batch_size: int | None = None,
+        embeddings: np.ndarray | None = None,
+    ) -> None:
+        """
+        Deduplicate, encode and index texts without saving.
+
+        Args:
+            texts: Texts to index
+            metadatas: Metadata for each text, in the same order
+            batch_size: Texts per model forward pass
+            embeddings: Vectors of the texts, in the same order, to index
+                instead of encoding them
+        """
+        with self._lock:
+            texts, metadatas, positions = self._drop_duplicates(texts, metadatas)
+        if not texts:
+            # Only last_seen/count metadata changed
+            return
+
+        if embeddings is not None:
+            embeddings = np.ascontiguousarray(embeddings[positions], dtype=np.float32)
+        else:
+            # Encode without the lock so searches are not held up by the model
+            embeddings = self.embedding_model.encode(
+                texts,
+                batch_size=batch_size or self.encode_batch_size,
+                normalize_embeddings=True,
+            ).astype(np.float32)
+        with self._lock:
+            self._index_for(embeddings).add(embeddings)
+            self._append_rows(texts, metadatas)
+            self._maybe_migrate_index()
+
+    def _enqueue(self, texts: list[str], metadatas: list[dict[str, Any]]) -> None:
+        """Queue texts for the write-behind thread, starting it if needed."""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._write_behind_loop,
+                name="memory-write-behind",
+                daemon=True,
+            )
+            self._worker.start()
+        self._write_queue.put((texts, metadatas))
+
+    def _write_behind_loop(self) -> None:
+        """Drain the write queue in batches of up to encode_batch_size texts."""
+        stopping = False
+        while not stopping:
+            items = [self._write_queue.get()]
+            n_texts = 0 if items[0] is None else len(items[0][0])
+            while n_texts < self.encode_batch_size:
+                try:
+                    item = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                items.append(item)
+                n_texts += 0 if item is None else len(item[0])
+
+            texts: list[str] = []
+            metadatas: list[dict[str, Any]] = []
+            for item in items:
+                if item is None:
+                    stopping = True
+                else:
+                    texts.extend(item[0])
+                    metadatas.extend(item[1])
+
+            try:
+                if texts:
+                    self._index_texts(texts, metadatas)
+                if time.monotonic() - self._last_save >= self.save_interval:
+                    self.save_embeddings()
+            except Exception as e:
+                print(f"❌ Error adding to vector store: {e}")
+            finally:
+                for _ in items:
+                    self._write_queue.task_done()
+
+    def _wait_for_writes(self, read_your_writes: bool | None = None) -> None:
+        """Wait until queued writes are indexed, if the consistency asks for it."""
+        if read_your_writes is None:
+            read_your_writes = self.read_your_writes
+        if self.write_behind and read_your_writes:
+            self._write_queue.join()
+
+    def flush(self) -> None:
+        """Index every queued and batched write, then save to disk."""
+        if self._batch_depth == 0 and self._pending_texts:
+            self._flush_pending_vectors()
+        self._write_queue.join()
+        self.save_embeddings()
+
+    def close(self) -> None:
+        """Flush pending writes to disk and stop the write-behind thread."""
+        if self._worker is not None and self._worker.is_alive():
+            # The worker indexes everything queued before the sentinel
+            self._write_queue.put(None)
+            self._worker.join()
+        self._worker = None
+        self.flush()
+        _open_stores.discard(self)
+
+    def __enter__(self) -> "EnhancedMemoryStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _maybe_migrate_index(self) -> bool:
+        """
+        Migrate a flat index to the configured index type past the threshold,
+        or to the configured storage precision once it can be trained.
+        """
+        if self.index is None or index_type_of(self.index) != "flat":
+            return False
+
+        config = self.index_config
+        if config.index_type == "flat" or self.index.ntotal < config.migrate_threshold:
+            if storage_of(self.index) == config.storage or (
+                config.storage == "int8" and self.index.ntotal < config.sq_min_training
+            ):
+                return False
+            config = replace(config, index_type="flat")
+        try:
+            self.migrate_index(config)
+        except ValueError as e:
+            print(f"⚠️  Keeping flat index: {e}")
+            return False
+        return True
+
+    def migrate_index(self, config: IndexConfig | None = None) -> None:
+        """
+        Rebuild the vector index as another index type, keeping row ids.
+
+        Args:
+            config: Target configuration; defaults to index_config
+        """
+        with self._lock:
+            if self.index is None:
+                return
+            config = config or self.index_config
+            vectors = reconstruct_all(self.index)
+            index = build_index(config, self.index.d, vectors)
+            index.add(vectors)
+            self.index = index
+            self._unsaved_changes = True
+        print(
+            f"🔀 Migrated {len(vectors)} embeddings to a {config.index_type} "
+            f"index with {storage_of(index)} vectors"
+        )
+
+    def index_recall_report(
+        self,
+        queries: list[str],
+        configs: list[IndexConfig] | None = None,
+        top_k: int = 10,
+    ) -> list[dict[str, Any]]:
+        """
+        Compare ANN index types against exact flat search on this store's vectors.
+
+        Args:
+            queries: Sample query texts
+            configs: Configurations to compare; defaults to HNSW, IVF-Flat and
+                IVF-PQ with index_config's parameters
+            top_k: Neighbours per query used for recall
+
+        Returns:
+            Rows with index_type, build_seconds, query_ms and recall
+        """
+        if self.index is None:
+            return []
+        if configs is None:
+            configs = [
+                replace(self.index_config, index_type=index_type)
+                for index_type in ("hnsw", "ivf_flat", "ivf_pq")
+            ]
+        query_vectors = self.embedding_model.encode(
+            queries, normalize_embeddings=True
+        ).astype(np.float32)
+        return compare_index_configs(
+            reconstruct_all(self.index), query_vectors, configs, top_k
+        )
+
+    def _flush_pending_vectors(self) -> None:
+        """Embed and index all texts queued by batch()."""
+        texts, self._pending_texts = self._pending_texts, []
+        metadatas, self._pending_metadata = self._pending_metadata, []
+        self.add_many_to_vector_store(texts, metadatas)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Buffer writes and persist them once when the outermost batch exits.
+
+        Structured writes are grouped through the structured store's own
+        batch(); vector writes are embedded in a single encode call, added
+        with a single index add and saved once.
+
+        Example:
+            with store.batch():
+                store.store_interaction("agent", "input", "output")
+                store.store_fact("agent", "fact")
+        """
+        self._batch_depth += 1
+        try:
+            with self.structured_store.batch():
+                yield
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._flush_pending_vectors()
+
+    def _encode_queries(self, queries: list[str]) -> np.ndarray:
+        """Encode search queries as an (n, dim) matrix, using the query cache."""
+        cached = [
+            self.query_cache.get(self._query_cache_model, query) for query in queries
+        ]
+        # Group cache misses by key so repeated queries are encoded once
+        missing: dict[tuple[str, str], list[int]] = {}
+        for i, embedding in enumerate(cached):
+            if embedding is None:
+                key = self.query_cache.make_key(self._query_cache_model, queries[i])
+                missing.setdefault(key, []).append(i)
+
+        if missing:
+            # One forward pass for every query that is not cached yet
+            encoded = self.embedding_model.encode(
+                [queries[positions[0]] for positions in missing.values()],
+                normalize_embeddings=True,
+            ).astype(np.float32)
+            for positions, embedding in zip(missing.values(), encoded, strict=True):
+                embedding.setflags(write=False)
+                self.query_cache.put(
+                    self._query_cache_model, queries[positions[0]], embedding
+                )
+                for i in positions:
+                    cached[i] = embedding
+        # Every miss was filled above
+        return np.stack([embedding for embedding in cached if embedding is not None])
+
+    def _encode_query(self, query: str) -> np.ndarray:
+        """Encode a search query as a (1, dim) matrix, using the query cache."""
+        return self._encode_queries([query])
+
     def semantic_search(
         self,
         query: str,
         top_k: int = 5,
         agent_filter: str | None = None,
         min_similarity: float = 0.3,
+        type_filter: str | None = None,
+        since: str | datetime | None = None,
+        until: str | datetime | None = None,
+        read_your_writes: bool | None = None,
+        search_mode: str = "vector",
+        recency_half_life: float | None = None,
     ) -> list[dict[str, Any]]:
         """
         Perform semantic search across all stored memories.
 
+        Filters are resolved to a candidate id set before the vector search,
+        so filtered queries return up to top_k matches however rare the
+        filtered agent or type is.
+
+        Exact tokens such as drug names, tickers and years are better served
+        by "hybrid" mode, which fuses BM25 and vector rankings with reciprocal
+        rank fusion, or by "lexical" mode, which ranks by BM25 alone and never
+        runs the embedding model.
+
+        With recency_half_life set, each candidate's ranking score (cosine,
+        BM25 or fused score, by mode) is multiplied by 0.5 ** (age /
+        recency_half_life), so fresh findings outrank equally relevant stale
+        ones. The decay is computed over an enlarged candidate set in one
+        vectorized pass.
+
         Args:
             query: Search query text
             top_k: Number of top results to return
             agent_filter: Optional agent name to filter results
             min_similarity: Minimum cosine similarity threshold
+            type_filter: Optional memory type ("fact" or "interaction")
+            since: Optional earliest timestamp (inclusive; naive means
+                local time, as in get_memories_between)
+            until: Optional latest timestamp (inclusive; naive means
+                local time)
+            read_your_writes: In write-behind mode, wait for queued writes to
+                be indexed first; defaults to the store's read_your_writes
+            search_mode: "vector", "hybrid" or "lexical"; min_similarity
+                only applies to vector matches
+            recency_half_life: Seconds of age that halve a memory's score;
+                None disables decay. Undated memories are not decayed.
 
         Returns:
-            List of search results with text, metadata, and similarity scores
+            List of search results with text, metadata and rank, plus the
+            cosine "similarity" (vector and hybrid modes), "bm25" score
+            (hybrid and lexical modes) and "fused_score" (hybrid mode). With
+            decay, also "recency_weight" and the decayed "score".
         """
-        if len(self.text_database) == 0:
-            return []
+        return self.semantic_search_many(
+            [query],
+            top_k,
+            agent_filter,
+            min_similarity,
+            type_filter,
+            since,
+            until,
+            read_your_writes,
+            search_mode,
+            recency_half_life,
+        )[0]
 
-        try:
-            # Generate query embedding
-            query_embedding = self.embedding_model.encode(
-                [query], normalize_embeddings=True
-            )
-            query_embedding = query_embedding.astype(np.float32)
+    def semantic_search_many(
+        self,
+        queries: list[str],
+        top_k: int = 5,
+        agent_filter: str | None = None,
+        min_similarity: float = 0.3,
+        type_filter: str | None = None,
+        since: str | datetime | None = None,
+        until: str | datetime | None = None,
+        read_your_writes: bool | None = None,
+        search_mode: str = "vector",
+        recency_half_life: float | None = None,
+    ) -> list[list[dict[str, Any]]]:
+        """
+        Run several semantic searches with one batched encode and one index search.
 
-            # Search FAISS index
-            scores, indices = self.index.search(
-                query_embedding, min(top_k * 2, len(self.text_database))
+        Takes the same filters, search_mode and recency_half_life as
+        semantic_search, applied to every query.
+
+        Returns:
+            One result list per query, each as semantic_search would return it
+        """
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(
+                f"Unknown search_mode {search_mode!r}; expected one of {SEARCH_MODES}"
+            )
+        if recency_half_life is not None and recency_half_life <= 0:
+            raise ValueError("recency_half_life must be positive")
+        self._wait_for_writes(read_your_writes)
+        with self._lock:
+            return self._search_many(
+                queries,
+                top_k,
+                agent_filter,
+                min_similarity,
+                type_filter,
+                since,
+                until,
+                search_mode,
+                recency_half_life,
             )
 
-            results = []
-            for i, (score, idx) in enumerate(zip(scores[0], indices[0], strict=False)):
-                if score < min_similarity:
-                    continue
+    def _search_many(
+        self,
+        queries: list[str],
+        top_k: int,
+        agent_filter: str | None,
+        min_similarity: float,
+        type_filter: str | None,
+        since: str | datetime | None,
+        until: str | datetime | None,
+        search_mode: str,
+        recency_half_life: float | None,
+    ) -> list[list[dict[str, Any]]]:
+        """Search the indexed rows; see semantic_search_many."""
+        if len(self.text_database) == 0 or not queries:
+            return [[] for _ in queries]
 
-                metadata = self.metadata_database[idx]
+        try:
+            rows = self.metadata_index.candidates(
+                agent_filter, type_filter, since, until
+            )
+            # Fusion and decay re-rank, so they need a deeper candidate set
+            depth = top_k
+            if search_mode == "hybrid" or recency_half_life is not None:
+                depth = top_k * _FUSION_DEPTH
 
-                # Apply agent filter if specified
-                if agent_filter and metadata.get("agent_name") != agent_filter:
-                    continue
+            # Per query: candidate ids, their score columns, and ranking scores
+            rankings: list[tuple[np.ndarray, dict[str, np.ndarray], np.ndarray]] = []
+            if search_mode == "lexical":
+                # Keyword lookups never touch the embedding model
+                for query in queries:
+                    bm25_scores, ids = self.lexical_index.search(query, depth, rows)
+                    rankings.append((ids, {"bm25": bm25_scores}, bm25_scores))
+            else:
+                # Generate (or reuse) query embeddings
+                query_embeddings = self._encode_queries(queries)
 
-                results.append(
-                    {
-                        "text": self.text_database[idx],
-                        "metadata": metadata,
-                        "similarity": float(score),
-                        "rank": i + 1,
-                    }
-                )
+                # Search FAISS index within the filtered candidates
+                hits = search_many(self.index, query_embeddings, depth, rows)
+                for query, embedding, (scores, ids) in zip(
+                    queries, query_embeddings, hits, strict=True
+                ):
+                    matched = scores >= min_similarity
+                    scores, ids = scores[matched], ids[matched]
+                    if search_mode == "vector":
+                        rankings.append((ids, {"similarity": scores}, scores))
+                    else:
+                        rankings.append(
+                            self._fuse(query, embedding, scores, ids, depth, rows)
+                        )
 
-                if len(results) >= top_k:
-                    break
+            now = time.time()
+            all_results = []
+            for ids, columns, ranking in rankings:
+                if recency_half_life is not None:
+                    weights = self._recency_weights(ids, recency_half_life, now)
+                    ranking = ranking * weights
+                    columns = {**columns, "recency_weight": weights, "score": ranking}
+                    # Stable, so equally weighted rows keep their relevance order
+                    order = np.argsort(-ranking, kind="stable")[:top_k]
+                else:
+                    order = np.arange(min(top_k, len(ids)))
+                all_results.append(
+                    self._build_results(
+                        ids[order],
+                        **{name: values[order] for name, values in columns.items()},
+                    )
+                )
 
-            return results
+            return all_results
 
         except Exception as e:
             print(f"❌ Error in semantic search: {e}")
-            return []
+            return [[] for _ in queries]
 
-    def store_interaction(
-        self, agent_name: str, input_message: str, output_message: str
-    ) -> None:
-        """Enhanced interaction storage with embeddings."""
-        # Call parent method for structured storage
-        super().store_interaction(agent_name, input_message, output_message)
+    def _fuse(
+        self,
+        query: str,
+        embedding: np.ndarray,
+        scores: np.ndarray,
+        ids: np.ndarray,
+        depth: int,
+        rows: np.ndarray | None,
+    ) -> tuple[np.ndarray, dict[str, np.ndarray], np.ndarray]:
+        """
+        Fuse vector hits with BM25 hits for the same query.
 
-        # Add to vector store for semantic search
+        Returns:
+            Fused row ids, their similarity, BM25 and fused score columns,
+            and the fused scores to rank by
+        """
+        bm25_scores, bm25_ids = self.lexical_index.search(query, depth, rows)
+        fused = reciprocal_rank_fusion([ids, bm25_ids])[:depth]
+        fused_ids = np.array([row for row, _ in fused], dtype=np.int64)
+        fused_scores = np.array([score for _, score in fused], dtype=np.float32)
+        bm25 = dict(zip(bm25_ids.tolist(), bm25_scores.tolist(), strict=True))
+        similarity = np.zeros(0, dtype=np.float32)
+        if len(fused_ids):
+            # Exact cosine, also for rows only BM25 matched
+            similarity = self.index.reconstruct_batch(fused_ids) @ embedding
+        columns = {
+            "similarity": similarity,
+            "bm25": np.array([bm25.get(row, 0.0) for row in fused_ids.tolist()]),
+            "fused_score": fused_scores,
+        }
+        return fused_ids, columns, fused_scores
+
+    def _recency_weights(
+        self, ids: np.ndarray, half_life: float, now: float
+    ) -> np.ndarray:
+        """Halve weights per half_life seconds of age; undated rows keep 1.0."""
+        times = np.frombuffer(self.metadata_index.row_times, dtype=np.float64)[ids]
+        age = np.maximum(now - times, 0.0)
+        return np.where(np.isnan(age), 1.0, 0.5 ** (age / half_life))
+
+    def _build_results(self, ids: np.ndarray, **scores: Any) -> list[dict[str, Any]]:
+        """
+        Turn ranked row ids into search results.
+
+        Args:
+            ids: Row ids, best first
+            **scores: Per-row score arrays, aligned with ids, added to each
+                result under their keyword name
+
+        Returns:
+            Results with text, metadata, rank and the given scores
+        """
+        rows = ids.tolist()
+        if self._track_retrieval and rows:
+            retrieved_at = datetime.now(timezone.utc).isoformat()
+            for row in rows:
+                self.records.set(row, "last_retrieved", retrieved_at)
+            self._unsaved_changes = True
+
+        results: list[dict[str, Any]] = []
+        for i, (row, entry) in enumerate(
+            zip(rows, self._materialize(rows), strict=True)
+        ):
+            if entry is None:
+                # Dropped from the index on the next save
+                self._stale_rows.add(row)
+                continue
+            result = {"text": entry[0], "metadata": entry[1], "rank": len(results) + 1}
+            for name, values in scores.items():
+                result[name] = float(values[i])
+            results.append(result)
+        return results
+
+    @staticmethod
+    def _interaction_content(
+        agent_name: str, input_message: str, output_message: str
+    ) -> tuple[str, dict[str, Any]]:
+        """Build the embedded text and content metadata of an interaction."""
         interaction_text = (
             f"Agent: {agent_name}\nInput: {input_message}\nOutput: {output_message}"
         )
-        metadata = {
-            "agent_name": agent_name,
-            "type": "interaction",
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+        content = {
             "input": input_message,
             "output": (
                 output_message[:200] + "..."
@@ -212,67 +1495,542 @@ class EnhancedMemoryStore(SimpleMemoryStore):
                 else output_message
             ),
         }
-        self.add_to_vector_store(interaction_text, metadata)
+        return interaction_text, content
 
-    def store_fact(self, agent_name: str, fact: str) -> None:
-        """Enhanced fact storage with embeddings."""
-        # Call parent method for structured storage
-        super().store_fact(agent_name, fact)
+    @staticmethod
+    def _fact_content(agent_name: str, fact: str) -> tuple[str, dict[str, Any]]:
+        """Build the embedded text and content metadata of a fact."""
+        return f"Agent: {agent_name}\nFact: {fact}", {"fact": fact}
 
-        # Add to vector store for semantic search
-        fact_text = f"Agent: {agent_name}\nFact: {fact}"
+    def _record_content(self, record: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+        """Rebuild the embedded text and content metadata of a structured memory."""
+        if record["type"] == "interaction":
+            return self._interaction_content(
+                record["agent_name"], record["input"], record["output"]
+            )
+        return self._fact_content(record["agent_name"], record["fact"])
+
+    @staticmethod
+    def _reference(
+        text: str,
+        content: dict[str, Any],
+        metadata: dict[str, Any],
+        memory_id: str | None,
+    ) -> tuple[str, dict[str, Any]]:
+        """Point metadata at a structured memory, or keep its content without one."""
+        if memory_id is None:
+            metadata.update(content)
+        else:
+            metadata["memory_id"] = memory_id
+        return text, metadata
+
+    def _interaction_entry(
+        self,
+        agent_name: str,
+        input_message: str,
+        output_message: str,
+        memory_id: str | None = None,
+    ) -> tuple[str, dict[str, Any]]:
+        """
+        Build the embedded text and metadata for an interaction.
+
+        Args:
+            agent_name: Name of the agent
+            input_message: Input to the agent
+            output_message: Output of the agent
+            memory_id: Structured store memory the row references; without
+                one the input and output are kept in the metadata
+        """
+        metadata = {
+            "agent_name": agent_name,
+            "type": "interaction",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        return self._reference(
+            *self._interaction_content(agent_name, input_message, output_message),
+            metadata,
+            memory_id,
+        )
+
+    def _fact_entry(
+        self, agent_name: str, fact: str, memory_id: str | None = None
+    ) -> tuple[str, dict[str, Any]]:
+        """
+        Build the embedded text and metadata for a fact.
+
+        Args:
+            agent_name: Name of the agent
+            fact: The fact
+            memory_id: Structured store memory the row references; without
+                one the fact is kept in the metadata
+        """
         metadata = {
             "agent_name": agent_name,
             "type": "fact",
             "timestamp": datetime.now(timezone.utc).isoformat(),
-            "fact": fact,
         }
-        self.add_to_vector_store(fact_text, metadata)
+        return self._reference(
+            *self._fact_content(agent_name, fact), metadata, memory_id
+        )
+
+    def store_interaction(
+        self, agent_name: str, input_message: str, output_message: str
+    ) -> str:
+        """
+        Enhanced interaction storage with embeddings.
+
+        Returns:
+            The memory ID of the interaction
+        """
+        # Structured storage, the only copy of the interaction
+        memory_id = self.structured_store.store_interaction(
+            agent_name, input_message, output_message
+        )
+
+        # Add to vector store for semantic search
+        self.add_to_vector_store(
+            *self._interaction_entry(
+                agent_name, input_message, output_message, memory_id
+            )
+        )
+        return memory_id
+
+    def store_fact(self, agent_name: str, fact: str) -> str:
+        """
+        Enhanced fact storage with embeddings.
+
+        Returns:
+            The memory ID of the fact
+        """
+        # Structured storage, the only copy of the fact
+        memory_id = self.structured_store.store_fact(agent_name, fact)
+
+        # Add to vector store for semantic search
+        self.add_to_vector_store(*self._fact_entry(agent_name, fact, memory_id))
+        return memory_id
+
+    def store_interactions_bulk(
+        self,
+        interactions: Iterable[tuple[str, str, str]],
+        batch_size: int | None = None,
+    ) -> None:
+        """
+        Store many interactions with one structured flush and one batched encode.
+
+        Args:
+            interactions: (agent_name, input_message, output_message) tuples
+            batch_size: Texts per model forward pass
+        """
+        texts: list[str] = []
+        metadatas: list[dict[str, Any]] = []
+        with self.structured_store.batch():
+            for agent_name, input_message, output_message in interactions:
+                memory_id = self.structured_store.store_interaction(
+                    agent_name, input_message, output_message
+                )
+                text, metadata = self._interaction_entry(
+                    agent_name, input_message, output_message, memory_id
+                )
+                texts.append(text)
+                metadatas.append(metadata)
+        self.add_many_to_vector_store(texts, metadatas, batch_size=batch_size)
+
+    def store_facts_bulk(
+        self, facts: Iterable[tuple[str, str]], batch_size: int | None = None
+    ) -> None:
+        """
+        Store many facts with one structured flush and one batched encode.
+
+        Args:
+            facts: (agent_name, fact) tuples
+            batch_size: Texts per model forward pass
+        """
+        texts: list[str] = []
+        metadatas: list[dict[str, Any]] = []
+        with self.structured_store.batch():
+            for agent_name, fact in facts:
+                memory_id = self.structured_store.store_fact(agent_name, fact)
+                text, metadata = self._fact_entry(agent_name, fact, memory_id)
+                texts.append(text)
+                metadatas.append(metadata)
+        self.add_many_to_vector_store(texts, metadatas, batch_size=batch_size)
+
+    def iter_records(
+        self, include_embeddings: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Yield every memory as a record, reading chunk_size index rows at a time.
+
+        A row referencing a structured store memory yields that memory's
+        record (as get_record returns it) with the row's "metadata" added.
+        Other rows yield their "text" and "metadata". Structured store
+        memories without a row, like repeats folded into an existing row,
+        follow without metadata; they are streamed and checked against a
+        sorted copy of the index's memory ID column a chunk at a time.
+
+        Args:
+            include_embeddings: Add each row's stored vector as "embedding"
+            chunk_size: Index rows, then structured memories, read at a time
+
+        Yields:
+            Memory records, in row order
+        """
+        self._wait_for_writes(True)
+        with self._lock:
+            # 8 bytes per row; rows added from here on are yielded below,
+            # and their memories again at worst, which import_ skips
+            indexed_ids, other_ids = self.records.sorted_ids()
+        start = 0
+        while True:
+            with self._lock:
+                rows = list(range(start, min(start + chunk_size, len(self.records))))
+                if not rows:
+                    break
+                texts = [self.records.texts[row] for row in rows]
+                metadatas = [self.records.metadata_dict(row) for row in rows]
+                vectors = (
+                    self.index.reconstruct_batch(np.array(rows, dtype=np.int64))
+                    if include_embeddings
+                    else None
+                )
+            start += len(rows)
+
+            found = self.structured_store.get_records(
+                [m["memory_id"] for m in metadatas if "memory_id" in m]
+            )
+            for i, (text, metadata) in enumerate(zip(texts, metadatas, strict=True)):
+                if text is None:
+                    record = found.get(metadata["memory_id"])
+                    if record is None:
+                        # Removed from the structured store
+                        continue
+                    record = {**record, "metadata": metadata}
+                else:
+                    record = {"text": text, "metadata": metadata}
+                if vectors is not None:
+                    record["embedding"] = vectors[i].tolist()
+                yield record
+
+        for chunk in chunked(self.structured_store.iter_records(), chunk_size):
+            codes = encode_ids([record.get("id") for record in chunk])
+            indexed = np.zeros(len(chunk), dtype=bool)
+            if len(indexed_ids):
+                positions = np.searchsorted(indexed_ids, codes)
+                positions = positions.clip(max=len(indexed_ids) - 1)
+                indexed = (indexed_ids[positions] == codes) & (codes != 0)
+            for record, is_indexed in zip(chunk, indexed.tolist(), strict=True):
+                if not is_indexed and record.get("id") not in other_ids:
+                    yield record
+
+    def export(
+        self,
+        path: str | Path,
+        format: str | None = None,
+        include_embeddings: bool = True,
+    ) -> int:
+        """
+        Stream the store to an NDJSON or Parquet file in bounded memory.
+
+        The file records the embedding model, so import_ into a store using
+        the same model reuses the vectors instead of re-encoding.
+
+        Args:
+            path: Export file
+            format: "ndjson" or "parquet"; inferred from the suffix if None
+            include_embeddings: Export the stored vectors too
+
+        Returns:
+            Number of records written
+        """
+        header = {"model": self.embedding_model_name, "dimension": self.embedding_dim}
+        return write_records(
+            path, self.iter_records(include_embeddings), format, header=header
+        )
+
+    def import_(
+        self,
+        path: str | Path,
+        format: str | None = None,
+        batch_size: int | None = None,
+    ) -> int:
+        """
+        Stream an export into this store, one chunk of records at a time.
+
+        Structured memories are added to the structured store, keeping their
+        IDs; ones already stored are skipped, and so are their rows. Rows
+        are indexed with their exported vectors when the export was made
+        with this store's model and dimension, and encoded otherwise.
+        Memories exported without a row, such as every memory in a
+        SimpleMemoryStore or SqliteMemoryStore export, are encoded and
+        given one. Rows whose text is already indexed are skipped too, so
+        importing a file twice changes nothing.
+
+        Args:
+            path: Export file, written by export
+            format: "ndjson" or "parquet"; inferred from the suffix if None
+            batch_size: Texts per model forward pass when encoding
+
+        Returns:
+            Number of rows added to the vector index
+        """
+        header = read_header(path, format)
+        with self._lock:
+            dimension = self.index.d if self.index is not None else None
+        reuse = header.get("model") == self.embedding_model_name and (
+            dimension is None or header.get("dimension") == dimension
+        )
+        self._wait_for_writes(True)
+        rows_before = len(self.records)
+        encoded = 0
+
+        for chunk in chunked(read_records(path, format), DEFAULT_CHUNK_SIZE):
+            known = self.structured_store.get_records(
+                [r["id"] for r in chunk if "id" in r]
+            )
+            self.structured_store.import_records(r for r in chunk if "type" in r)
+            entries = [
+                (r, *self._imported_entry(r))
+                for r in chunk
+                if ("metadata" in r or r.get("type") in CONTENT_KEYS)
+                and r.get("id") not in known
+            ]
+            # Repeats folded into a row are exported on their own, after it
+            row_hashes = {
+                self._content_hash(text) for r, text, _ in entries if "metadata" in r
+            }
+            with self._lock:
+                entries = [
+                    (r, text, metadata)
+                    for r, text, metadata in entries
+                    if not self._is_indexed(text)
+                    and (
+                        "metadata" in r
+                        or not self.deduplicate
+                        or self._content_hash(text) not in row_hashes
+                    )
+                ]
+            reused = [e for e in entries if reuse and "embedding" in e[0]]
+            fresh = [e for e in entries if not (reuse and "embedding" in e[0])]
+            if reused:
+                embeddings = np.array(
+                    [r["embedding"] for r, _, _ in reused], dtype=np.float32
+                )
+                self._index_texts(
+                    [text for _, text, _ in reused],
+                    [metadata for _, _, metadata in reused],
+                    batch_size,
+                    embeddings,
+                )
+            if fresh:
+                encoded += len(fresh)
+                self._index_texts(
+                    [text for _, text, _ in fresh],
+                    [metadata for _, _, metadata in fresh],
+                    batch_size,
+                )
+
+        with self._lock:
+            added = len(self.records) - rows_before
+        self.save_embeddings()
+        if encoded:
+            print(f"⚠️  Re-encoded {encoded} rows without reusable vectors")
+        print(f"✅ Imported {added} memories from {path}")
+        return added
+
+    def _imported_entry(self, record: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+        """
+        Get the embedded text and metadata of an exported record.
+
+        Records exported with a row carry its metadata. Structured memories
+        exported without one, as SimpleMemoryStore and SqliteMemoryStore
+        export every memory, are given a row referencing them and stamped
+        with the memory's own timestamp.
+        """
+        if "metadata" in record:
+            if "text" in record:
+                return record["text"], record["metadata"]
+            return self._record_content(record)[0], record["metadata"]
+
+        if record["type"] == "interaction":
+            text, metadata = self._interaction_entry(
+                record["agent_name"],
+                record["input"],
+                record["output"],
+                record.get("id"),
+            )
+        else:
+            text, metadata = self._fact_entry(
+                record["agent_name"], record["fact"], record.get("id")
+            )
+        if record.get("timestamp"):
+            # Structured timestamps are naive local time; metadata is UTC
+            created = datetime.fromisoformat(str(record["timestamp"]))
+            metadata["timestamp"] = created.astimezone(timezone.utc).isoformat()
+        return text, metadata
+
+    def _is_indexed(self, text: str) -> bool:
+        """Check whether a text is already indexed, when repeats are tracked."""
+        return self.deduplicate and self._content_hash(text) in self.content_ids
+
+    def load_memory(self) -> None:
+        """Reload structured memory from the structured store."""
+        self.structured_store.load_memory()
+
+    def save_memory(self) -> None:
+        """Persist structured memory."""
+        self.structured_store.save_memory()
+
+    def get_agent_history(self, agent_name: str) -> list[dict[str, Any]]:
+        """Get all interactions for a specific agent."""
+        return self.structured_store.get_agent_history(agent_name)
+
+    def get_agent_facts(self, agent_name: str) -> list[dict[str, Any]]:
+        """Get all stored facts for a specific agent."""
+        return self.structured_store.get_agent_facts(agent_name)
+
+    def get_recent_interactions(
+        self, agent_name: str, limit: int = 5
+    ) -> list[dict[str, Any]]:
+        """Get the most recent interactions for an agent."""
+        return self.structured_store.get_recent_interactions(agent_name, limit)
+
+    def get_memories_between(
+        self,
+        agent_name: str,
+        memory_type: str = "interaction",
+        since: str | datetime | None = None,
+        until: str | datetime | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Get an agent's interactions or facts stamped within a time range.
+
+        Naive bounds are local time, as in semantic_search.
+        """
+        return self.structured_store.get_memories_between(
+            agent_name, memory_type, since, until
+        )
+
+    def clear_agent_memory(self, agent_name: str) -> None:
+        """
+        Clear structured memory for a specific agent.
+
+        The agent's memories stop appearing in search results at once; their
+        index rows are dropped on the next save.
+        """
+        self.structured_store.clear_agent_memory(agent_name)
+        with self._lock:
+            rows = self.metadata_index.rows_of(agent_name)
+            self._stale_rows.update(rows.tolist())
+
+    def clear_all_memory(self) -> None:
+        """Clear all stored structured memory; see clear_agent_memory."""
+        self.structured_store.clear_all_memory()
+        with self._lock:
+            self._stale_rows.update(range(len(self.records)))
+
+    def get_memory_summary(self) -> dict[str, Any]:
+        """Get a summary of stored structured memory, read from its counters."""
+        return self.structured_store.get_memory_summary()
 
     def get_relevant_context(
-        self, agent_name: str, query: str, context_limit: int = 5
+        self,
+        agent_name: str,
+        query: str,
+        context_limit: int = 5,
+        agent_boost: float = 1.0,
+        candidate_pool: int = 4,
+        read_your_writes: bool | None = None,
+        recency_half_life: float | None = None,
     ) -> list[dict[str, Any]]:
         """
         Get relevant context for an agent based on semantic similarity.
 
+        Encodes the query once and probes the index once, across all
+        memories. The requesting agent's own memories, found through the
+        metadata index, are scored exactly against the same query vector.
+        The two candidate sets are merged by row and re-ranked,
+        adding agent_boost to the similarity of the agent's own memories, so
+        another agent filling the global candidates cannot crowd them out.
+        With the default boost of 1.0 agent-specific memories always rank
+        ahead of cross-agent ones; smaller boosts let strong cross-agent
+        matches interleave.
+
         Args:
             agent_name: Name of the agent requesting context
             query: Current query/task for finding relevant context
             context_limit: Maximum number of context items to return
+            agent_boost: Score added to the requesting agent's memories
+            candidate_pool: Candidates fetched per returned item
+            read_your_writes: See semantic_search
+            recency_half_life: Decay similarities by age before boosting;
+                see semantic_search
 
         Returns:
             List of relevant context items from all agents
         """
-        # Search for relevant memories across all agents
-        all_results = self.semantic_search(query, top_k=context_limit * 2)
+        if recency_half_life is not None and recency_half_life <= 0:
+            raise ValueError("recency_half_life must be positive")
+        self._wait_for_writes(read_your_writes)
+        with self._lock:
+            if len(self.text_database) == 0 or context_limit <= 0:
+                return []
+            try:
+                return self._relevant_context(
+                    agent_name,
+                    query,
+                    context_limit,
+                    agent_boost,
+                    context_limit * candidate_pool,
+                    recency_half_life,
+                )
+            except Exception as e:
+                print(f"❌ Error getting relevant context: {e}")
+                return []
 
-        # Also include agent-specific memories
-        agent_results = self.semantic_search(
-            query, top_k=context_limit, agent_filter=agent_name
+    def _relevant_context(
+        self,
+        agent_name: str,
+        query: str,
+        context_limit: int,
+        agent_boost: float,
+        depth: int,
+        recency_half_life: float | None,
+    ) -> list[dict[str, Any]]:
+        """Merge own-agent and global candidates; see get_relevant_context."""
+        query_embedding = self._encode_query(query)
+        own_rows = self.metadata_index.rows_of(agent_name)
+        # One index probe; the agent's own rows are scored from their vectors
+        ((global_scores, global_ids),) = search_many(self.index, query_embedding, depth)
+        own_scores, own_ids = score_rows(
+            self.index, query_embedding[0], own_rows, depth
         )
 
-        # Combine and deduplicate
-        seen_texts = set()
-        combined_results = []
-
-        # Prioritize agent-specific results
-        for result in agent_results:
-            if result["text"] not in seen_texts:
-                result["source"] = "agent_specific"
-                combined_results.append(result)
-                seen_texts.add(result["text"])
-
-        # Add cross-agent results
-        for result in all_results:
-            if (
-                result["text"] not in seen_texts
-                and len(combined_results) < context_limit
-            ):
-                result["source"] = "cross_agent"
-                combined_results.append(result)
-                seen_texts.add(result["text"])
+        scores = np.concatenate([own_scores, global_scores])
+        ids = np.concatenate([own_ids, global_ids])
+        # A row found both ways is kept once, with its exact score
+        ids, first = np.unique(ids, return_index=True)
+        scores = scores[first]
+        matched = scores >= _CONTEXT_MIN_SIMILARITY
+        ids, similarity = ids[matched], scores[matched]
+
+        columns = {"similarity": similarity}
+        relevance = similarity
+        if recency_half_life is not None:
+            weights = self._recency_weights(ids, recency_half_life, time.time())
+            relevance = similarity * weights
+            columns["recency_weight"] = weights
+        own = np.isin(ids, own_rows)
+        ranking = relevance + np.where(own, agent_boost, 0.0)
+        columns["score"] = ranking
 
-        return combined_results[:context_limit]
+        order = np.argsort(-ranking, kind="stable")[:context_limit]
+        results = self._build_results(
+            ids[order], **{name: values[order] for name, values in columns.items()}
+        )
+        for result in results:
+            own_memory = result["metadata"].get("agent_name") == agent_name
+            result["source"] = "agent_specific" if own_memory else "cross_agent"
+        return results
 
     def get_cross_agent_insights(
         self, topic: str, exclude_agent: str | None = None
@@ -298,30 +2056,38 @@ class EnhancedMemoryStore(SimpleMemoryStore):
         return results[:5]
 
     def get_memory_analytics(self) -> dict[str, Any]:
-        """Get analytics about the memory store."""
-        analytics = super().get_memory_summary()
-
-        # Add embeddings analytics
-        analytics["embeddings"] = {
-            "total_embeddings": len(self.text_database),
-            "embedding_dimension": self.embedding_dim,
-            "model": "all-MiniLM-L6-v2",
-        }
+        """Get analytics about the memory store, including queued writes."""
+        self._wait_for_writes(True)
+        analytics = self.get_memory_summary()
 
-        # Agent distribution in embeddings
-        agent_distribution = {}
-        for metadata in self.metadata_database:
-            agent_name = metadata.get("agent_name", "unknown")
-            agent_distribution[agent_name] = agent_distribution.get(agent_name, 0) + 1
+        with self._lock:
+            # Add embeddings analytics
+            analytics["embeddings"] = {
+                "total_embeddings": len(self.text_database),
+                "embedding_dimension": self.embedding_dim,
+                "model": self.embedding_model_name,
+                "runtime": self.embedding_runtime,
+                "duplicates_skipped": self.duplicates_skipped,
+                "index_type": index_type_of(self.index),
+                "vector_storage": storage_of(self.index),
+                "lexical_vocabulary": len(self.lexical_index.postings),
+                # Rows whose text lives in the structured store
+                "record_backed": self._record_backed,
+                # Row counts the metadata index keeps up to date on write
+                "agent_distribution": {
+                    agent_name: len(rows)
+                    for agent_name, rows in self.metadata_index.agent_rows.items()
+                },
+                "type_distribution": {
+                    memory_type: len(rows)
+                    for memory_type, rows in self.metadata_index.type_rows.items()
+                },
+            }
 
-        analytics["embeddings"]["agent_distribution"] = agent_distribution
+        analytics["query_cache"] = self.query_cache.stats()
+        analytics["retention"] = {
+            "policies": len(self.retention),
+            **self.eviction_stats,
+        }
 
         return analytics
-
-    def __del__(self):
-        """Ensure embeddings are saved when object is destroyed."""
-        try:
-            if hasattr(self, "index") and len(self.text_database) > 0:
-                self.save_embeddings()
-        except Exception:
-            pass  # Ignore errors during cleanup
@@ -0,0 +1,59 @@
+"""Advisory cross-process file locks for stores shared between processes."""
+
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
+
+
+@contextmanager
+def file_lock(lock_path: str | Path, shared: bool = False) -> Iterator[None]:
+    """
+    Hold an advisory lock on lock_path for the duration of the block.
+
+    Writers take the lock exclusively; readers take it shared so they never
+    observe a half-finished multi-file update. The lock file itself is empty
+    and left in place. On Windows, shared locks are exclusive.
+
+    Locks are per open file, so a thread must not take the same lock twice.
+
+    Args:
+        lock_path: Lock file, created if missing
+        shared: Take a shared (read) lock instead of an exclusive one
+    """
+    lock_path = Path(lock_path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            # Released when the descriptor is closed
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            yield
+        else:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+def file_version(path: str | Path) -> tuple[int, int, int] | None:
+    """
+    Identify the current contents of a file that is replaced atomically.
+
+    Returns:
+        Inode, size and modification time, or None if the file is missing
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
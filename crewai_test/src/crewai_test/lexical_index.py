@@ -0,0 +1,142 @@
+"""BM25 inverted index and rank fusion for hybrid memory retrieval."""
+
+import math
+import re
+from array import array
+from collections import Counter
+
+import numpy as np
+
+from .metadata_index import renumber_rows
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase word tokens; years, tickers and names stay whole."""
+    return _TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    """Incrementally maintained BM25 index over positional row ids."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        """
+        Initialize an empty index.
+
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        # Token -> (row ids, term frequencies), both in row order
+        self.postings: dict[str, tuple[array[int], array[int]]] = {}
+        self.doc_lengths = array("i")
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, text: str) -> None:
+        """Index the text of the next row."""
+        row = len(self.doc_lengths)
+        tokens = tokenize(text)
+        for token, count in Counter(tokens).items():
+            rows, freqs = self.postings.setdefault(token, (array("q"), array("i")))
+            rows.append(row)
+            freqs.append(count)
+        self.doc_lengths.append(len(tokens))
+        self.total_length += len(tokens)
+
+    def remove_rows(self, removed: np.ndarray) -> None:
+        """
+        Drop rows from the postings and renumber the rest, without re-tokenizing.
+
+        Args:
+            removed: Sorted, unique row ids being removed
+        """
+        if len(removed) == 0:
+            return
+        for token in list(self.postings):
+            rows, freqs = self.postings[token]
+            if rows[-1] < removed[0]:
+                # Postings before the first removed row keep their ids
+                continue
+            keep, kept_rows = renumber_rows(
+                np.frombuffer(rows, dtype=np.int64), removed
+            )
+            if len(kept_rows):
+                kept_freqs = np.frombuffer(freqs, dtype=np.int32)[keep]
+                self.postings[token] = (
+                    array("q", kept_rows.tobytes()),
+                    array("i", kept_freqs.tobytes()),
+                )
+            else:
+                del self.postings[token]
+        lengths = np.frombuffer(self.doc_lengths, dtype=np.int32)
+        self.total_length -= int(lengths[removed].sum())
+        keep = np.ones(len(lengths), dtype=bool)
+        keep[removed] = False
+        self.doc_lengths = array("i", lengths[keep].tobytes())
+
+    def search(
+        self, query: str, top_k: int, rows: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Score rows against a keyword query with BM25.
+
+        Args:
+            query: Query text
+            top_k: Number of rows to return
+            rows: Candidate row ids, or None to search everything
+
+        Returns:
+            Scores and row ids of matching rows, best first
+        """
+        n_docs = len(self.doc_lengths)
+        empty = (np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64))
+        if n_docs == 0 or top_k <= 0:
+            return empty
+
+        lengths = np.frombuffer(self.doc_lengths, dtype=np.int32)
+        avg_length = self.total_length / n_docs or 1.0
+        scores = np.zeros(n_docs, dtype=np.float32)
+        for token in set(tokenize(query)):
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            ids = np.frombuffer(posting[0], dtype=np.int64)
+            freqs = np.frombuffer(posting[1], dtype=np.int32).astype(np.float32)
+            idf = math.log(1 + (n_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * lengths[ids] / avg_length)
+            scores[ids] += idf * freqs * (self.k1 + 1) / (freqs + norm)
+
+        ids = np.arange(n_docs, dtype=np.int64) if rows is None else rows
+        ids = ids[scores[ids] > 0]
+        if len(ids) == 0:
+            return empty
+        k = min(top_k, len(ids))
+        top = np.argpartition(-scores[ids], k - 1)[:k]
+        top = top[np.argsort(-scores[ids][top], kind="stable")]
+        return scores[ids][top], ids[top]
+
+
+def reciprocal_rank_fusion(
+    rankings: list[np.ndarray], k: int = 60
+) -> list[tuple[int, float]]:
+    """
+    Fuse ranked row id lists by summing 1 / (k + rank) per list.
+
+    Args:
+        rankings: Row ids per retriever, best first
+        k: Damping constant; larger values flatten the rank contribution
+
+    Returns:
+        (row id, fused score) pairs, best first
+    """
+    fused: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking.tolist(), start=1):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
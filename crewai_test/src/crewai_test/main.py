@@ -3,8 +3,6 @@ import sys
 import warnings
 from datetime import datetime
 
-from crewai_test.crew import CrewaiTest
-
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
 # This main file is intended to be a way for you to run your
@@ -17,6 +15,8 @@ def run():
     """
     Run the crew.
     """
+    from crewai_test.crew import CrewaiTest
+
     inputs = {"topic": "AI LLMs", "current_year": str(datetime.now().year)}
 
     try:
@@ -29,6 +29,8 @@ def train():
     """
     Train the crew for a given number of iterations.
     """
+    from crewai_test.crew import CrewaiTest
+
     inputs = {"topic": "AI LLMs", "current_year": str(datetime.now().year)}
     try:
         CrewaiTest().crew().train(
@@ -43,6 +45,8 @@ def replay():
     """
     Replay the crew execution from a specific task.
     """
+    from crewai_test.crew import CrewaiTest
+
     try:
         CrewaiTest().crew().replay(task_id=sys.argv[1])
 
@@ -54,6 +58,8 @@ def test():
     """
     Test the crew execution and returns the results.
     """
+    from crewai_test.crew import CrewaiTest
+
     inputs = {"topic": "AI LLMs", "current_year": str(datetime.now().year)}
 
     try:
@@ -73,12 +73,17 @@ class MemoryEchoCrew:
         result = self.crew().kickoff(inputs=inputs)
         output_message = str(result)
 
-        # Store the interaction
-        self.memory_store.store_interaction("echo_agent", input_message, output_message)
-
-        # Store as a fact if it's something worth remembering
-        if len(input_message) > 5:  # Simple heuristic
-            self.memory_store.store_fact("echo_agent", f"User said: {input_message}")
+        with self.memory_store.batch():
+            # Store the interaction
+            self.memory_store.store_interaction(
+                "echo_agent", input_message, output_message
+            )
+
+            # Store as a fact if it's something worth remembering
+            if len(input_message) > 5:  # Simple heuristic
+                self.memory_store.store_fact(
+                    "echo_agent", f"User said: {input_message}"
+                )
 
         return output_message
 
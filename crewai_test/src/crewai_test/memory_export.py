@@ -0,0 +1,223 @@
+"""Streaming export and import of memory records as NDJSON or Parquet."""
+
+import json
+import os
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+EXPORT_FORMATS = ("ndjson", "parquet")
+
+# File suffix -> format, when no format is given
+_SUFFIX_FORMATS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".parquet": "parquet"}
+
+# First NDJSON line key marking the export header rather than a record
+_HEADER_KEY = "memory_export"
+
+# Scalar record keys with their own Parquet column; other keys are kept as
+# JSON in the "extra" column
+_STRING_COLUMNS = (
+    "id",
+    "agent_name",
+    "type",
+    "timestamp",
+    "input",
+    "output",
+    "fact",
+    "text",
+)
+
+# Records per Parquet row group and per read batch
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def export_format(path: str | Path, format: str | None = None) -> str:
+    """
+    Resolve the format of an export file.
+
+    Args:
+        path: Export file
+        format: "ndjson" or "parquet"; inferred from the suffix if None
+
+    Raises:
+        ValueError: If the format is unknown or cannot be inferred
+    """
+    format = format or _SUFFIX_FORMATS.get(Path(path).suffix.lower())
+    if format not in EXPORT_FORMATS:
+        raise ValueError(
+            f"Cannot export {path} as {format!r}; expected one of {EXPORT_FORMATS}"
+        )
+    return format
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    """Yield lists of up to size items."""
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _pyarrow() -> tuple[Any, Any]:
+    """Import pyarrow and its Parquet module on demand."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "Parquet export needs pyarrow: pip install 'crewai_test[parquet]'"
+        ) from e
+    return pyarrow, pyarrow.parquet
+
+
+def write_records(
+    path: str | Path,
+    records: Iterable[dict[str, Any]],
+    format: str | None = None,
+    header: dict[str, Any] | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """
+    Stream records to an export file, holding at most one chunk in memory.
+
+    The file is written next to its destination and moved into place once
+    complete, so a failed export never leaves a truncated file behind.
+
+    Args:
+        path: Export file
+        records: Memory records; an "embedding" list is stored as float32
+        format: "ndjson" or "parquet"; inferred from the suffix if None
+        header: Export-wide details, like the embedding model, read back
+            by read_header
+        chunk_size: Records per Parquet row group
+
+    Returns:
+        Number of records written
+    """
+    path = Path(path)
+    format = export_format(path, format)
+    tmp_path = path.with_name(path.name + ".tmp")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        if format == "ndjson":
+            count = _write_ndjson(tmp_path, records, header)
+        else:
+            count = _write_parquet(tmp_path, records, header, chunk_size)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return count
+
+
+def _write_ndjson(
+    path: Path, records: Iterable[dict[str, Any]], header: dict[str, Any] | None
+) -> int:
+    """Write one JSON object per line, after an optional header line."""
+    count = 0
+    with open(path, "w") as f:
+        if header is not None:
+            f.write(json.dumps({_HEADER_KEY: header}) + "\n")
+        for record in records:
+            f.write(json.dumps(record, default=str) + "\n")
+            count += 1
+    return count
+
+
+def _write_parquet(
+    path: Path,
+    records: Iterable[dict[str, Any]],
+    header: dict[str, Any] | None,
+    chunk_size: int,
+) -> int:
+    """Write records in row groups of chunk_size with a fixed schema."""
+    pa, pq = _pyarrow()
+    schema = pa.schema(
+        [pa.field(name, pa.string()) for name in _STRING_COLUMNS]
+        + [
+            pa.field("metadata", pa.string()),
+            pa.field("extra", pa.string()),
+            pa.field("embedding", pa.list_(pa.float32())),
+        ],
+        metadata={_HEADER_KEY: json.dumps(header)} if header is not None else None,
+    )
+    count = 0
+    with pq.ParquetWriter(str(path), schema) as writer:
+        for chunk in chunked(records, chunk_size):
+            columns: dict[str, list[Any]] = {name: [] for name in schema.names}
+            for record in chunk:
+                extra = {
+                    key: value
+                    for key, value in record.items()
+                    if key not in schema.names
+                }
+                for name in _STRING_COLUMNS:
+                    columns[name].append(record.get(name))
+                metadata = record.get("metadata")
+                columns["metadata"].append(
+                    json.dumps(metadata, default=str) if metadata is not None else None
+                )
+                columns["extra"].append(
+                    json.dumps(extra, default=str) if extra else None
+                )
+                columns["embedding"].append(record.get("embedding"))
+            writer.write_table(pa.table(columns, schema=schema))
+            count += len(chunk)
+    return count
+
+
+def read_header(path: str | Path, format: str | None = None) -> dict[str, Any]:
+    """Read the header of an export file; empty if it was written without one."""
+    format = export_format(path, format)
+    if format == "ndjson":
+        with open(path) as f:
+            first = json.loads(f.readline() or "{}")
+        return first.get(_HEADER_KEY, {}) if len(first) == 1 else {}
+
+    _, pq = _pyarrow()
+    metadata = pq.read_schema(str(path)).metadata or {}
+    header = metadata.get(_HEADER_KEY.encode())
+    return json.loads(header) if header else {}
+
+
+def read_records(
+    path: str | Path,
+    format: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[dict[str, Any]]:
+    """
+    Stream records back from an export file, one line or row group at a time.
+
+    Args:
+        path: Export file
+        format: "ndjson" or "parquet"; inferred from the suffix if None
+        chunk_size: Parquet rows decoded per batch
+
+    Yields:
+        Records as written, with Parquet nulls left out
+    """
+    format = export_format(path, format)
+    if format == "ndjson":
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if _HEADER_KEY in record and len(record) == 1:
+                    continue
+                yield record
+        return
+
+    _, pq = _pyarrow()
+    parquet_file = pq.ParquetFile(str(path))
+    for batch in parquet_file.iter_batches(batch_size=chunk_size):
+        for row in batch.to_pylist():
+            record = {
+                key: value
+                for key, value in row.items()
+                if value is not None and key not in ("metadata", "extra")
+            }
+            if row.get("metadata") is not None:
+                record["metadata"] = json.loads(row["metadata"])
+            if row.get("extra") is not None:
+                record.update(json.loads(row["extra"]))
+            yield record
@@ -0,0 +1,395 @@
+"""Columnar storage for the texts and metadata of indexed memories."""
+
+from array import array
+from collections.abc import Iterator, MutableMapping, Sequence
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import numpy as np
+
+from .metadata_index import to_epoch
+
+# Metadata keys stored as interned string codes
+CODED_KEYS = ("agent_name", "type")
+# Metadata keys stored as int64 epoch microseconds when they are UTC timestamps
+TIME_KEYS = ("timestamp", "last_seen", "last_retrieved")
+# Metadata keys stored as offsets into the memory's own text when they are
+# copies of part of it, like a fact or an interaction's input and output
+SPAN_KEYS = ("fact", "input", "output")
+# Metadata key stored as a uint64 when it is a 16-hex-digit memory ID
+ID_KEY = "memory_id"
+
+# Shortened copies, like long interaction outputs, end with this marker
+_ELLIPSIS = "..."
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+# Empty timestamp cell
+_NO_TIME = -(2**63)
+_MISSING = object()
+
+
+def _encode_time(value: Any) -> int | None:
+    """Convert a UTC ISO timestamp to epoch microseconds if it round-trips exactly."""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.utcoffset() != timedelta(0):
+        return None
+    micros = (parsed - _EPOCH) // _MICROSECOND
+    return micros if _decode_time(micros) == value else None
+
+
+def _decode_time(micros: int) -> str:
+    """Format epoch microseconds as a UTC ISO timestamp."""
+    return (_EPOCH + micros * _MICROSECOND).isoformat()
+
+
+def _encode_id(value: Any) -> int:
+    """Parse a 16-hex-digit memory ID as an integer, or 0 if it does not fit."""
+    if not isinstance(value, str) or len(value) != 16:
+        return 0
+    try:
+        number = int(value, 16)
+    except ValueError:
+        return 0
+    # int() also accepts signs, prefixes and underscores, so check the round
+    # trip; ID zero marks an empty cell and is kept in the extras instead
+    return number if f"{number:016x}" == value else 0
+
+
+def encode_ids(memory_ids: list[Any]) -> np.ndarray:
+    """Convert memory IDs to their uint64 column values; 0 where one does not fit."""
+    return np.array([_encode_id(value) for value in memory_ids], dtype=np.uint64)
+
+
+def _encode_span(text: str | None, value: Any) -> tuple[int, int, int] | None:
+    """Locate value in text as (start, end, shortened), or None if it is not a copy."""
+    if not isinstance(value, str) or text is None:
+        return None
+    start = text.find(value)
+    if start >= 0:
+        return start, start + len(value), 0
+    if value.endswith(_ELLIPSIS):
+        start = text.find(value[: -len(_ELLIPSIS)])
+        if start >= 0:
+            return start, start + len(value) - len(_ELLIPSIS), 1
+    return None
+
+
+def _take(column: "array[int]", rows: np.ndarray) -> "array[int]":
+    """Select rows of an array column."""
+    values = np.frombuffer(column, dtype=np.dtype(column.typecode))[rows]
+    return array(column.typecode, values.tobytes())
+
+
+class MemoryRecords:
+    """
+    Struct-of-arrays store of memory texts and metadata, addressed by row.
+
+    Instead of one dict per memory, agent names and types are interned
+    int32 codes, UTC timestamps are int64 epoch microseconds, memory IDs
+    are uint64s, and facts,
+    inputs and (shortened) outputs are offsets into the memory's text rather
+    than second copies of it. Values that do not fit a column, and keys
+    without one, are kept per row in a sparse dict, so any metadata
+    round-trips unchanged. Rows referencing a structured store memory have
+    no text of their own (None).
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty store."""
+        self.texts: list[str | None] = []
+        self._vocab: dict[str, list[str]] = {key: [] for key in CODED_KEYS}
+        self._code_of: dict[str, dict[str, int]] = {key: {} for key in CODED_KEYS}
+        self._codes = {key: array("i") for key in CODED_KEYS}
+        self._times = {key: array("q") for key in TIME_KEYS}
+        # Start, end and shortened flag per span key
+        self._spans = {key: (array("i"), array("i"), array("b")) for key in SPAN_KEYS}
+        self._counts = array("i")
+        # Memory ID per row; 0 for none
+        self._ids = array("Q")
+        self._extras: dict[int, dict[str, Any]] = {}
+        self.metadata = MetadataColumn(self)
+
+    @classmethod
+    def from_lists(
+        cls, texts: list[str | None], metadatas: list[dict[str, Any]]
+    ) -> "MemoryRecords":
+        """Build a store from parallel lists of texts and metadata dicts."""
+        records = cls()
+        for text, metadata in zip(texts, metadatas, strict=True):
+            records.append(text, metadata)
+        return records
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def append(self, text: str | None, metadata: dict[str, Any]) -> None:
+        """Add a memory as the next row."""
+        row = len(self.texts)
+        self.texts.append(text)
+        for codes in self._codes.values():
+            codes.append(-1)
+        for times in self._times.values():
+            times.append(_NO_TIME)
+        for starts, ends, shortened in self._spans.values():
+            starts.append(-1)
+            ends.append(-1)
+            shortened.append(0)
+        self._counts.append(0)
+        self._ids.append(0)
+        for key, value in metadata.items():
+            if not self._set_column(row, key, value):
+                self._extras.setdefault(row, {})[key] = value
+
+    def extend(self, texts: list[str | None], metadatas: list[dict[str, Any]]) -> None:
+        """Add memories as the next rows."""
+        for text, metadata in zip(texts, metadatas, strict=True):
+            self.append(text, metadata)
+
+    def _intern(self, key: str, value: str) -> int:
+        """Get the code of a string value, assigning the next one if it is new."""
+        code = self._code_of[key].get(value)
+        if code is None:
+            code = self._code_of[key][value] = len(self._vocab[key])
+            self._vocab[key].append(value)
+        return code
+
+    def _set_column(self, row: int, key: str, value: Any) -> bool:
+        """
+        Store a value in its column, clearing the cell if it does not fit.
+
+        Returns:
+            Whether the value was stored; False for keys without a column
+        """
+        if key in self._codes:
+            fits = isinstance(value, str)
+            self._codes[key][row] = self._intern(key, value) if fits else -1
+        elif key in self._times:
+            micros = _encode_time(value)
+            fits = micros is not None
+            self._times[key][row] = _NO_TIME if micros is None else micros
+        elif key in self._spans:
+            span = _encode_span(self.texts[row], value)
+            fits = span is not None
+            starts, ends, shortened = self._spans[key]
+            starts[row], ends[row], shortened[row] = (
+                (-1, -1, 0) if span is None else span
+            )
+        elif key == "count":
+            fits = type(value) is int and 0 < value < 2**31
+            self._counts[row] = value if fits else 0
+        elif key == ID_KEY:
+            self._ids[row] = _encode_id(value)
+            fits = self._ids[row] != 0
+        else:
+            return False
+        return fits
+
+    def set(self, row: int, key: str, value: Any) -> None:
+        """Set a metadata value of a row."""
+        self._pop_extra(row, key)
+        if not self._set_column(row, key, value):
+            self._extras.setdefault(row, {})[key] = value
+
+    def delete(self, row: int, key: str) -> None:
+        """Remove a metadata key from a row."""
+        self._pop_extra(row, key)
+        # None never fits a column, so this clears the cell
+        self._set_column(row, key, None)
+
+    def _pop_extra(self, row: int, key: str) -> None:
+        """Drop a key from a row's sparse extras."""
+        extras = self._extras.get(row)
+        if extras is not None and key in extras:
+            del extras[key]
+            if not extras:
+                del self._extras[row]
+
+    def value(self, row: int, key: str, default: Any = None) -> Any:
+        """Get a metadata value of a row, or default if the row lacks the key."""
+        extras = self._extras.get(row)
+        if extras is not None and key in extras:
+            return extras[key]
+        if key in self._codes:
+            code = self._codes[key][row]
+            if code >= 0:
+                return self._vocab[key][code]
+        elif key in self._times:
+            micros = self._times[key][row]
+            if micros != _NO_TIME:
+                return _decode_time(micros)
+        elif key in self._spans:
+            starts, ends, shortened = self._spans[key]
+            text = self.texts[row]
+            # Spans are only stored for rows with a text of their own
+            if starts[row] >= 0 and text is not None:
+                value = text[starts[row] : ends[row]]
+                return value + _ELLIPSIS if shortened[row] else value
+        elif key == "count" and self._counts[row]:
+            return self._counts[row]
+        elif key == ID_KEY and self._ids[row]:
+            return f"{self._ids[row]:016x}"
+        return default
+
+    def keys(self, row: int) -> list[str]:
+        """Get the metadata keys of a row: column keys first, then extras."""
+        keys = [key for key in CODED_KEYS if self._codes[key][row] >= 0]
+        keys += [key for key in TIME_KEYS[:1] if self._times[key][row] != _NO_TIME]
+        if self._ids[row]:
+            keys.append(ID_KEY)
+        keys += [key for key in SPAN_KEYS if self._spans[key][0][row] >= 0]
+        if self._counts[row]:
+            keys.append("count")
+        keys += [key for key in TIME_KEYS[1:] if self._times[key][row] != _NO_TIME]
+        keys += list(self._extras.get(row, ()))
+        return keys
+
+    def metadata_dict(self, row: int) -> dict[str, Any]:
+        """Materialize the metadata of a row as a plain dict."""
+        return {key: self.value(row, key) for key in self.keys(row)}
+
+    def iter_metadata(self) -> Iterator[dict[str, Any]]:
+        """Yield each row's metadata as a plain dict, one at a time."""
+        for row in range(len(self.texts)):
+            yield self.metadata_dict(row)
+
+    def epoch(self, row: int, key: str = "timestamp") -> float:
+        """Get a timestamp of a row in epoch seconds, NaN if missing."""
+        micros = self._times[key][row]
+        if micros != _NO_TIME:
+            return micros / 1e6
+        return to_epoch(self.value(row, key))
+
+    def epochs(self, key: str) -> np.ndarray:
+        """Get a timestamp column in epoch seconds, NaN where missing."""
+        micros = np.frombuffer(self._times[key], dtype=np.int64)
+        seconds = np.where(micros == _NO_TIME, np.nan, micros / 1e6)
+        for row, extras in self._extras.items():
+            if key in extras:
+                seconds[row] = to_epoch(extras[key])
+        return seconds
+
+    def value_counts(self, key: str, default: Any = None) -> dict[Any, int]:
+        """Count rows per value of a coded key; rows without it count as default."""
+        codes = np.frombuffer(self._codes[key], dtype=np.int32)
+        counts = np.bincount(codes[codes >= 0], minlength=len(self._vocab[key]))
+        result: dict[Any, int] = {
+            value: int(n)
+            for value, n in zip(self._vocab[key], counts, strict=True)
+            if n
+        }
+        for row in np.flatnonzero(codes < 0).tolist():
+            value = self.value(row, key, default)
+            result[value] = result.get(value, 0) + 1
+        return result
+
+    def sorted_ids(self) -> tuple[np.ndarray, frozenset[str]]:
+        """
+        Get the rows' memory IDs for membership checks, without a set of strings.
+
+        Returns:
+            Sorted uint64 IDs from the column, and the IDs kept in extras
+        """
+        ids = np.frombuffer(self._ids, dtype=np.uint64)
+        other_ids = frozenset(
+            extras[ID_KEY] for extras in self._extras.values() if ID_KEY in extras
+        )
+        return np.sort(ids[ids != 0]), other_ids
+
+    def take(self, rows: np.ndarray) -> "MemoryRecords":
+        """Get a new store holding the given rows, renumbered from 0 in order."""
+        rows = np.asarray(rows, dtype=np.int64)
+        taken = MemoryRecords()
+        taken.texts = [self.texts[row] for row in rows.tolist()]
+        taken._vocab = {key: list(vocab) for key, vocab in self._vocab.items()}
+        taken._code_of = {key: dict(codes) for key, codes in self._code_of.items()}
+        taken._codes = {key: _take(codes, rows) for key, codes in self._codes.items()}
+        taken._times = {key: _take(times, rows) for key, times in self._times.items()}
+        taken._spans = {
+            key: tuple(_take(column, rows) for column in span)  # type: ignore[misc]
+            for key, span in self._spans.items()
+        }
+        taken._counts = _take(self._counts, rows)
+        taken._ids = _take(self._ids, rows)
+        if self._extras:
+            new_row = {old: new for new, old in enumerate(rows.tolist())}
+            taken._extras = {
+                new_row[old]: dict(extras)
+                for old, extras in self._extras.items()
+                if old in new_row
+            }
+        return taken
+
+
+class MetadataView(MutableMapping[str, Any]):
+    """
+    Dict-like view of one row's metadata, read from and written to the columns.
+
+    Views hold only the store and row, so they are cheap to create; they go
+    stale when rows are removed or the store is replaced.
+    """
+
+    __slots__ = ("_records", "row")
+
+    def __init__(self, records: MemoryRecords, row: int):
+        self._records = records
+        self.row = row
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._records.value(self.row, key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._records.set(self.row, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._records.delete(self.row, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._records.keys(self.row))
+
+    def __len__(self) -> int:
+        return len(self._records.keys(self.row))
+
+    def __repr__(self) -> str:
+        return f"MetadataView({self._records.metadata_dict(self.row)!r})"
+
+    @property
+    def text(self) -> str | None:
+        """Embedded text of the memory, None if kept by the structured store."""
+        return self._records.texts[self.row]
+
+    @property
+    def epoch(self) -> float:
+        """Creation time in epoch seconds, NaN if missing."""
+        return self._records.epoch(self.row)
+
+
+class MetadataColumn(Sequence[MetadataView]):
+    """Sequence of MetadataView, one per row, standing in for a list of dicts."""
+
+    __slots__ = ("_records",)
+
+    def __init__(self, records: MemoryRecords):
+        self._records = records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, row: Any) -> Any:
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        n_rows = len(self._records)
+        if row < 0:
+            row += n_rows
+        if not 0 <= row < n_rows:
+            raise IndexError("row out of range")
+        return MetadataView(self._records, int(row))
@@ -1,62 +1,568 @@
 """Simple file-based memory store for persistent agent memory."""
 
 import json
+import os
+import secrets
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
 from datetime import datetime
+from operator import itemgetter
 from pathlib import Path
 from typing import Any
 
+from .file_lock import file_lock, file_version
+from .memory_export import DEFAULT_CHUNK_SIZE, chunked, read_records, write_records
+
+# Entries are kept sorted by their ISO timestamp strings, which all share the
+# naive local format written by datetime.now().isoformat() and so compare in
+# time order
+_timestamp = itemgetter("timestamp")
+
+# Memory type -> key of its entry list
+_KEYS = {"interaction": "interactions", "fact": "facts"}
+# Memory type -> content keys of its entries
+CONTENT_KEYS = {"interaction": ("input", "output"), "fact": ("fact",)}
+
+
+def _content_bytes(entry: dict[str, Any]) -> int:
+    """UTF-8 size of an entry's fact, or its input and output."""
+    return sum(
+        len(entry[key].encode("utf-8"))
+        for key in ("input", "output", "fact")
+        if isinstance(entry.get(key), str)
+    )
+
+
+def new_memory_id() -> str:
+    """Generate a stable ID for a memory, unique across processes."""
+    return secrets.token_hex(8)
+
+
+def local_timestamp(value: str | datetime) -> str:
+    """
+    Convert a time bound to the naive local ISO format of stored timestamps.
+
+    Naive values are taken as local time already.
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.astimezone().replace(tzinfo=None).isoformat()
+
+
+def _time_slice(
+    entries: list[dict[str, Any]],
+    since: str | datetime | None,
+    until: str | datetime | None,
+) -> list[dict[str, Any]]:
+    """Binary search time-ordered entries for those stamped within [since, until]."""
+    start = (
+        0
+        if since is None
+        else bisect_left(entries, local_timestamp(since), key=_timestamp)
+    )
+    end = (
+        len(entries)
+        if until is None
+        else bisect_right(entries, local_timestamp(until), key=_timestamp)
+    )
+    return entries[start:end]
+
+
+def _trimmed(
+    entries: list[dict[str, Any]], max_entries: int | None, since: datetime | None
+) -> list[dict[str, Any]]:
+    """Keep the newest max_entries entries stamped at or after since."""
+    if since is not None:
+        entries = _time_slice(entries, since, None)
+    if max_entries is not None:
+        entries = entries[-max_entries:] if max_entries > 0 else []
+    return entries
+
 
 class SimpleMemoryStore:
-    """A basic file-based memory store for agent persistence."""
+    """
+    A basic file-based memory store for agent persistence.
+
+    Several processes can share the same files. Writes take an exclusive
+    file lock, pick up whatever other processes wrote since this store last
+    touched the files, and then persist their own records on top, so no
+    process overwrites another's writes. Loads take a shared lock and see a
+    consistent snapshot plus journal; call refresh() to pick up other
+    processes' writes without writing.
+
+    In the default snapshot mode every flush rewrites the whole JSON file
+    under the exclusive lock, so writers are serialized and each write
+    costs time proportional to the store size; sharing a large store this
+    way does not scale with more processes. Processes that share a file
+    should use journal mode, where a flush appends only its own records.
+
+    Each agent's interactions and facts are kept in timestamp order, so
+    time range queries are binary searches. Every entry carries a stable
+    memory ID, under which EnhancedMemoryStore references it instead of
+    keeping its own copy.
+    """
 
-    def __init__(self, storage_path: str = "memory_store.json"):
-        """Initialize the memory store with a storage file path."""
+    def __init__(
+        self,
+        storage_path: str = "memory_store.json",
+        journal: bool = False,
+        compact_threshold: int = 1000,
+    ):
+        """
+        Initialize the memory store with a storage file path.
+
+        Args:
+            storage_path: Path to JSON snapshot file for memory data
+            journal: Append each write to a JSONL journal instead of rewriting
+                the snapshot on every change; use it for files shared by
+                several processes, since snapshot writes hold the file lock
+                for a full rewrite
+            compact_threshold: Number of journal records after which the
+                journal is folded into the snapshot
+        """
         self.storage_path = Path(storage_path)
+        self.journal = journal
+        self.compact_threshold = compact_threshold
+        self.journal_path = self.storage_path.with_suffix(".journal.jsonl")
+        self.lock_path = self.storage_path.with_suffix(".lock")
         self.memory: dict[str, Any] = {}
+        self._journal_records = 0
+        # What this store last read or wrote, to detect other writers
+        self._snapshot_version: tuple[int, int, int] | None = None
+        self._journal_inode: int | None = None
+        self._journal_offset = 0
+        self._batch_depth = 0
+        self._pending_records: list[dict[str, Any]] = []
+        # Memory ID -> (agent name, memory type, entry)
+        self._entries_by_id: dict[str, tuple[str, str, dict[str, Any]]] = {}
+        # Agent name -> content bytes of its entries, kept up to date on write
+        self._content_bytes: dict[str, int] = {}
         self.load_memory()
 
     def load_memory(self) -> None:
-        """Load memory from the storage file."""
+        """Load memory from the storage file and replay any pending journal."""
+        with file_lock(self.lock_path, shared=True):
+            self._load()
+
+    def _load(self) -> None:
+        """Load the snapshot and journal; the caller holds the file lock."""
+        self.memory = {}
+        self._snapshot_version = file_version(self.storage_path)
         if self.storage_path.exists():
             try:
                 with open(self.storage_path) as f:
                     self.memory = json.load(f)
             except (json.JSONDecodeError, FileNotFoundError):
                 self.memory = {}
+        self._entries_by_id = {}
+        self._content_bytes = {}
+        for agent_name, data in self.memory.items():
+            for memory_type, key in _KEYS.items():
+                # Concurrent writers can leave snapshots slightly out of order
+                entries = data.setdefault(key, [])
+                entries.sort(key=_timestamp)
+                self._track_entries(agent_name, memory_type, entries)
+
+        self._journal_records = 0
+        self._journal_inode = None
+        self._journal_offset = 0
+        self._read_journal()
+
+    def _read_journal(self) -> None:
+        """Apply journal records appended since this store last read it."""
+        try:
+            f = open(self.journal_path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            self._journal_inode = os.fstat(f.fileno()).st_ino
+            f.seek(self._journal_offset)
+            data = f.read()
+        self._journal_offset += len(data)
+
+        for line in data.splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from an interrupted append; no writer
+                # can be mid-append while we hold the lock
+                continue
+            self._apply_record(record)
+            self._journal_records += 1
+
+    def _sync_from_disk(self) -> None:
+        """
+        Pick up writes other processes made since this store last read or
+        wrote the files, keeping this store's unpersisted records on top.
+
+        The caller holds the file lock.
+        """
+        journal_version = file_version(self.journal_path)
+        journal_inode = journal_version[0] if journal_version else None
+        if file_version(self.storage_path) == self._snapshot_version and (
+            self._journal_inode is None or journal_inode == self._journal_inode
+        ):
+            # Only appends since we last looked: apply the new journal tail
+            self._read_journal()
+            return
+
+        # Another process rewrote the snapshot or compacted the journal
+        self._load()
+        for record in self._pending_records:
+            self._apply_record(record)
+
+    def refresh(self) -> None:
+        """Pick up writes made by other processes sharing the same files."""
+        with file_lock(self.lock_path, shared=True):
+            self._sync_from_disk()
 
     def save_memory(self) -> None:
-        """Save current memory to the storage file."""
+        """Save memory to the storage file, merged with other processes' writes."""
+        with file_lock(self.lock_path):
+            self._sync_from_disk()
+            self._write_snapshot()
+
+    def _write_snapshot(self) -> None:
+        """Write the snapshot and drop the journal; the caller holds the file lock."""
         # Ensure parent directory exists
         self.storage_path.parent.mkdir(parents=True, exist_ok=True)
 
-        with open(self.storage_path, "w") as f:
+        # Write to a temporary file first so a crash never leaves a partial snapshot
+        tmp_path = self.storage_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
             json.dump(self.memory, f, indent=2, default=str)
+        os.replace(tmp_path, self.storage_path)
+        self._snapshot_version = file_version(self.storage_path)
 
-    def store_interaction(
-        self, agent_name: str, input_message: str, output_message: str
+        # The snapshot now contains everything the journal recorded or was
+        # still waiting to record
+        if self.journal_path.exists():
+            self.journal_path.unlink()
+        self._journal_records = 0
+        self._journal_inode = None
+        self._journal_offset = 0
+        self._pending_records = []
+
+    def compact(self) -> None:
+        """Fold the journal into the snapshot file."""
+        self.save_memory()
+
+    def _track_entries(
+        self, agent_name: str, memory_type: str, entries: list[dict[str, Any]]
     ) -> None:
-        """Store an agent interaction in memory."""
+        """
+        Index added entries by memory ID and count their bytes.
+
+        Entries written before memory IDs existed have none.
+        """
+        size = self._content_bytes.get(agent_name, 0)
+        for entry in entries:
+            if "id" in entry:
+                self._entries_by_id[entry["id"]] = (agent_name, memory_type, entry)
+            size += _content_bytes(entry)
+        self._content_bytes[agent_name] = size
+
+    def _untrack_entries(self, agent_name: str, entries: list[dict[str, Any]]) -> None:
+        """Forget the memory IDs and bytes of removed entries."""
+        for entry in entries:
+            self._entries_by_id.pop(entry.get("id", ""), None)
+            self._content_bytes[agent_name] -= _content_bytes(entry)
+
+    def _apply_record(self, record: dict[str, Any]) -> None:
+        """Apply a single write record to the in-memory state."""
+        agent_name = record["agent_name"]
+        op = record["op"]
+
+        if op == "clear_agent":
+            data = self.memory.pop(agent_name, {})
+            for key in _KEYS.values():
+                self._untrack_entries(agent_name, data.get(key, []))
+            self._content_bytes.pop(agent_name, None)
+            return
+
+        if op in ("trim", "delete"):
+            if agent_name in self.memory:
+                key = _KEYS[record["memory_type"]]
+                entries = self.memory[agent_name][key]
+                if op == "trim":
+                    since = record.get("since")
+                    kept = _trimmed(
+                        entries,
+                        record.get("max_entries"),
+                        datetime.fromisoformat(since) if since else None,
+                    )
+                else:
+                    ids = set(record["ids"])
+                    kept = [e for e in entries if e.get("id") not in ids]
+                kept_ids = {id(e) for e in kept}
+                self._untrack_entries(
+                    agent_name, [e for e in entries if id(e) not in kept_ids]
+                )
+                self.memory[agent_name][key] = kept
+            return
+
         if agent_name not in self.memory:
             self.memory[agent_name] = {"interactions": [], "facts": []}
 
+        key = "interactions" if op == "interaction" else "facts"
+        # An append unless another process wrote a later entry first
+        insort(self.memory[agent_name][key], record["entry"], key=_timestamp)
+        self._track_entries(agent_name, op, [record["entry"]])
+
+    def _commit(self, record: dict[str, Any]) -> None:
+        """Apply a write record and persist it, or defer it inside a batch."""
+        self._apply_record(record)
+        self._pending_records.append(record)
+
+        if self._batch_depth == 0:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Persist all pending write records with a single disk write."""
+        if not self._pending_records:
+            return
+
+        if not self.journal:
+            # Rewrites the whole file under the lock, serializing writers
+            self.save_memory()
+            return
+
+        with file_lock(self.lock_path):
+            self._sync_from_disk()
+            records, self._pending_records = self._pending_records, []
+
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.journal_path, "ab") as f:
+                if f.tell() > 0 and self._ends_torn(f.tell()):
+                    # Keep our first record off a torn line left by a crash
+                    f.write(b"\n")
+                f.write(
+                    "".join(json.dumps(r, default=str) + "\n" for r in records).encode()
+                )
+                self._journal_inode = os.fstat(f.fileno()).st_ino
+                self._journal_offset = f.tell()
+            self._journal_records += len(records)
+
+            if self._journal_records >= self.compact_threshold:
+                self._write_snapshot()
+
+    def _ends_torn(self, size: int) -> bool:
+        """Check whether the journal of the given size lacks a final newline."""
+        with open(self.journal_path, "rb") as f:
+            f.seek(size - 1)
+            return f.read(1) != b"\n"
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Group writes so they are persisted once when the outermost batch exits.
+
+        Example:
+            with store.batch():
+                store.store_interaction("agent", "input", "output")
+                store.store_fact("agent", "fact")
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._flush()
+
+    def store_interaction(
+        self,
+        agent_name: str,
+        input_message: str,
+        output_message: str,
+        memory_id: str | None = None,
+    ) -> str:
+        """
+        Store an agent interaction in memory.
+
+        Returns:
+            The memory ID of the interaction, generated unless given
+        """
         interaction = {
+            "id": memory_id or new_memory_id(),
             "timestamp": datetime.now().isoformat(),
             "input": input_message,
             "output": output_message,
         }
 
-        self.memory[agent_name]["interactions"].append(interaction)
-        self.save_memory()
+        self._commit(
+            {"op": "interaction", "agent_name": agent_name, "entry": interaction}
+        )
+        return interaction["id"]
 
-    def store_fact(self, agent_name: str, fact: str) -> None:
-        """Store a learned fact for an agent."""
-        if agent_name not in self.memory:
-            self.memory[agent_name] = {"interactions": [], "facts": []}
+    def store_fact(
+        self, agent_name: str, fact: str, memory_id: str | None = None
+    ) -> str:
+        """
+        Store a learned fact for an agent.
 
-        fact_entry = {"timestamp": datetime.now().isoformat(), "fact": fact}
+        Returns:
+            The memory ID of the fact, generated unless given
+        """
+        fact_entry = {
+            "id": memory_id or new_memory_id(),
+            "timestamp": datetime.now().isoformat(),
+            "fact": fact,
+        }
 
-        self.memory[agent_name]["facts"].append(fact_entry)
-        self.save_memory()
+        self._commit({"op": "fact", "agent_name": agent_name, "entry": fact_entry})
+        return fact_entry["id"]
+
+    def get_record(self, memory_id: str) -> dict[str, Any] | None:
+        """
+        Look up a memory by ID.
+
+        Returns:
+            The entry with its agent_name and type added, or None if no
+            entry has the ID (never stored, trimmed, deleted or cleared)
+        """
+        found = self._entries_by_id.get(memory_id)
+        if found is None:
+            return None
+        agent_name, memory_type, entry = found
+        return {"agent_name": agent_name, "type": memory_type, **entry}
+
+    def get_records(self, memory_ids: list[str]) -> dict[str, dict[str, Any]]:
+        """Look up memories by ID, leaving out IDs that are not stored."""
+        records = {}
+        for memory_id in memory_ids:
+            record = self.get_record(memory_id)
+            if record is not None:
+                records[memory_id] = record
+        return records
+
+    def delete(self, memory_ids: list[str]) -> int:
+        """
+        Delete memories by ID.
+
+        Returns:
+            Number of entries removed
+        """
+        by_group: dict[tuple[str, str], list[str]] = {}
+        for memory_id in memory_ids:
+            found = self._entries_by_id.get(memory_id)
+            if found is not None:
+                by_group.setdefault(found[:2], []).append(memory_id)
+        with self.batch():
+            for (agent_name, memory_type), ids in by_group.items():
+                self._commit(
+                    {
+                        "op": "delete",
+                        "agent_name": agent_name,
+                        "memory_type": memory_type,
+                        "ids": ids,
+                    }
+                )
+        return sum(len(ids) for ids in by_group.values())
+
+    def iter_records(self) -> Iterator[dict[str, Any]]:
+        """
+        Yield every memory as a record, agent by agent in time order.
+
+        Records are the entries with their agent_name and type added, the
+        shape get_record returns, built one at a time.
+        """
+        for agent_name, data in list(self.memory.items()):
+            for memory_type, key in _KEYS.items():
+                for entry in list(data[key]):
+                    yield {"agent_name": agent_name, "type": memory_type, **entry}
+
+    def export(self, path: str | Path, format: str | None = None) -> int:
+        """
+        Stream every memory to an NDJSON or Parquet file.
+
+        Args:
+            path: Export file
+            format: "ndjson" or "parquet"; inferred from the suffix if None
+
+        Returns:
+            Number of memories written
+        """
+        return write_records(path, self.iter_records(), format)
+
+    def import_records(self, records: Iterable[dict[str, Any]]) -> int:
+        """
+        Add exported memories, keeping their IDs and timestamps.
+
+        Records are written one batch per chunk, so the journal or snapshot
+        is flushed as the import goes rather than held until the end.
+        Memories whose ID is already stored are skipped.
+
+        Returns:
+            Number of memories added
+        """
+        added = 0
+        for chunk in chunked(records, DEFAULT_CHUNK_SIZE):
+            with self.batch():
+                for record in chunk:
+                    memory_type = record.get("type")
+                    memory_id = record.get("id") or new_memory_id()
+                    if memory_type not in _KEYS or memory_id in self._entries_by_id:
+                        continue
+                    entry = {
+                        "id": memory_id,
+                        "timestamp": record.get("timestamp")
+                        or datetime.now().isoformat(),
+                        **{key: record[key] for key in CONTENT_KEYS[memory_type]},
+                    }
+                    self._commit(
+                        {
+                            "op": memory_type,
+                            "agent_name": record["agent_name"],
+                            "entry": entry,
+                        }
+                    )
+                    added += 1
+        return added
+
+    def import_(self, path: str | Path, format: str | None = None) -> int:
+        """
+        Stream memories in from an export file; see import_records.
+
+        Returns:
+            Number of memories added
+        """
+        return self.import_records(read_records(path, format))
+
+    def trim(
+        self,
+        agent_name: str,
+        memory_type: str,
+        max_entries: int | None = None,
+        since: datetime | None = None,
+    ) -> int:
+        """
+        Drop an agent's facts or interactions that fall outside retention limits.
+
+        Args:
+            agent_name: Agent whose memory is trimmed
+            memory_type: "fact" or "interaction"
+            max_entries: Most entries kept, newest first; None for no limit
+            since: Drop entries older than this; naive values are local time
+
+        Returns:
+            Number of entries removed
+        """
+        key = "interactions" if memory_type == "interaction" else "facts"
+        entries = self.memory.get(agent_name, {}).get(key, [])
+        removed = len(entries) - len(_trimmed(entries, max_entries, since))
+        if removed:
+            self._commit(
+                {
+                    "op": "trim",
+                    "agent_name": agent_name,
+                    "memory_type": memory_type,
+                    "max_entries": max_entries,
+                    "since": since.isoformat() if since else None,
+                }
+            )
+        return removed
 
     def get_agent_history(self, agent_name: str) -> list[dict[str, Any]]:
         """Get all interactions for a specific agent."""
@@ -75,31 +581,70 @@ class SimpleMemoryStore:
     ) -> list[dict[str, Any]]:
         """Get the most recent interactions for an agent."""
         interactions = self.get_agent_history(agent_name)
-        return interactions[-limit:] if interactions else []
+        return interactions[-limit:] if interactions and limit > 0 else []
+
+    def get_memories_between(
+        self,
+        agent_name: str,
+        memory_type: str = "interaction",
+        since: str | datetime | None = None,
+        until: str | datetime | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Get an agent's interactions or facts stamped within a time range.
+
+        Args:
+            agent_name: Agent whose memory is queried
+            memory_type: "interaction" or "fact"
+            since: Earliest timestamp included; None for no lower bound
+            until: Latest timestamp included; None for no upper bound.
+                Naive bounds are local time, like stored timestamps.
+
+        Returns:
+            Matching entries, oldest first
+        """
+        key = "interactions" if memory_type == "interaction" else "facts"
+        entries = self.memory.get(agent_name, {}).get(key, [])
+        return _time_slice(entries, since, until)
 
     def clear_agent_memory(self, agent_name: str) -> None:
         """Clear all memory for a specific agent."""
         if agent_name in self.memory:
-            del self.memory[agent_name]
-            self.save_memory()
+            self._commit({"op": "clear_agent", "agent_name": agent_name})
 
     def clear_all_memory(self) -> None:
         """Clear all stored memory."""
-        self.memory = {}
-        if self.storage_path.exists():
-            self.storage_path.unlink()
+        with file_lock(self.lock_path):
+            self.memory = {}
+            self._entries_by_id = {}
+            self._content_bytes = {}
+            self._pending_records = []
+            if self.storage_path.exists():
+                self.storage_path.unlink()
+            if self.journal_path.exists():
+                self.journal_path.unlink()
+            self._snapshot_version = None
+            self._journal_records = 0
+            self._journal_inode = None
+            self._journal_offset = 0
 
     def get_memory_summary(self) -> dict[str, Any]:
-        """Get a summary of stored memory."""
+        """
+        Get a summary of stored memory.
+
+        Counts and bytes are kept up to date on write and entries are in
+        time order, so this is O(agents) rather than a scan of every entry.
+        """
         summary = {}
         for agent_name, data in self.memory.items():
+            interactions, facts = data["interactions"], data["facts"]
             summary[agent_name] = {
-                "interaction_count": len(data.get("interactions", [])),
-                "fact_count": len(data.get("facts", [])),
+                "interaction_count": len(interactions),
+                "fact_count": len(facts),
                 "last_interaction": (
-                    data.get("interactions", [{}])[-1].get("timestamp")
-                    if data.get("interactions")
-                    else None
+                    interactions[-1]["timestamp"] if interactions else None
                 ),
+                "last_fact": facts[-1]["timestamp"] if facts else None,
+                "content_bytes": self._content_bytes.get(agent_name, 0),
             }
         return summary
@@ -0,0 +1,234 @@
+"""ID-set indexes over vector store metadata for pre-filtered search."""
+
+import math
+from array import array
+from datetime import datetime, timezone
+from typing import Any
+
+import numpy as np
+
+
+def to_epoch(value: str | datetime | None) -> float:
+    """
+    Convert an ISO timestamp or datetime to epoch seconds.
+
+    Naive values are taken as UTC, matching the vector store metadata.
+    Missing or unparseable values become NaN, which never matches a range.
+    """
+    if value is None:
+        return float("nan")
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return float("nan")
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def bound_epoch(value: str | datetime) -> float:
+    """
+    Convert a time range bound to epoch seconds.
+
+    Naive bounds are local time, like datetime.now() and the structured
+    store's timestamps, so a range means the same to semantic_search and
+    get_memories_between. Unparseable values become NaN, which matches
+    nothing.
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return float("nan")
+    # Naive datetimes are converted from local time
+    return value.timestamp()
+
+
+def renumber_rows(
+    ids: np.ndarray, removed: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Map row ids onto the rows left after removing some, closing the gaps.
+
+    Args:
+        ids: Row ids to map
+        removed: Sorted, unique row ids being removed
+
+    Returns:
+        Mask of the ids that survive, and their new row ids
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    # Number of removed rows before each id, which is how far it moves down
+    shift = np.searchsorted(removed, ids)
+    hit = shift < len(removed)
+    keep = np.ones(len(ids), dtype=bool)
+    keep[hit] = removed[shift[hit]] != ids[hit]
+    return keep, (ids - shift)[keep]
+
+
+def _renumbered(ids: "array[int]", removed: np.ndarray) -> "array[int]":
+    """Renumber an int64 row id array, dropping removed rows."""
+    _, kept = renumber_rows(np.frombuffer(ids, dtype=np.int64), removed)
+    return array("q", kept.tobytes())
+
+
+class MetadataIndex:
+    """
+    Row-id sets per agent and memory type, plus per-row timestamps.
+
+    Rows are also kept in timestamp order, so time ranges are found by
+    binary search. Rows are normally added in time order, which keeps that
+    order an append; an out-of-order row defers a re-sort to the next
+    range query.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty indexes."""
+        self.agent_rows: dict[str, array[int]] = {}
+        self.type_rows: dict[str, array[int]] = {}
+        self.row_times = array("d")
+        # Dated rows ordered by timestamp, and their timestamps
+        self.time_order = array("q")
+        self.sorted_times = array("d")
+        self._time_sorted = True
+
+    def __len__(self) -> int:
+        return len(self.row_times)
+
+    def add(self, metadata: dict[str, Any]) -> None:
+        """Index the metadata of the next row."""
+        self.add_row(
+            metadata.get("agent_name", "unknown"),
+            metadata.get("type", "unknown"),
+            to_epoch(metadata.get("timestamp")),
+        )
+
+    def add_row(self, agent_name: str, memory_type: str, epoch: float) -> None:
+        """Index the next row from its agent, type and epoch timestamp."""
+        row = len(self.row_times)
+        self.agent_rows.setdefault(agent_name, array("q")).append(row)
+        self.type_rows.setdefault(memory_type, array("q")).append(row)
+        self.row_times.append(epoch)
+        if math.isnan(epoch):
+            # Undated rows never match a time range
+            return
+        if self.sorted_times and epoch < self.sorted_times[-1]:
+            self._time_sorted = False
+        self.time_order.append(row)
+        self.sorted_times.append(epoch)
+
+    def remove_rows(self, removed: np.ndarray) -> None:
+        """
+        Drop rows from every index and renumber the rest, without re-parsing.
+
+        Args:
+            removed: Sorted, unique row ids being removed
+        """
+        for rows_by_value in (self.agent_rows, self.type_rows):
+            for value in list(rows_by_value):
+                rows = _renumbered(rows_by_value[value], removed)
+                if rows:
+                    rows_by_value[value] = rows
+                else:
+                    del rows_by_value[value]
+        keep = np.ones(len(self.row_times), dtype=bool)
+        keep[removed] = False
+        times = np.frombuffer(self.row_times, dtype=np.float64)
+        self.row_times = array("d", times[keep].tobytes())
+        # Removing rows keeps the survivors' time order
+        kept, order = renumber_rows(
+            np.frombuffer(self.time_order, dtype=np.int64), removed
+        )
+        self.time_order = array("q", order.tobytes())
+        sorted_times = np.frombuffer(self.sorted_times, dtype=np.float64)[kept]
+        self.sorted_times = array("d", sorted_times.tobytes())
+
+    def _time_bounds(
+        self, since: str | datetime | None, until: str | datetime | None
+    ) -> tuple[int, int]:
+        """Locate the [since, until] range in time_order by binary search."""
+        if not self._time_sorted:
+            times = np.frombuffer(self.sorted_times, dtype=np.float64)
+            order = np.argsort(times, kind="stable")
+            self.time_order = array(
+                "q", np.frombuffer(self.time_order, dtype=np.int64)[order].tobytes()
+            )
+            self.sorted_times = array("d", times[order].tobytes())
+            self._time_sorted = True
+
+        times = np.frombuffer(self.sorted_times, dtype=np.float64)
+        start, end = 0, len(times)
+        if since is not None:
+            start = int(np.searchsorted(times, bound_epoch(since), side="left"))
+        if until is not None:
+            bound = bound_epoch(until)
+            # An unparseable bound matches nothing
+            end = (
+                0 if math.isnan(bound) else int(np.searchsorted(times, bound, "right"))
+            )
+        return start, max(start, end)
+
+    def time_range(
+        self, since: str | datetime | None = None, until: str | datetime | None = None
+    ) -> np.ndarray:
+        """Get the sorted row ids stamped within [since, until]."""
+        start, end = self._time_bounds(since, until)
+        return np.sort(np.frombuffer(self.time_order, dtype=np.int64)[start:end])
+
+    def rows_of(self, agent_name: str, memory_type: str | None = None) -> np.ndarray:
+        """Get the sorted row ids of an agent's memories, optionally of one type."""
+        rows = self.candidates(agent_name, memory_type)
+        # Never None, since the agent is always a filter
+        return np.zeros(0, dtype=np.int64) if rows is None else rows
+
+    def candidates(
+        self,
+        agent_name: str | None = None,
+        memory_type: str | None = None,
+        since: str | datetime | None = None,
+        until: str | datetime | None = None,
+    ) -> np.ndarray | None:
+        """
+        Get the sorted row ids matching every given filter.
+
+        Returns:
+            Row ids as an int64 array, or None when no filter is given
+        """
+        id_sets: list[array[int] | np.ndarray] = []
+        if agent_name is not None:
+            id_sets.append(self.agent_rows.get(agent_name, array("q")))
+        if memory_type is not None:
+            id_sets.append(self.type_rows.get(memory_type, array("q")))
+
+        if not id_sets and since is None and until is None:
+            return None
+
+        timed = since is not None or until is not None
+        # Intersect smallest first so the work is bounded by the rarest filter
+        id_sets.sort(key=len)
+        if timed:
+            start, end = self._time_bounds(since, until)
+            if not id_sets or end - start <= len(id_sets[0]):
+                # The time range is the rarest filter
+                order = np.frombuffer(self.time_order, dtype=np.int64)
+                id_sets.insert(0, np.sort(order[start:end]))
+                timed = False
+
+        rows = np.array(id_sets[0], dtype=np.int64)
+        for ids in id_sets[1:]:
+            rows = np.intersect1d(
+                rows, np.array(ids, dtype=np.int64), assume_unique=True
+            )
+
+        if timed:
+            # Fewer rows than the time range: check their timestamps directly
+            times = np.frombuffer(self.row_times, dtype=np.float64)[rows]
+            mask = np.ones(len(rows), dtype=bool)
+            if since is not None:
+                mask &= times >= bound_epoch(since)
+            if until is not None:
+                mask &= times <= bound_epoch(until)
+            rows = rows[mask]
+
+        return rows
@@ -5,6 +5,7 @@ from crewai.agents.agent_builder.base_agent import BaseAgent
 from crewai.project import CrewBase, agent, crew, task
 
 from .enhanced_memory_store import EnhancedMemoryStore
+from .memory_store import SimpleMemoryStore
 
 
 @CrewBase
@@ -19,9 +20,17 @@ class ResearchCrew:
 
     def __init__(self):
         super().__init__()
-        # Initialize enhanced memory store with embeddings for cross-agent memory
+        # Initialize enhanced memory store with embeddings for cross-agent memory;
+        # embeddings are written behind so run_research returns without waiting.
+        # Crews in other processes share the file, so writes append to a journal
+        # instead of rewriting the whole snapshot under the file lock.
         self.memory_store = EnhancedMemoryStore(
-            "research_crew_memory.json", "research_crew_embeddings.index"
+            "research_crew_memory.json",
+            "research_crew_embeddings.index",
+            structured_store=SimpleMemoryStore(
+                "research_crew_memory.json", journal=True
+            ),
+            write_behind=True,
         )
 
     @agent
@@ -123,13 +132,12 @@ class ResearchCrew:
         result = self.crew().kickoff(inputs=inputs)
         output = str(result)
 
-        # Store the research interaction in memory
-        self.memory_store.store_interaction(
-            "research_crew", f"Research topic: {topic}", output
-        )
-
-        # Extract and store key facts
-        self._extract_and_store_facts(topic, output)
+        # Store the research interaction and key facts with a single flush
+        with self.memory_store.batch():
+            self.memory_store.store_interaction(
+                "research_crew", f"Research topic: {topic}", output
+            )
+            self._extract_and_store_facts(topic, output)
 
         return output
 
@@ -2,11 +2,11 @@
 
 import sys
 
-from .research_crew import ResearchCrew
-
 
 def run_research_crew():
     """Run the multi-agent research crew with command line topic input."""
+    # Deferred so the crewai/faiss/torch import cost is only paid when running
+    from .research_crew import ResearchCrew
 
     # Get topic from command line or use default
     topic = (
@@ -31,6 +31,7 @@ def run_research_crew():
         print(f"📋 Topic: {topic}")
         print("📝 Report saved to: research_report.md")
         print(f"🧠 Memory interactions stored: {crew.get_memory_summary()}")
+        crew.memory_store.close()
 
         # Display abbreviated result
         print("\n📄 Research Summary:")
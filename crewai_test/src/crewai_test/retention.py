@@ -0,0 +1,98 @@
+"""Retention policies deciding which agent memories are evicted."""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+EVICTION_ORDERS = ("least_recently_retrieved", "oldest")
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    Retention limits for the memories of one agent and memory type.
+
+    A policy with agent_name or memory_type left as None applies to every
+    agent or type. Each (agent, type) group is governed by the most specific
+    matching policy, so a per-agent policy overrides a catch-all one.
+
+    Attributes:
+        agent_name: Agent the policy applies to; None for every agent
+        memory_type: "fact" or "interaction"; None for both
+        max_entries: Most memories kept per agent and type; None for no limit
+        ttl_seconds: Age after which memories expire; None to keep them
+        eviction: Which memories go first once max_entries is exceeded:
+            "least_recently_retrieved" (by last search hit, falling back to
+            creation time) or "oldest"
+    """
+
+    agent_name: str | None = None
+    memory_type: str | None = None
+    max_entries: int | None = None
+    ttl_seconds: float | None = None
+    eviction: str = "least_recently_retrieved"
+
+    def __post_init__(self) -> None:
+        if self.eviction not in EVICTION_ORDERS:
+            raise ValueError(
+                f"Unknown eviction {self.eviction!r}; expected one of {EVICTION_ORDERS}"
+            )
+
+    def matches(self, agent_name: str, memory_type: str) -> bool:
+        """Check whether the policy covers an agent and memory type."""
+        return self.agent_name in (None, agent_name) and self.memory_type in (
+            None,
+            memory_type,
+        )
+
+    @property
+    def specificity(self) -> int:
+        """Rank of the policy when several match; agent beats type beats neither."""
+        return 2 * (self.agent_name is not None) + (self.memory_type is not None)
+
+
+def policy_for(
+    policies: list[RetentionPolicy], agent_name: str, memory_type: str
+) -> RetentionPolicy | None:
+    """Get the most specific policy covering an agent and memory type."""
+    matching = [p for p in policies if p.matches(agent_name, memory_type)]
+    return max(matching, key=lambda p: p.specificity, default=None)
+
+
+def select_evictions(
+    policy: RetentionPolicy,
+    rows: np.ndarray,
+    created: np.ndarray,
+    last_retrieved: np.ndarray,
+    now: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Choose the rows of one (agent, type) group that a policy evicts.
+
+    Args:
+        policy: Policy governing the group
+        rows: Row ids in the group
+        created: Creation time of each row, in epoch seconds
+        last_retrieved: Last search hit of each row in epoch seconds, NaN if
+            never retrieved
+        now: Current time in epoch seconds
+
+    Returns:
+        Rows expired by the TTL, and rows evicted to respect max_entries
+    """
+    expired = np.zeros(len(rows), dtype=bool)
+    if policy.ttl_seconds is not None:
+        expired = created < now - policy.ttl_seconds
+
+    overflow = np.zeros(0, dtype=rows.dtype)
+    live = rows[~expired]
+    if policy.max_entries is not None and len(live) > policy.max_entries:
+        recency = created[~expired]
+        if policy.eviction == "least_recently_retrieved":
+            retrieved = last_retrieved[~expired]
+            recency = np.where(np.isnan(retrieved), recency, retrieved)
+        # Stable sort keeps insertion order among equally recent rows
+        order = np.argsort(recency, kind="stable")
+        overflow = np.sort(live[order[: len(live) - policy.max_entries]])
+
+    return rows[expired], overflow
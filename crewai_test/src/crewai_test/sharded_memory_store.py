@@ -0,0 +1,648 @@
+"""EnhancedMemoryStore partitioned into shards searched in parallel."""
+
+import hashlib
+import heapq
+import json
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from dataclasses import replace
+from datetime import datetime
+from itertools import islice
+from operator import itemgetter
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .embedding_cache import QueryEmbeddingCache
+from .enhanced_memory_store import SEARCH_MODES, EnhancedMemoryStore
+from .retention import RetentionPolicy, policy_for, select_evictions
+
+PARTITIONS = ("hash", "agent")
+
+# Result key each search mode ranks by when no recency decay is applied
+_MODE_SCORES = {"vector": "similarity", "hybrid": "fused_score", "lexical": "bm25"}
+
+_timestamp = itemgetter("timestamp")
+
+
+def shard_path(path: str | Path, shard: int) -> Path:
+    """Path of a shard's file: memory.json -> memory.shard0.json."""
+    path = Path(path)
+    return path.with_name(f"{path.stem}.shard{shard}{path.suffix}")
+
+
+def _ranking_score(result: dict[str, Any], search_mode: str) -> float:
+    """Score a search result was ranked by within its shard."""
+    if "score" in result:
+        # Recency-decayed score
+        return float(result["score"])
+    return float(result[_MODE_SCORES[search_mode]])
+
+
+def _merge_ranked(
+    shard_results: list[list[dict[str, Any]]],
+    top_k: int,
+    key: Callable[[dict[str, Any]], float],
+) -> list[dict[str, Any]]:
+    """
+    Merge best-first result lists into the overall top_k with a heap.
+
+    Returns:
+        Results best first, re-ranked from 1; ties keep shard order
+    """
+    merged = list(
+        islice(heapq.merge(*shard_results, key=lambda r: -key(r)), max(top_k, 0))
+    )
+    for rank, result in enumerate(merged, start=1):
+        result["rank"] = rank
+    return merged
+
+
+class ShardedMemoryStore:
+    """
+    Memory store split into EnhancedMemoryStore shards with their own files.
+
+    Memories are routed to a shard by a stable hash of their content
+    ("hash", which spreads every agent across shards and keeps repeats on
+    the same shard for deduplication) or of their agent name ("agent",
+    which keeps an agent's memories on one shard). Searches encode the query
+    once, run on every shard in a thread pool, since FAISS and the embedding
+    model release the GIL, and merge the shards' top results with a heap.
+    Each shard saves on its own, and a save only writes shards with unsaved
+    changes.
+
+    The shard count and partitioning are recorded next to the shard files,
+    since reopening with different ones would route memories to the wrong
+    shards.
+
+    Retention TTLs apply per memory, so each shard enforces them on its own.
+    With "hash" partitioning an agent's memories span shards, so the
+    max_entries limits are also enforced across shards: a group's rows on
+    every shard are ranked together in the policy's eviction order. Like a
+    single store's retention, this runs when the store is saved, flushed
+    or closed, and after a batch or bulk write, not on every write.
+    """
+
+    def __init__(
+        self,
+        storage_path: str = "enhanced_memory_store.json",
+        embeddings_path: str = "memory_embeddings.index",
+        n_shards: int = 4,
+        partition: str = "hash",
+        max_workers: int | None = None,
+        **store_kwargs: Any,
+    ):
+        """
+        Initialize the shards.
+
+        Args:
+            storage_path: Structured store path; shard i uses
+                shard_path(storage_path, i)
+            embeddings_path: Index path; shard i uses
+                shard_path(embeddings_path, i)
+            n_shards: Number of shards
+            partition: "hash" or "agent"
+            max_workers: Threads searching shards in parallel; defaults to
+                n_shards
+            **store_kwargs: EnhancedMemoryStore arguments shared by every
+                shard, such as embedding_model, index_config or retention.
+                A query_cache is shared across shards; one is created if not
+                given. Retention max_entries limits hold for the whole
+                store, not per shard.
+
+        Raises:
+            ValueError: If the arguments are invalid or the shard files were
+                written with another shard count or partitioning
+        """
+        if n_shards < 1:
+            raise ValueError("n_shards must be at least 1")
+        if partition not in PARTITIONS:
+            raise ValueError(
+                f"Unknown partition {partition!r}; expected one of {PARTITIONS}"
+            )
+        if "structured_store" in store_kwargs:
+            raise ValueError("Shards each open their own structured store")
+
+        self.n_shards = n_shards
+        self.partition = partition
+        self._check_layout(Path(embeddings_path))
+
+        self._global_dedup = store_kwargs.get("dedup_scope") == "global"
+        self.retention = list(store_kwargs.get("retention") or [])
+        # Agent partitioning keeps each group on one shard, whose own limits
+        # are then global; hash partitioning needs a cross-shard pass
+        self._global_limits = partition == "hash" and any(
+            policy.max_entries is not None for policy in self.retention
+        )
+
+        # Shards share one query cache, so a query is encoded once for all
+        store_kwargs["query_cache"] = (
+            store_kwargs.get("query_cache") or QueryEmbeddingCache()
+        )
+        self.shards = [
+            EnhancedMemoryStore(
+                str(shard_path(storage_path, shard)),
+                str(shard_path(embeddings_path, shard)),
+                **store_kwargs,
+            )
+            for shard in range(n_shards)
+        ]
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or n_shards, thread_name_prefix="memory-shard"
+        )
+
+    def _check_layout(self, embeddings_path: Path) -> None:
+        """Record the shard layout, or check it against the recorded one."""
+        layout_path = embeddings_path.with_name(f"{embeddings_path.stem}.shards.json")
+        layout = {"n_shards": self.n_shards, "partition": self.partition}
+        if layout_path.exists():
+            with open(layout_path) as f:
+                saved = json.load(f)
+            if saved != layout:
+                raise ValueError(
+                    f"{layout_path} records {saved['n_shards']} shards partitioned "
+                    f"by {saved['partition']!r}; this store is configured for "
+                    f"{self.n_shards} by {self.partition!r}"
+                )
+            return
+        layout_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(layout_path, "w") as f:
+            json.dump(layout, f)
+
+    def _shard_index(self, agent_name: str, *content: str) -> int:
+        """Pick the shard of a memory from a stable hash of its routing key."""
+        if self.partition == "agent":
+            key = agent_name
+        elif self._global_dedup:
+            # Different agents' repeats must meet on one shard to be folded
+            key = "\x1f".join(content)
+        else:
+            key = "\x1f".join((agent_name, *content))
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") % self.n_shards
+
+    def _agent_shards(self, agent_name: str | None) -> list[int]:
+        """Shards that can hold an agent's memories; all of them for None."""
+        if self.partition == "agent" and agent_name is not None:
+            return [self._shard_index(agent_name)]
+        return list(range(self.n_shards))
+
+    def _map(
+        self,
+        function: Callable[[EnhancedMemoryStore], Any],
+        shard_ids: list[int] | None = None,
+    ) -> list[Any]:
+        """Call function on shards in the thread pool; results in shard_ids order."""
+        shards = self.shards
+        if shard_ids is not None:
+            shards = [self.shards[i] for i in shard_ids]
+        if len(shards) == 1:
+            return [function(shards[0])]
+        return list(self._executor.map(function, shards))
+
+    def store_interaction(
+        self, agent_name: str, input_message: str, output_message: str
+    ) -> str:
+        """
+        Store an interaction on its shard.
+
+        Returns:
+            The memory ID of the interaction
+        """
+        shard = self.shards[
+            self._shard_index(agent_name, input_message, output_message)
+        ]
+        return shard.store_interaction(agent_name, input_message, output_message)
+
+    def store_fact(self, agent_name: str, fact: str) -> str:
+        """
+        Store a fact on its shard.
+
+        Returns:
+            The memory ID of the fact
+        """
+        return self.shards[self._shard_index(agent_name, fact)].store_fact(
+            agent_name, fact
+        )
+
+    def store_interactions_bulk(
+        self,
+        interactions: Iterable[tuple[str, str, str]],
+        batch_size: int | None = None,
+    ) -> None:
+        """
+        Store many interactions, encoding each shard's share in parallel.
+
+        Args:
+            interactions: (agent_name, input_message, output_message) tuples
+            batch_size: Texts per model forward pass
+        """
+        by_shard: dict[int, list[tuple[str, str, str]]] = {}
+        for interaction in interactions:
+            by_shard.setdefault(self._shard_index(*interaction), []).append(interaction)
+        self._map_items(
+            by_shard, EnhancedMemoryStore.store_interactions_bulk, batch_size
+        )
+
+    def store_facts_bulk(
+        self, facts: Iterable[tuple[str, str]], batch_size: int | None = None
+    ) -> None:
+        """
+        Store many facts, encoding each shard's share in parallel.
+
+        Args:
+            facts: (agent_name, fact) tuples
+            batch_size: Texts per model forward pass
+        """
+        by_shard: dict[int, list[tuple[str, str]]] = {}
+        for fact in facts:
+            by_shard.setdefault(self._shard_index(*fact), []).append(fact)
+        self._map_items(by_shard, EnhancedMemoryStore.store_facts_bulk, batch_size)
+
+    def _map_items(
+        self,
+        by_shard: dict[int, list[Any]],
+        method: Callable[..., Any],
+        *args: Any,
+    ) -> None:
+        """Call method(shard, items, *args) for each shard's items in parallel."""
+        shard_ids = sorted(by_shard)
+        list(
+            self._executor.map(
+                lambda i: method(self.shards[i], by_shard[i], *args), shard_ids
+            )
+        )
+        self._enforce_count_limits()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Buffer writes on every shard; see EnhancedMemoryStore.batch."""
+        with ExitStack() as stack:
+            for shard in self.shards:
+                stack.enter_context(shard.batch())
+            yield
+        self._enforce_count_limits()
+
+    def _prepare_queries(self, queries: list[str], search_mode: str) -> None:
+        """Encode queries once into the shared cache before fanning out."""
+        if search_mode == "lexical":
+            return
+        shard = next((s for s in self.shards if len(s.text_database)), None)
+        if shard is not None and queries:
+            shard._encode_queries(queries)
+
+    def semantic_search(
+        self,
+        query: str,
+        top_k: int = 5,
+        agent_filter: str | None = None,
+        min_similarity: float = 0.3,
+        type_filter: str | None = None,
+        since: str | datetime | None = None,
+        until: str | datetime | None = None,
+        read_your_writes: bool | None = None,
+        search_mode: str = "vector",
+        recency_half_life: float | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Search every shard in parallel and merge their top_k results.
+
+        Takes the same arguments as EnhancedMemoryStore.semantic_search.
+        Cosine similarities and decayed scores compare directly across
+        shards. BM25 statistics and hybrid rank fusion are computed per
+        shard, so lexical and hybrid merges approximate a single index.
+
+        Returns:
+            Results as semantic_search returns them, plus the "shard" they
+            came from
+        """
+        return self.semantic_search_many(
+            [query],
+            top_k,
+            agent_filter,
+            min_similarity,
+            type_filter,
+            since,
+            until,
+            read_your_writes,
+            search_mode,
+            recency_half_life,
+        )[0]
+
+    def semantic_search_many(
+        self,
+        queries: list[str],
+        top_k: int = 5,
+        agent_filter: str | None = None,
+        min_similarity: float = 0.3,
+        type_filter: str | None = None,
+        since: str | datetime | None = None,
+        until: str | datetime | None = None,
+        read_your_writes: bool | None = None,
+        search_mode: str = "vector",
+        recency_half_life: float | None = None,
+    ) -> list[list[dict[str, Any]]]:
+        """
+        Run several searches on every shard; see semantic_search.
+
+        Returns:
+            One merged result list per query
+        """
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(
+                f"Unknown search_mode {search_mode!r}; expected one of {SEARCH_MODES}"
+            )
+        self._prepare_queries(queries, search_mode)
+        shard_ids = self._agent_shards(agent_filter)
+        per_shard = self._map(
+            lambda shard: shard.semantic_search_many(
+                queries,
+                top_k,
+                agent_filter,
+                min_similarity,
+                type_filter,
+                since,
+                until,
+                read_your_writes,
+                search_mode,
+                recency_half_life,
+            ),
+            shard_ids,
+        )
+        for shard_id, shard_results in zip(shard_ids, per_shard, strict=True):
+            for results in shard_results:
+                for result in results:
+                    result["shard"] = shard_id
+        return [
+            _merge_ranked(
+                [shard_results[i] for shard_results in per_shard],
+                top_k,
+                lambda r: _ranking_score(r, search_mode),
+            )
+            for i in range(len(queries))
+        ]
+
+    def get_relevant_context(
+        self,
+        agent_name: str,
+        query: str,
+        context_limit: int = 5,
+        agent_boost: float = 1.0,
+        candidate_pool: int = 4,
+        read_your_writes: bool | None = None,
+        recency_half_life: float | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Get relevant context from every shard; see EnhancedMemoryStore.
+
+        Each shard re-ranks its own candidates with the agent boost, so
+        merging the shards' top context_limit by score is exact.
+        """
+        self._prepare_queries([query], "vector")
+        per_shard = self._map(
+            lambda shard: shard.get_relevant_context(
+                agent_name,
+                query,
+                context_limit,
+                agent_boost,
+                candidate_pool,
+                read_your_writes,
+                recency_half_life,
+            )
+        )
+        return _merge_ranked(per_shard, context_limit, itemgetter("score"))
+
+    def get_cross_agent_insights(
+        self, topic: str, exclude_agent: str | None = None
+    ) -> list[dict[str, Any]]:
+        """Get insights from agents other than exclude_agent on a topic."""
+        results = self.semantic_search(topic, top_k=10)
+        if exclude_agent:
+            results = [
+                r for r in results if r["metadata"].get("agent_name") != exclude_agent
+            ]
+        return results[:5]
+
+    def get_agent_history(self, agent_name: str) -> list[dict[str, Any]]:
+        """Get all interactions for an agent, in time order."""
+        return list(
+            heapq.merge(
+                *self._map(
+                    lambda shard: shard.get_agent_history(agent_name),
+                    self._agent_shards(agent_name),
+                ),
+                key=_timestamp,
+            )
+        )
+
+    def get_agent_facts(self, agent_name: str) -> list[dict[str, Any]]:
+        """Get all stored facts for an agent, in time order."""
+        return list(
+            heapq.merge(
+                *self._map(
+                    lambda shard: shard.get_agent_facts(agent_name),
+                    self._agent_shards(agent_name),
+                ),
+                key=_timestamp,
+            )
+        )
+
+    def get_recent_interactions(
+        self, agent_name: str, limit: int = 5
+    ) -> list[dict[str, Any]]:
+        """Get the most recent interactions for an agent across its shards."""
+        if limit <= 0:
+            return []
+        recent = heapq.merge(
+            *self._map(
+                lambda shard: shard.get_recent_interactions(agent_name, limit),
+                self._agent_shards(agent_name),
+            ),
+            key=_timestamp,
+        )
+        return list(recent)[-limit:]
+
+    def clear_agent_memory(self, agent_name: str) -> None:
+        """Clear an agent's memories on the shards that can hold them."""
+        for shard_id in self._agent_shards(agent_name):
+            self.shards[shard_id].clear_agent_memory(agent_name)
+
+    def clear_all_memory(self) -> None:
+        """Clear all stored structured memory on every shard."""
+        for shard in self.shards:
+            shard.clear_all_memory()
+
+    def get_memory_summary(self) -> dict[str, Any]:
+        """Get the shards' summaries combined per agent."""
+        summary: dict[str, Any] = {}
+        for shard_summary in self._map(lambda shard: shard.get_memory_summary()):
+            for agent_name, counters in shard_summary.items():
+                if agent_name in summary:
+                    _add_counters(summary[agent_name], counters)
+                else:
+                    summary[agent_name] = dict(counters)
+        return summary
+
+    def get_memory_analytics(self) -> dict[str, Any]:
+        """Get analytics combined across shards, with per-shard row counts."""
+        per_shard = self._map(lambda shard: shard.get_memory_analytics())
+        analytics = self.get_memory_summary()
+        embeddings: dict[str, Any] = {
+            "total_embeddings": 0,
+            "agent_distribution": {},
+            "type_distribution": {},
+        }
+        for shard_analytics in per_shard:
+            shard_embeddings = shard_analytics["embeddings"]
+            embeddings["total_embeddings"] += shard_embeddings["total_embeddings"]
+            for key in ("agent_distribution", "type_distribution"):
+                for name, count in shard_embeddings[key].items():
+                    embeddings[key][name] = embeddings[key].get(name, 0) + count
+        analytics["embeddings"] = embeddings
+        analytics["shards"] = [
+            {
+                "rows": shard_analytics["embeddings"]["total_embeddings"],
+                "unsaved_changes": shard.has_unsaved_changes,
+            }
+            for shard, shard_analytics in zip(self.shards, per_shard, strict=True)
+        ]
+        return analytics
+
+    def _enforce_count_limits(self) -> None:
+        """
+        Evict memories over a max_entries limit counted across all shards.
+
+        Each group's rows are collected from every shard with their creation
+        and last retrieval times and ranked together, so the shards keep
+        exactly the memories one store would. Shards that evicted anything
+        are saved.
+        """
+        if not self._global_limits:
+            return
+        now = time.time()
+        evictions: dict[int, list[tuple[str, str, np.ndarray]]] = {}
+        with ExitStack() as stack:
+            for shard in self.shards:
+                stack.enter_context(shard._lock)
+            # (agent, type) -> its policy and max_entries, and per shard:
+            # shard id, rows, created, retrieved
+            groups: dict[
+                tuple[str, str],
+                tuple[RetentionPolicy, int, list[tuple[int, Any, Any, Any]]],
+            ] = {}
+            for shard_id, shard in enumerate(self.shards):
+                index = shard.metadata_index
+                times = np.frombuffer(index.row_times, dtype=np.float64)
+                retrieved = shard.records.epochs("last_retrieved")
+                for agent_name in index.agent_rows:
+                    for memory_type in index.type_rows:
+                        policy = policy_for(self.retention, agent_name, memory_type)
+                        if policy is None or policy.max_entries is None:
+                            continue
+                        rows = index.rows_of(agent_name, memory_type)
+                        if not len(rows):
+                            continue
+                        key = (agent_name, memory_type)
+                        if key not in groups:
+                            groups[key] = (policy, policy.max_entries, [])
+                        groups[key][2].append(
+                            (shard_id, rows, times[rows], retrieved[rows])
+                        )
+
+            for (agent_name, _), (policy, max_entries, parts) in groups.items():
+                if sum(len(rows) for _, rows, _, _ in parts) <= max_entries:
+                    continue
+                shard_ids = np.concatenate(
+                    [np.full(len(rows), shard_id) for shard_id, rows, _, _ in parts]
+                )
+                rows = np.concatenate([rows for _, rows, _, _ in parts])
+                # Rank positions in the combined group; TTLs are left to shards
+                _, overflow = select_evictions(
+                    replace(policy, ttl_seconds=None),
+                    np.arange(len(rows)),
+                    np.concatenate([created for _, _, created, _ in parts]),
+                    np.concatenate([retrieved for _, _, _, retrieved in parts]),
+                    now,
+                )
+                for shard_id in np.unique(shard_ids[overflow]).tolist():
+                    evicted = overflow[shard_ids[overflow] == shard_id]
+                    evictions.setdefault(shard_id, []).append(
+                        (agent_name, "max_entries", rows[evicted])
+                    )
+
+            for shard_id, shard_evictions in evictions.items():
+                self.shards[shard_id]._apply_evictions(shard_evictions)
+        if evictions:
+            self._map(lambda shard: shard.save_embeddings(), sorted(evictions))
+
+    def apply_retention(self) -> dict[str, Any]:
+        """
+        Evict memories outside the retention policies on every shard now.
+
+        Returns:
+            Eviction stats added up across shards
+        """
+        self._enforce_count_limits()
+        per_shard = self._map(lambda shard: shard.apply_retention())
+        stats: dict[str, Any] = {
+            "evicted": 0,
+            "evicted_by_reason": {"ttl": 0, "max_entries": 0},
+            "evicted_by_agent": {},
+            "structured_trimmed": 0,
+        }
+        for shard_stats in per_shard:
+            stats["evicted"] += shard_stats["evicted"]
+            stats["structured_trimmed"] += shard_stats["structured_trimmed"]
+            for reason, count in shard_stats["evicted_by_reason"].items():
+                stats["evicted_by_reason"][reason] += count
+            for agent_name, count in shard_stats["evicted_by_agent"].items():
+                by_agent = stats["evicted_by_agent"]
+                by_agent[agent_name] = by_agent.get(agent_name, 0) + count
+        return stats
+
+    def save_embeddings(self) -> int:
+        """
+        Save the shards with unsaved changes, in parallel.
+
+        Returns:
+            Number of shards written
+        """
+        self._enforce_count_limits()
+        dirty = [i for i, shard in enumerate(self.shards) if shard.has_unsaved_changes]
+        if dirty:
+            self._map(lambda shard: shard.save_embeddings(), dirty)
+        return len(dirty)
+
+    def refresh(self) -> None:
+        """Pick up memories other processes saved to any shard."""
+        self._map(lambda shard: shard.refresh())
+
+    def flush(self) -> None:
+        """Index queued writes on every shard and save the changed ones."""
+        self._map(lambda shard: shard.flush())
+        self._enforce_count_limits()
+
+    def close(self) -> None:
+        """Flush and close every shard, then stop the search threads."""
+        self.flush()
+        self._map(lambda shard: shard.close())
+        self._executor.shutdown()
+
+    def __enter__(self) -> "ShardedMemoryStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def _add_counters(total: dict[str, Any], counters: dict[str, Any]) -> None:
+    """Add one shard's summary counters for an agent into the running total."""
+    for key, value in counters.items():
+        if key.startswith("last_"):
+            if value is not None and (total[key] is None or value > total[key]):
+                total[key] = value
+        else:
+            total[key] += value
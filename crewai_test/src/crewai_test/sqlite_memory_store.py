@@ -0,0 +1,497 @@
+"""SQLite-backed memory store with indexed agent/timestamp queries."""
+
+import sqlite3
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from .memory_export import DEFAULT_CHUNK_SIZE, chunked, read_records, write_records
+from .memory_store import local_timestamp, new_memory_id
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS interactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent_name TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    input TEXT NOT NULL,
+    output TEXT NOT NULL,
+    memory_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_interactions_agent_ts
+    ON interactions (agent_name, timestamp);
+CREATE TABLE IF NOT EXISTS facts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent_name TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    fact TEXT NOT NULL,
+    memory_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_facts_agent_ts
+    ON facts (agent_name, timestamp);
+"""
+
+# Created after databases from before memory IDs gain the column
+_ID_INDEXES = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_interactions_memory_id
+    ON interactions (memory_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_facts_memory_id
+    ON facts (memory_id);
+"""
+
+# Per agent/type counters, kept up to date by triggers so summaries read
+# one row per agent and type instead of aggregating every entry
+_STATS_SCHEMA = """
+CREATE TABLE memory_stats (
+    agent_name TEXT NOT NULL,
+    memory_type TEXT NOT NULL,
+    entry_count INTEGER NOT NULL,
+    content_bytes INTEGER NOT NULL,
+    last_timestamp TEXT,
+    PRIMARY KEY (agent_name, memory_type)
+);
+"""
+
+# Trigger template per table; {size} is the UTF-8 size of a row's content
+_STATS_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS {table}_stats_insert AFTER INSERT ON {table}
+BEGIN
+    INSERT INTO memory_stats VALUES (
+        NEW.agent_name, '{memory_type}', 1, {new_size}, NEW.timestamp
+    )
+    ON CONFLICT (agent_name, memory_type) DO UPDATE SET
+        entry_count = entry_count + 1,
+        content_bytes = content_bytes + excluded.content_bytes,
+        last_timestamp = max(
+            coalesce(last_timestamp, ''), excluded.last_timestamp
+        );
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_stats_delete AFTER DELETE ON {table}
+BEGIN
+    UPDATE memory_stats SET
+        entry_count = entry_count - 1,
+        content_bytes = content_bytes - ({old_size}),
+        last_timestamp = CASE
+            WHEN last_timestamp = OLD.timestamp THEN (
+                SELECT MAX(timestamp) FROM {table}
+                WHERE agent_name = OLD.agent_name
+            )
+            ELSE last_timestamp
+        END
+    WHERE agent_name = OLD.agent_name AND memory_type = '{memory_type}';
+END;
+"""
+
+# Memory type -> table and the columns of its entries
+_TABLES = {
+    "interaction": ("interactions", "input, output"),
+    "fact": ("facts", "fact"),
+}
+
+# Bound parameters per IN (...) query, below SQLite's default limit
+_ID_CHUNK = 500
+
+
+def _content_size(columns: str, row: str = "") -> str:
+    """SQL for the UTF-8 size of the content columns of a (trigger) row."""
+    return " + ".join(
+        f"length(CAST({row}{column} AS BLOB))" for column in columns.split(", ")
+    )
+
+
+class SqliteMemoryStore:
+    """Drop-in replacement for SimpleMemoryStore backed by a SQLite database."""
+
+    def __init__(self, storage_path: str = "memory_store.db"):
+        """Initialize the memory store with a SQLite database path."""
+        self.storage_path = Path(storage_path)
+        self._batch_depth = 0
+        self.load_memory()
+
+    def load_memory(self) -> None:
+        """Open the database and make sure the schema exists."""
+        self.storage_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn: sqlite3.Connection = sqlite3.connect(
+            str(self.storage_path), check_same_thread=False
+        )
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        for table, _ in _TABLES.values():
+            columns = {
+                row["name"] for row in self.conn.execute(f"PRAGMA table_info({table})")
+            }
+            if "memory_id" not in columns:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN memory_id TEXT")
+        self.conn.executescript(_ID_INDEXES)
+        self._create_stats()
+        self.conn.commit()
+
+    def _create_stats(self) -> None:
+        """Create the counter table and triggers, counting existing rows once."""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'memory_stats'"
+        ).fetchone()
+        if not exists:
+            self.conn.execute(_STATS_SCHEMA)
+        for memory_type, (table, columns) in _TABLES.items():
+            if not exists:
+                self.conn.execute(
+                    f"INSERT INTO memory_stats SELECT agent_name, ?, COUNT(*), "
+                    f"SUM({_content_size(columns)}), MAX(timestamp) FROM {table} GROUP BY agent_name",
+                    (memory_type,),
+                )
+            self.conn.executescript(
+                _STATS_TRIGGERS.format(
+                    table=table,
+                    memory_type=memory_type,
+                    new_size=_content_size(columns, "NEW."),
+                    old_size=_content_size(columns, "OLD."),
+                )
+            )
+
+    def save_memory(self) -> None:
+        """Commit any pending writes; every store call already commits."""
+        self.conn.commit()
+
+    def _write(self, *statements: tuple[str, tuple[Any, ...]]) -> int:
+        """
+        Execute write statements, committing unless inside a batch.
+
+        Returns:
+            Number of rows the statements changed, not counting trigger writes
+        """
+        changed = 0
+        for sql, params in statements:
+            changed += self.conn.execute(sql, params).rowcount
+        if self._batch_depth == 0:
+            self.conn.commit()
+        return changed
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group writes into a single transaction committed on exit."""
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.conn.commit()
+
+    def store_interaction(
+        self,
+        agent_name: str,
+        input_message: str,
+        output_message: str,
+        memory_id: str | None = None,
+    ) -> str:
+        """
+        Store an agent interaction in memory.
+
+        Returns:
+            The memory ID of the interaction, generated unless given
+        """
+        memory_id = memory_id or new_memory_id()
+        self._write(
+            (
+                "INSERT INTO interactions "
+                "(memory_id, agent_name, timestamp, input, output) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    memory_id,
+                    agent_name,
+                    datetime.now().isoformat(),
+                    input_message,
+                    output_message,
+                ),
+            )
+        )
+        return memory_id
+
+    def store_fact(
+        self, agent_name: str, fact: str, memory_id: str | None = None
+    ) -> str:
+        """
+        Store a learned fact for an agent.
+
+        Returns:
+            The memory ID of the fact, generated unless given
+        """
+        memory_id = memory_id or new_memory_id()
+        self._write(
+            (
+                "INSERT INTO facts (memory_id, agent_name, timestamp, fact) "
+                "VALUES (?, ?, ?, ?)",
+                (memory_id, agent_name, datetime.now().isoformat(), fact),
+            )
+        )
+        return memory_id
+
+    def get_record(self, memory_id: str) -> dict[str, Any] | None:
+        """
+        Look up a memory by ID.
+
+        Returns:
+            The entry with its agent_name and type added, or None if no
+            entry has the ID
+        """
+        return self.get_records([memory_id]).get(memory_id)
+
+    def get_records(self, memory_ids: list[str]) -> dict[str, dict[str, Any]]:
+        """Look up memories by ID, leaving out IDs that are not stored."""
+        records: dict[str, dict[str, Any]] = {}
+        for start in range(0, len(memory_ids), _ID_CHUNK):
+            chunk = memory_ids[start : start + _ID_CHUNK]
+            marks = ", ".join("?" * len(chunk))
+            for memory_type, (table, columns) in _TABLES.items():
+                rows = self.conn.execute(
+                    f"SELECT memory_id AS id, agent_name, timestamp, {columns} "
+                    f"FROM {table} WHERE memory_id IN ({marks})",
+                    chunk,
+                )
+                for row in rows:
+                    records[row["id"]] = {"type": memory_type, **dict(row)}
+        return records
+
+    def delete(self, memory_ids: list[str]) -> int:
+        """
+        Delete memories by ID.
+
+        Returns:
+            Number of entries removed
+        """
+        statements = []
+        for start in range(0, len(memory_ids), _ID_CHUNK):
+            chunk = tuple(memory_ids[start : start + _ID_CHUNK])
+            marks = ", ".join("?" * len(chunk))
+            for table, _ in _TABLES.values():
+                statements.append(
+                    (f"DELETE FROM {table} WHERE memory_id IN ({marks})", chunk)
+                )
+        return self._write(*statements)
+
+    def iter_records(self) -> Iterator[dict[str, Any]]:
+        """
+        Yield every memory as a record, streamed from a cursor.
+
+        Records have the shape get_record returns; interactions come first,
+        then facts, each by agent in time order.
+        """
+        for memory_type, (table, columns) in _TABLES.items():
+            rows = self.conn.execute(
+                f"SELECT memory_id AS id, agent_name, timestamp, {columns} "
+                f"FROM {table} ORDER BY agent_name, timestamp, rowid"
+            )
+            for row in rows:
+                record = {"type": memory_type, **dict(row)}
+                if record["id"] is None:
+                    # Stored before memory IDs existed
+                    del record["id"]
+                yield record
+
+    def export(self, path: str | Path, format: str | None = None) -> int:
+        """
+        Stream every memory to an NDJSON or Parquet file.
+
+        Args:
+            path: Export file
+            format: "ndjson" or "parquet"; inferred from the suffix if None
+
+        Returns:
+            Number of memories written
+        """
+        return write_records(path, self.iter_records(), format)
+
+    def import_records(self, records: Iterable[dict[str, Any]]) -> int:
+        """
+        Add exported memories, keeping their IDs and timestamps.
+
+        Each chunk of records is inserted in one transaction. Memories whose
+        ID is already stored are skipped.
+
+        Returns:
+            Number of memories added
+        """
+        added = 0
+        for chunk in chunked(records, DEFAULT_CHUNK_SIZE):
+            statements = []
+            for record in chunk:
+                if record.get("type") not in _TABLES:
+                    continue
+                table, columns = _TABLES[record["type"]]
+                names = columns.split(", ")
+                statements.append(
+                    (
+                        f"INSERT OR IGNORE INTO {table} "
+                        f"(memory_id, agent_name, timestamp, {columns}) "
+                        f"VALUES (?, ?, ?, {', '.join('?' * len(names))})",
+                        (
+                            record.get("id") or new_memory_id(),
+                            record["agent_name"],
+                            record.get("timestamp") or datetime.now().isoformat(),
+                            *(record[name] for name in names),
+                        ),
+                    )
+                )
+            added += self._write(*statements)
+        return added
+
+    def import_(self, path: str | Path, format: str | None = None) -> int:
+        """
+        Stream memories in from an export file; see import_records.
+
+        Returns:
+            Number of memories added
+        """
+        return self.import_records(read_records(path, format))
+
+    def trim(
+        self,
+        agent_name: str,
+        memory_type: str,
+        max_entries: int | None = None,
+        since: datetime | None = None,
+    ) -> int:
+        """
+        Drop an agent's facts or interactions that fall outside retention limits.
+
+        Args:
+            agent_name: Agent whose memory is trimmed
+            memory_type: "fact" or "interaction"
+            max_entries: Most entries kept, newest first; None for no limit
+            since: Drop entries older than this; naive values are local time
+
+        Returns:
+            Number of entries removed
+        """
+        table = "interactions" if memory_type == "interaction" else "facts"
+        statements: list[tuple[str, tuple[Any, ...]]] = []
+        if since is not None:
+            statements.append(
+                (
+                    f"DELETE FROM {table} WHERE agent_name = ? AND timestamp < ?",
+                    (agent_name, local_timestamp(since)),
+                )
+            )
+        if max_entries is not None:
+            statements.append(
+                (
+                    f"DELETE FROM {table} WHERE agent_name = ? AND id NOT IN "
+                    f"(SELECT id FROM {table} WHERE agent_name = ? "
+                    "ORDER BY timestamp DESC, id DESC LIMIT ?)",
+                    (agent_name, agent_name, max(max_entries, 0)),
+                )
+            )
+        return self._write(*statements)
+
+    def get_agent_history(self, agent_name: str) -> list[dict[str, Any]]:
+        """Get all interactions for a specific agent."""
+        rows = self.conn.execute(
+            "SELECT memory_id AS id, timestamp, input, output FROM interactions "
+            "WHERE agent_name = ? ORDER BY timestamp, rowid",
+            (agent_name,),
+        )
+        return [dict(row) for row in rows]
+
+    def get_agent_facts(self, agent_name: str) -> list[dict[str, Any]]:
+        """Get all stored facts for a specific agent."""
+        rows = self.conn.execute(
+            "SELECT memory_id AS id, timestamp, fact FROM facts "
+            "WHERE agent_name = ? ORDER BY timestamp, rowid",
+            (agent_name,),
+        )
+        return [dict(row) for row in rows]
+
+    def get_recent_interactions(
+        self, agent_name: str, limit: int = 5
+    ) -> list[dict[str, Any]]:
+        """Get the most recent interactions for an agent."""
+        if limit <= 0:
+            return []
+        rows = self.conn.execute(
+            "SELECT memory_id AS id, timestamp, input, output FROM interactions "
+            "WHERE agent_name = ? ORDER BY timestamp DESC, rowid DESC LIMIT ?",
+            (agent_name, limit),
+        ).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    def get_memories_between(
+        self,
+        agent_name: str,
+        memory_type: str = "interaction",
+        since: str | datetime | None = None,
+        until: str | datetime | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Get an agent's interactions or facts stamped within a time range.
+
+        The range is answered from the (agent_name, timestamp) index.
+
+        Args:
+            agent_name: Agent whose memory is queried
+            memory_type: "interaction" or "fact"
+            since: Earliest timestamp included; None for no lower bound
+            until: Latest timestamp included; None for no upper bound.
+                Naive bounds are local time, like stored timestamps.
+
+        Returns:
+            Matching entries, oldest first
+        """
+        table, columns = _TABLES[memory_type]
+        sql = (
+            f"SELECT memory_id AS id, timestamp, {columns} FROM {table} "
+            "WHERE agent_name = ?"
+        )
+        params: list[Any] = [agent_name]
+        if since is not None:
+            sql += " AND timestamp >= ?"
+            params.append(local_timestamp(since))
+        if until is not None:
+            sql += " AND timestamp <= ?"
+            params.append(local_timestamp(until))
+        rows = self.conn.execute(sql + " ORDER BY timestamp, rowid", params)
+        return [dict(row) for row in rows]
+
+    def clear_agent_memory(self, agent_name: str) -> None:
+        """Clear all memory for a specific agent."""
+        self._write(
+            ("DELETE FROM interactions WHERE agent_name = ?", (agent_name,)),
+            ("DELETE FROM facts WHERE agent_name = ?", (agent_name,)),
+        )
+
+    def clear_all_memory(self) -> None:
+        """Clear all stored memory."""
+        self._write(("DELETE FROM interactions", ()), ("DELETE FROM facts", ()))
+
+    def get_memory_summary(self) -> dict[str, Any]:
+        """Get a summary of stored memory."""
+        summary: dict[str, Any] = {}
+
+        # Read from the trigger-maintained counters, one row per agent and type
+        for row in self.conn.execute(
+            "SELECT * FROM memory_stats WHERE entry_count > 0 ORDER BY agent_name"
+        ):
+            entry = summary.setdefault(
+                row["agent_name"],
+                {
+                    "interaction_count": 0,
+                    "fact_count": 0,
+                    "last_interaction": None,
+                    "last_fact": None,
+                    "content_bytes": 0,
+                },
+            )
+            entry[f"{row['memory_type']}_count"] = row["entry_count"]
+            entry[f"last_{row['memory_type']}"] = row["last_timestamp"]
+            entry["content_bytes"] += row["content_bytes"]
+
+        return summary
+
+    def refresh(self) -> None:
+        """No-op: every query already sees other processes' committed writes."""
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self.conn.close()
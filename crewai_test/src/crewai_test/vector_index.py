@@ -0,0 +1,409 @@
+"""FAISS index construction for the memory vector store.
+
+All index types use inner product over L2-normalized vectors, so scores are
+cosine similarities regardless of the index type. Flat, HNSW and IVF-Flat
+indexes can store vectors as float32, float16 or 8-bit scalar-quantized
+codes; IVF-PQ always stores product-quantized codes.
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+
+# Vector storage precision -> FAISS scalar quantizer type (None: plain float32)
+VECTOR_STORAGE = {
+    "float32": None,
+    "float16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+
+@dataclass
+class IndexConfig:
+    """
+    Index type and build parameters for EnhancedMemoryStore.
+
+    Stores always start with an exact flat index. Once the corpus reaches
+    migrate_threshold vectors the flat index is replaced by index_type,
+    training IVF variants on the vectors already stored.
+
+    Attributes:
+        index_type: One of "flat", "hnsw", "ivf_flat" or "ivf_pq"
+        migrate_threshold: Corpus size at which to migrate away from flat
+        hnsw_m: Neighbours per HNSW node
+        hnsw_ef_construction: HNSW build-time search depth
+        hnsw_ef_search: HNSW query-time search depth
+        ivf_nlist: Number of IVF lists; derived from corpus size when None
+        ivf_nprobe: Number of IVF lists probed per query
+        pq_m: Number of PQ sub-quantizers; must divide the embedding dimension
+        pq_nbits: Bits per PQ code
+        storage: Vector precision for flat, HNSW and IVF-Flat indexes:
+            "float32", "float16" (half the memory) or "int8" (a quarter of
+            the memory; per-dimension ranges trained on stored vectors)
+        sq_min_training: Vectors needed to train int8 storage; smaller
+            stores keep float32 vectors until they reach this size
+    """
+
+    index_type: str = "hnsw"
+    migrate_threshold: int = 50_000
+    hnsw_m: int = 32
+    hnsw_ef_construction: int = 200
+    hnsw_ef_search: int = 64
+    ivf_nlist: int | None = None
+    ivf_nprobe: int = 16
+    pq_m: int = 16
+    pq_nbits: int = 8
+    storage: str = "float32"
+    sq_min_training: int = 1000
+
+    def __post_init__(self) -> None:
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(
+                f"Unknown index_type {self.index_type!r}; expected one of {INDEX_TYPES}"
+            )
+        if self.storage not in VECTOR_STORAGE:
+            raise ValueError(
+                f"Unknown storage {self.storage!r}; "
+                f"expected one of {tuple(VECTOR_STORAGE)}"
+            )
+
+    def nlist_for(self, n_vectors: int) -> int:
+        """Number of IVF lists for a corpus, keeping ~39 training points per list."""
+        if self.ivf_nlist is not None:
+            return self.ivf_nlist
+        return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39))
+
+
+def index_type_of(index: Any) -> str:
+    """Name the configured type of a FAISS index."""
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+
+def storage_of(index: Any) -> str:
+    """Name the precision vectors are stored at in a FAISS index."""
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "pq"
+    if isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        for storage, qtype in VECTOR_STORAGE.items():
+            if qtype == index.sq.qtype:
+                return storage
+    return "float32"
+
+
+def bytes_per_vector(index: Any) -> float:
+    """Serialized size of an index divided by the number of vectors it holds."""
+    if index.ntotal == 0:
+        return 0.0
+    return float(len(faiss.serialize_index(index)) / index.ntotal)
+
+
+def build_index(
+    config: IndexConfig, dim: int, vectors: np.ndarray | None = None
+) -> Any:
+    """
+    Build an index of config.index_type, training it on vectors if needed.
+
+    The vectors are used for training only; callers add them separately.
+
+    Raises:
+        ValueError: If the index type or int8 storage needs more training
+            vectors than were given
+    """
+    n_vectors = 0 if vectors is None else len(vectors)
+    qtype = VECTOR_STORAGE[config.storage]
+    if (
+        config.storage == "int8"
+        and config.index_type != "ivf_pq"
+        and n_vectors < config.sq_min_training
+    ):
+        raise ValueError(
+            f"int8 storage needs at least {config.sq_min_training} training "
+            f"vectors, got {n_vectors}"
+        )
+
+    if config.index_type == "flat":
+        if qtype is None:
+            index: Any = faiss.IndexFlatIP(dim)
+        else:
+            index = faiss.IndexScalarQuantizer(dim, qtype, faiss.METRIC_INNER_PRODUCT)
+    elif config.index_type == "hnsw":
+        if qtype is None:
+            index = faiss.IndexHNSWFlat(dim, config.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        else:
+            # faiss's bundled stubs lack the (d, qtype, M, metric) overload
+            index = faiss.IndexHNSWSQ(
+                dim, qtype, config.hnsw_m, faiss.METRIC_INNER_PRODUCT  # type: ignore[arg-type]
+            )
+        index.hnsw.efConstruction = config.hnsw_ef_construction
+    else:
+        if vectors is None or n_vectors == 0:
+            raise ValueError(f"{config.index_type} requires training vectors")
+        nlist = config.nlist_for(n_vectors)
+        min_training = max(
+            nlist, 2**config.pq_nbits if config.index_type == "ivf_pq" else 0
+        )
+        if n_vectors < min_training:
+            raise ValueError(
+                f"{config.index_type} needs at least {min_training} training "
+                f"vectors, got {n_vectors}"
+            )
+        quantizer = faiss.IndexFlatIP(dim)
+        if config.index_type == "ivf_flat":
+            if qtype is None:
+                index = faiss.IndexIVFFlat(
+                    quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT
+                )
+            else:
+                index = faiss.IndexIVFScalarQuantizer(
+                    quantizer, dim, nlist, qtype, faiss.METRIC_INNER_PRODUCT
+                )
+        else:
+            index = faiss.IndexIVFPQ(
+                quantizer,
+                dim,
+                nlist,
+                config.pq_m,
+                config.pq_nbits,
+                faiss.METRIC_INNER_PRODUCT,
+            )
+        index.train(vectors)
+        # Keep reconstruct() available for migrations and rebuilds
+        index.make_direct_map()
+
+    if not index.is_trained:
+        # Scalar quantizers learn per-dimension value ranges
+        index.train(vectors)
+    configure_search(index, config)
+    return index
+
+
+def configure_search(index: Any, config: IndexConfig) -> None:
+    """Apply query-time parameters to an index."""
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = config.hnsw_ef_search
+    elif isinstance(index, faiss.IndexIVF):
+        index.nprobe = config.ivf_nprobe
+
+
+def search(
+    index: Any,
+    query: np.ndarray,
+    top_k: int,
+    rows: np.ndarray | None = None,
+    exact_limit: int = 4096,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Search an index with one query, optionally restricted to row ids.
+
+    See search_many for the arguments.
+
+    Returns:
+        Scores and row ids, best first, with no padding
+    """
+    return search_many(index, query, top_k, rows, exact_limit)[0]
+
+
+def search_many(
+    index: Any,
+    queries: np.ndarray,
+    top_k: int,
+    rows: np.ndarray | None = None,
+    exact_limit: int = 4096,
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """
+    Search an index with a query matrix, optionally restricted to row ids.
+
+    Small candidate sets are scored exactly from their reconstructed vectors.
+    Larger ones are searched through a FAISS IDSelector; if the ANN search
+    comes back short for a query (HNSW and IVF can miss selective filters)
+    its candidates are scored exactly instead, so up to top_k matches are
+    always returned.
+
+    Args:
+        index: FAISS index to search
+        queries: (n, dim) normalized query vectors
+        top_k: Number of neighbours to return per query
+        rows: Candidate row ids, or None to search everything
+        exact_limit: Largest candidate set scored without the index
+
+    Returns:
+        Per query, scores and row ids, best first, with no padding
+    """
+    empty = (np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64))
+    n_candidates = index.ntotal if rows is None else len(rows)
+    k = min(top_k, n_candidates)
+    if k <= 0:
+        return [empty for _ in range(len(queries))]
+
+    if rows is None:
+        scores, ids = index.search(queries, k)
+        return [
+            (row_scores[row_ids >= 0], row_ids[row_ids >= 0])
+            for row_scores, row_ids in zip(scores, ids, strict=True)
+        ]
+
+    results: list[tuple[np.ndarray, np.ndarray] | None] = [None] * len(queries)
+    if len(rows) > exact_limit:
+        selector = faiss.IDSelectorBatch(rows)
+        # faiss's bundled stubs lack SearchParametersHNSW and the keyword
+        # arguments its Python wrappers accept
+        if isinstance(index, faiss.IndexHNSW):
+            params: Any = faiss.SearchParametersHNSW(  # type: ignore[attr-defined]
+                sel=selector, efSearch=max(index.hnsw.efSearch, k)
+            )
+        elif isinstance(index, faiss.IndexIVF):
+            params = faiss.SearchParametersIVF(  # type: ignore[call-arg]
+                sel=selector, nprobe=index.nprobe
+            )
+        else:
+            params = faiss.SearchParameters(sel=selector)  # type: ignore[call-arg]
+        scores, ids = index.search(queries, k, params=params)
+        for i, (row_scores, row_ids) in enumerate(zip(scores, ids, strict=True)):
+            if (row_ids >= 0).all():
+                results[i] = (row_scores, row_ids)
+
+    short = [i for i, result in enumerate(results) if result is None]
+    if short:
+        vectors = index.reconstruct_batch(rows)
+        candidate_scores = queries[short] @ vectors.T
+        for i, row_scores in zip(short, candidate_scores, strict=True):
+            top = np.argpartition(-row_scores, k - 1)[:k]
+            order = top[np.argsort(-row_scores[top])]
+            results[i] = (row_scores[order], rows[order])
+
+    return [result for result in results if result is not None]
+
+
+def score_rows(
+    index: Any,
+    query: np.ndarray,
+    rows: np.ndarray,
+    top_k: int,
+    chunk_size: int = 65536,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Score row ids exactly against one query from their stored vectors.
+
+    Rows are reconstructed chunk_size at a time, so memory stays bounded
+    however many rows are given.
+
+    Args:
+        index: FAISS index holding the rows
+        query: (dim,) normalized query vector
+        rows: Row ids to score
+        top_k: Number of rows to return
+        chunk_size: Rows reconstructed at a time
+
+    Returns:
+        Scores and row ids of the best top_k rows, best first
+    """
+    scores = np.zeros(0, dtype=np.float32)
+    ids = np.zeros(0, dtype=np.int64)
+    if top_k <= 0:
+        return scores, ids
+    for start in range(0, len(rows), chunk_size):
+        chunk = np.ascontiguousarray(rows[start : start + chunk_size], dtype=np.int64)
+        scores = np.concatenate([scores, index.reconstruct_batch(chunk) @ query])
+        ids = np.concatenate([ids, chunk])
+        if len(ids) > top_k:
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+            scores, ids = scores[top], ids[top]
+    order = np.argsort(-scores, kind="stable")
+    return scores[order], ids[order]
+
+
+def reconstruct_all(index: Any) -> np.ndarray:
+    """Return every stored vector as a float32 matrix."""
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype=np.float32)
+    return np.asarray(index.reconstruct_n(0, index.ntotal), dtype=np.float32)
+
+
+def compare_index_configs(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    configs: list[IndexConfig],
+    top_k: int = 10,
+) -> list[dict[str, Any]]:
+    """
+    Report recall, latency and size of index configurations against exact search.
+
+    Args:
+        vectors: Normalized corpus vectors
+        queries: Normalized query vectors
+        configs: Index configurations to compare
+        top_k: Neighbours per query
+
+    Returns:
+        One row per configuration (plus the float32 flat baseline) with
+        storage, build time, mean query latency in milliseconds, serialized
+        bytes per vector and recall@top_k (top-k overlap with the baseline),
+        or an error for configurations the corpus is too small to train
+    """
+    top_k = min(top_k, len(vectors))
+
+    baseline = faiss.IndexFlatIP(vectors.shape[1])
+    baseline.add(vectors)
+    start = time.perf_counter()
+    _, exact = baseline.search(queries, top_k)
+    baseline_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    report = [
+        {
+            "index_type": "flat",
+            "storage": "float32",
+            "build_seconds": 0.0,
+            "query_ms": baseline_ms,
+            "bytes_per_vector": bytes_per_vector(baseline),
+            "recall": 1.0,
+        }
+    ]
+    for config in configs:
+        start = time.perf_counter()
+        try:
+            index = build_index(config, vectors.shape[1], vectors)
+        except ValueError as e:
+            report.append(
+                {
+                    "index_type": config.index_type,
+                    "storage": config.storage,
+                    "error": str(e),
+                }
+            )
+            continue
+        index.add(vectors)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, found = index.search(queries, top_k)
+        query_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        hits = sum(
+            len(set(row_found) & set(row_exact))
+            for row_found, row_exact in zip(found, exact, strict=True)
+        )
+        report.append(
+            {
+                "index_type": config.index_type,
+                "storage": storage_of(index),
+                "build_seconds": build_seconds,
+                "query_ms": query_ms,
+                "bytes_per_vector": bytes_per_vector(index),
+                "recall": hits / (len(queries) * top_k),
+            }
+        )
+    return report
@@ -0,0 +1,927 @@
+"""Test cases for EnhancedMemoryStore."""
+
+import asyncio
+import gc
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+
+from crewai_test.async_memory_store import AsyncEnhancedMemoryStore  # noqa: E402
+from crewai_test.embedding_models import EmbeddingBackend  # noqa: E402
+from crewai_test.enhanced_memory_store import EnhancedMemoryStore  # noqa: E402
+from crewai_test.memory_store import SimpleMemoryStore  # noqa: E402
+from crewai_test.retention import RetentionPolicy  # noqa: E402
+from crewai_test.sharded_memory_store import ShardedMemoryStore  # noqa: E402
+from crewai_test.vector_index import IndexConfig  # noqa: E402
+
+from crewai_test import (  # noqa: E402
+    embedding_models,
+    enhanced_memory_store,
+    vector_index,
+)
+
+
+class HashingBackend(EmbeddingBackend):
+    """Deterministic bag-of-words stand-in for a SentenceTransformer model."""
+
+    def __init__(self, name="hashing-test-model", runtime="torch", dimension=384):
+        self.name = name
+        self._dimension = dimension
+        self.encode_calls: list[int] = []
+
+    @property
+    def dimension(self):
+        return self._dimension
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=True):
+        self.encode_calls.append(len(texts))
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                digest = hashlib.md5(token.encode()).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dimension
+                vectors[row, bucket] += 1.0
+        if normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.where(norms == 0, 1.0, norms)
+        return vectors
+
+
+@pytest.fixture(autouse=True)
+def hashing_models(monkeypatch):
+    """Load the hashing model instead of a real SentenceTransformer."""
+    monkeypatch.setattr(embedding_models, "SentenceTransformerBackend", HashingBackend)
+    embedding_models.clear_embedding_models()
+    yield
+    embedding_models.clear_embedding_models()
+
+
+@pytest.fixture
+def new_york_time():
+    """Run with a local timezone behind UTC."""
+    saved = os.environ.get("TZ")
+    os.environ["TZ"] = "America/New_York"
+    time.tzset()
+    yield
+    if saved is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = saved
+    time.tzset()
+
+
+@pytest.fixture
+def store(tmp_path):
+    """An EnhancedMemoryStore backed by the hashing model."""
+    return EnhancedMemoryStore(
+        str(tmp_path / "memory.json"), str(tmp_path / "embeddings.index")
+    )
+
+
+class TestEnhancedMemoryStore:
+    """Test cases for EnhancedMemoryStore."""
+
+    def test_store_and_search(self, store):
+        """Test that stored facts are found by semantic search."""
+        store.store_fact("researcher_agent", "Large language models adoption grew")
+        store.store_fact("validator_agent", "MIT Technology Review is authoritative")
+
+        results = store.semantic_search("language models adoption", top_k=1)
+        assert results[0]["metadata"]["agent_name"] == "researcher_agent"
+
+    def test_batch_encodes_and_saves_once(self, store, monkeypatch):
+        """Test that batch() embeds all buffered writes in one encode call."""
+        saves = []
+        monkeypatch.setattr(store, "save_embeddings", lambda: saves.append(1))
+
+        with store.batch():
+            store.store_interaction("research_crew", "Research topic: AI", "output")
+            store.store_fact("research_crew", "Research completed on AI")
+            store.store_fact("research_crew", "Authoritative sources identified")
+            assert store.index is None
+
+        assert store.embedding_model.encode_calls == [3]
+        assert store.index.ntotal == 3
+        assert saves == [1]
+        assert len(store.get_agent_facts("research_crew")) == 2
+
+    def test_bulk_ingestion(self, store, monkeypatch):
+        """Test that bulk facts are encoded together and indexed in one add."""
+        store.store_fact("agent_0", "seed fact that creates the index")
+        adds = []
+        original_add = store.index.add
+        monkeypatch.setattr(
+            store.index, "add", lambda x: adds.append(len(x)) or original_add(x)
+        )
+
+        store.store_facts_bulk(
+            [(f"agent_{i % 3}", f"historical fact number {i}") for i in range(25)],
+            batch_size=8,
+        )
+        store.store_interactions_bulk([("agent_0", "question", "answer")])
+
+        assert adds == [25, 1]
+        assert store.index.ntotal == len(store.metadata_database) == 27
+        assert len(store.get_agent_facts("agent_1")) == 8
+
+    def test_query_embedding_cache(self, store):
+        """Test that repeated queries reuse the cached query embedding."""
+        store.store_fact("research_crew", "Research completed on AI in healthcare")
+        store.embedding_model.encode_calls.clear()
+
+        store.get_relevant_context("research_crew", "AI in healthcare", 3)
+        store.semantic_search("  AI in   healthcare ")
+
+        assert store.embedding_model.encode_calls == [1]
+        cache_stats = store.get_memory_analytics()["query_cache"]
+        assert cache_stats["misses"] == 1
+        assert cache_stats["hits"] == 1
+
+    def test_identical_memories_are_deduplicated(self, store):
+        """Test that a repeated fact reuses its vector and bumps its metadata."""
+        fact = "Authoritative sources identified for AI research"
+        store.store_fact("research_crew", fact)
+        store.store_fact("research_crew", fact)
+        store.store_facts_bulk([("research_crew", fact), ("validator_agent", fact)])
+
+        assert store.index.ntotal == 2
+        assert store.metadata_database[0]["count"] == 3
+        assert "last_seen" in store.metadata_database[0]
+        assert len(store.get_agent_facts("research_crew")) == 3
+
+        reloaded = EnhancedMemoryStore(
+            str(store.storage_path), str(store.embeddings_path)
+        )
+        reloaded.store_fact("validator_agent", fact)
+        assert reloaded.index.ntotal == 2
+
+    def test_global_dedup_scope_folds_other_agents_repeats(self, tmp_path):
+        """Test that dedup_scope="global" shares one row across agents."""
+        store = EnhancedMemoryStore(
+            str(tmp_path / "memory.json"),
+            str(tmp_path / "embeddings.index"),
+            dedup_scope="global",
+        )
+        fact = "Authoritative sources identified for AI research"
+        first_id = store.store_fact("research_crew", fact)
+        store.store_fact("validator_agent", fact)
+        store.store_fact("validator_agent", "a different finding")
+
+        assert store.index.ntotal == 2
+        row = store.metadata_database[0]
+        assert row["count"] == 2
+        # The row keeps its own agent's memory rather than the other copy
+        assert row["agent_name"] == "research_crew"
+        assert row["memory_id"] == first_id
+        assert len(store.get_agent_facts("validator_agent")) == 2
+
+        with pytest.raises(ValueError, match="dedup_scope"):
+            EnhancedMemoryStore(
+                str(tmp_path / "memory.json"),
+                str(tmp_path / "embeddings.index"),
+                dedup_scope="team",
+            )
+
+    def test_migrates_to_ann_index_past_threshold(self, tmp_path):
+        """Test that a flat index is replaced by the configured IVF index."""
+        store = EnhancedMemoryStore(
+            str(tmp_path / "memory.json"),
+            str(tmp_path / "embeddings.index"),
+            index_config=IndexConfig("ivf_flat", migrate_threshold=100, ivf_nlist=2),
+        )
+        facts = [(f"agent_{i % 4}", f"topic {i} finding {i * 7}") for i in range(99)]
+        store.store_facts_bulk(facts)
+        assert store.get_memory_analytics()["embeddings"]["index_type"] == "flat"
+
+        store.store_fact("agent_0", "drug trial results for compound x")
+        assert store.get_memory_analytics()["embeddings"]["index_type"] == "ivf_flat"
+        assert store.index.ntotal == 100
+
+        results = store.semantic_search("drug trial results compound x", top_k=1)
+        assert results[0]["metadata"]["fact"] == "drug trial results for compound x"
+
+        report = store.index_recall_report(["topic 3 finding 21"], top_k=5)
+        assert [row["index_type"] for row in report] == [
+            "flat",
+            "hnsw",
+            "ivf_flat",
+            "ivf_pq",
+        ]
+        assert report[1]["recall"] > 0
+        assert "error" in report[3]  # too few vectors to train 256 PQ centroids
+
+    def test_filtered_search_returns_top_k_for_minority_agent(self, store):
+        """Test that agent/type/time filters are applied before the vector search."""
+        store.store_facts_bulk(
+            [("researcher_agent", f"AI trends report {i}") for i in range(200)]
+        )
+        store.store_facts_bulk(
+            [("validator_agent", f"AI trends check {i}") for i in range(3)]
+        )
+        store.store_interaction("validator_agent", "AI trends", "validated")
+
+        results = store.semantic_search(
+            "AI trends report",
+            top_k=3,
+            agent_filter="validator_agent",
+            type_filter="fact",
+        )
+        assert len(results) == 3
+        assert {r["metadata"]["agent_name"] for r in results} == {"validator_agent"}
+        assert {r["metadata"]["type"] for r in results} == {"fact"}
+
+        latest = store.metadata_database[-1]["timestamp"]
+        recent = store.semantic_search("AI trends", top_k=5, since=latest)
+        assert [r["metadata"]["type"] for r in recent] == ["interaction"]
+        assert store.semantic_search("AI trends", until="2000-01-01T00:00:00") == []
+
+    def test_time_index_and_recency_decay(self, store):
+        """Test out-of-order time ranges and decay-weighted ranking."""
+        now = datetime.now(timezone.utc)
+        days_ago = [400, 2, 30, 1, 90]
+        store.add_many_to_vector_store(
+            [f"market research finding {i}" for i in range(len(days_ago))],
+            [
+                {
+                    "agent_name": "researcher",
+                    "type": "fact",
+                    "timestamp": (now - timedelta(days=days)).isoformat(),
+                }
+                for days in days_ago
+            ],
+        )
+
+        month_ago = (now - timedelta(days=31)).isoformat()
+        assert list(store.metadata_index.time_range(since=month_ago)) == [1, 2, 3]
+        assert list(store.metadata_index.candidates("researcher", until=month_ago)) == [
+            0,
+            4,
+        ]
+
+        plain = store.semantic_search("market research finding 0", top_k=2)
+        assert plain[0]["text"] == "market research finding 0"
+        decayed = store.semantic_search(
+            "market research finding 0", top_k=2, recency_half_life=7 * 86400
+        )
+        assert [r["text"][-1] for r in decayed] == ["3", "1"]
+        assert decayed[0]["score"] == pytest.approx(
+            decayed[0]["similarity"] * decayed[0]["recency_weight"]
+        )
+        context = store.get_relevant_context(
+            "researcher", "market research", 1, recency_half_life=86400
+        )
+        assert context[0]["text"] == "market research finding 3"
+
+    def test_naive_bounds_are_local_time_in_every_range_query(
+        self, store, new_york_time
+    ):
+        """Test that a naive range means the same window to both range queries."""
+        store.store_fact("researcher", "market research finding")
+        # Naive bounds a minute either side of now, in New York time
+        now = datetime.now()
+        since, until = now - timedelta(minutes=1), now + timedelta(minutes=1)
+
+        structured = store.get_memories_between("researcher", "fact", since, until)
+        indexed = store.semantic_search(
+            "market research finding", since=since, until=until
+        )
+        assert [f["fact"] for f in structured] == ["market research finding"]
+        assert [r["metadata"]["fact"] for r in indexed] == ["market research finding"]
+        aware = since.astimezone(timezone.utc).isoformat()
+        assert store.semantic_search("market research finding", since=aware)
+        assert not store.semantic_search(
+            "market research finding", until=since.isoformat()
+        )
+
+    def test_selector_search_on_hnsw_index(self, store):
+        """Test that IDSelector search on an ANN index falls back to exact scoring."""
+        store.store_facts_bulk(
+            [(f"agent_{i % 50}", f"finding {i}") for i in range(500)]
+        )
+        store.migrate_index(IndexConfig("hnsw", hnsw_ef_search=16))
+        rows = store.metadata_index.candidates("agent_7")
+        query = store._encode_query("finding 7")
+
+        scores, ids = vector_index.search(store.index, query, 10, rows, exact_limit=0)
+        assert len(ids) == 10
+        assert set(ids) == set(rows)
+        assert list(scores) == sorted(scores, reverse=True)
+
+    def test_relevant_context_encodes_once_and_boosts_agent(self, store, monkeypatch):
+        """Test that context retrieval encodes once and boosts the agent."""
+        store.store_fact("research_crew", "AI healthcare diagnostics research")
+        store.store_fact(
+            "validator_agent", "AI healthcare diagnostics research validated"
+        )
+        store.store_fact("summarizer_agent", "AI healthcare summary")
+
+        probes = []
+        original_search = enhanced_memory_store.search_many
+        monkeypatch.setattr(
+            enhanced_memory_store,
+            "search_many",
+            lambda *args, **kwargs: probes.append(len(args[1]))
+            or original_search(*args, **kwargs),
+        )
+        store.embedding_model.encode_calls.clear()
+
+        context = store.get_relevant_context(
+            "summarizer_agent", "AI healthcare diagnostics research", 2
+        )
+        assert store.embedding_model.encode_calls == [1]
+        # One index probe; the agent's own rows are scored without one
+        assert probes == [1]
+        assert context[0]["source"] == "agent_specific"
+        assert context[1]["source"] == "cross_agent"
+
+        unboosted = store.get_relevant_context(
+            "summarizer_agent", "AI healthcare diagnostics research", 2, agent_boost=0.0
+        )
+        assert [r["source"] for r in unboosted] == ["cross_agent", "cross_agent"]
+
+    def test_relevant_context_when_another_agent_dominates(self, store):
+        """Test that an agent's own memory survives a corpus of others' matches."""
+        store.store_facts_bulk(
+            [("researcher", f"clinical trial results batch {i}") for i in range(100)]
+        )
+        store.store_fact("validator", "clinical trial results were checked")
+
+        context = store.get_relevant_context("validator", "clinical trial results")
+
+        assert len(context) == 5
+        assert context[0]["source"] == "agent_specific"
+        assert context[0]["metadata"]["fact"] == "clinical trial results were checked"
+        assert [r["source"] for r in context[1:]] == ["cross_agent"] * 4
+        assert len({r["text"] for r in context}) == 5
+
+    def test_search_many_matches_single_searches(self, store):
+        """Test that batched searches match one-at-a-time semantic_search."""
+        store.store_facts_bulk(
+            [(f"agent_{i % 3}", f"topic {i % 7} detail {i}") for i in range(60)]
+        )
+        queries = ["topic 1 detail", "topic 4", "detail 33", "topic 1 detail"]
+        store.embedding_model.encode_calls.clear()
+
+        batched = store.semantic_search_many(queries, top_k=4, agent_filter="agent_1")
+
+        assert store.embedding_model.encode_calls == [3]
+        assert batched == [
+            store.semantic_search(query, top_k=4, agent_filter="agent_1")
+            for query in queries
+        ]
+        assert store.embedding_model.encode_calls == [3]
+
+    def test_model_is_shared_and_loaded_lazily(self, store, tmp_path):
+        """Test that stores share one model instance, loaded on first encode."""
+        other = EnhancedMemoryStore(
+            str(tmp_path / "other.json"), str(tmp_path / "other.index")
+        )
+        assert embedding_models.loaded_models() == []
+
+        store.store_fact("research_crew", "first fact")
+        assert embedding_models.loaded_models() == ["all-MiniLM-L6-v2"]
+        assert other.embedding_model is store.embedding_model
+
+    def test_custom_backend_dimension_is_recorded_and_checked(self, tmp_path):
+        """Test that the index takes the backend's dimension and rejects other models."""
+        paths = (str(tmp_path / "memory.json"), str(tmp_path / "embeddings.index"))
+        store = EnhancedMemoryStore(
+            *paths, embedding_model=HashingBackend("small-model", dimension=64)
+        )
+        store.store_fact("research_crew", "compact embeddings")
+        store.save_embeddings()
+
+        embeddings = store.get_memory_analytics()["embeddings"]
+        assert embeddings["embedding_dimension"] == 64
+        assert embeddings["model"] == "small-model"
+
+        reloaded = EnhancedMemoryStore(
+            *paths, embedding_model=HashingBackend("small-model", dimension=64)
+        )
+        results = reloaded.semantic_search("compact embeddings")
+        assert results[0]["metadata"]["fact"] == "compact embeddings"
+
+        with pytest.raises(ValueError, match="small-model"):
+            EnhancedMemoryStore(*paths)
+
+    def test_incomplete_backend_cannot_be_instantiated(self):
+        """Test that a backend missing encode fails when created, not when used."""
+
+        class DimensionOnly(EmbeddingBackend):
+            @property
+            def dimension(self):
+                return 8
+
+        with pytest.raises(TypeError, match="encode"):
+            DimensionOnly()
+
+    def test_reduced_precision_storage(self, tmp_path):
+        """Test float16 storage and int8 storage trained once enough rows exist."""
+        paths = (str(tmp_path / "memory.json"), str(tmp_path / "embeddings.index"))
+        store = EnhancedMemoryStore(*paths, index_config=IndexConfig(storage="float16"))
+        store.store_fact("research_crew", "half precision vectors")
+        store.save_embeddings()
+        reloaded = EnhancedMemoryStore(*paths)
+        assert reloaded.get_memory_analytics()["embeddings"]["vector_storage"] == (
+            "float16"
+        )
+        results = reloaded.semantic_search("half precision vectors")
+        assert results[0]["metadata"]["fact"] == "half precision vectors"
+
+        store = EnhancedMemoryStore(
+            str(tmp_path / "int8.json"),
+            str(tmp_path / "int8.index"),
+            index_config=IndexConfig(storage="int8", sq_min_training=50),
+        )
+        store.store_facts_bulk(
+            [("agent_0", f"finding {i} on topic {i}") for i in range(49)]
+        )
+        assert vector_index.storage_of(store.index) == "float32"
+
+        store.store_fact("agent_1", "int8 quantized memory")
+        assert vector_index.storage_of(store.index) == "int8"
+        assert vector_index.index_type_of(store.index) == "flat"
+        assert store.index.ntotal == 50
+        results = store.semantic_search("int8 quantized memory", top_k=1)
+        assert results[0]["metadata"]["fact"] == "int8 quantized memory"
+
+    def test_write_behind_consistency_and_flush(self, tmp_path):
+        """Test that write-behind searches can wait for queued writes or not."""
+        release = threading.Event()
+        backend = HashingBackend()
+        encode = backend.encode
+        backend.encode = lambda texts, **kwargs: release.wait() and encode(
+            texts, **kwargs
+        )
+        store = EnhancedMemoryStore(
+            str(tmp_path / "memory.json"),
+            str(tmp_path / "embeddings.index"),
+            embedding_model=backend,
+            write_behind=True,
+        )
+        for i in range(3):
+            store.store_fact("research_crew", f"queued finding {i}")
+
+        # Structured memory is written inline; vectors are still queued
+        assert len(store.get_agent_facts("research_crew")) == 3
+        assert store.semantic_search("queued finding", read_your_writes=False) == []
+
+        release.set()
+        results = store.semantic_search("queued finding 2", top_k=3)
+        assert results[0]["metadata"]["fact"] == "queued finding 2"
+
+        store.store_fact("research_crew", "late finding")
+        store.close()
+        assert store._worker is None
+        reloaded = EnhancedMemoryStore(
+            str(tmp_path / "memory.json"),
+            str(tmp_path / "embeddings.index"),
+            embedding_model=HashingBackend(),
+        )
+        assert len(reloaded.text_database) == 4
+
+    def test_dropped_store_is_saved_at_exit(self, tmp_path):
+        """Test that a store dropped without close() still saves its rows at exit."""
+        paths = (str(tmp_path / "memory.json"), str(tmp_path / "embeddings.index"))
+        store = EnhancedMemoryStore(*paths)
+        for i in range(13):
+            store.store_fact("research_crew", f"finding number {i}")
+        del store
+        gc.collect()
+
+        enhanced_memory_store._close_open_stores()
+        assert len(EnhancedMemoryStore(*paths).text_database) == 13
+
+    def test_concurrent_stores_merge_embeddings(self, tmp_path):
+        """Test that stores sharing files rebase unsaved rows instead of clobbering."""
+        paths = (str(tmp_path / "memory.json"), str(tmp_path / "embeddings.index"))
+        first = EnhancedMemoryStore(*paths)
+        second = EnhancedMemoryStore(*paths)
+        first.store_facts_bulk([("researcher", "solar"), ("researcher", "shared")])
+        second.store_facts_bulk([("writer", "wind"), ("researcher", "shared")])
+
+        texts = list(second.text_database)
+        assert [t.split("Fact: ")[1] for t in texts] == ["solar", "shared", "wind"]
+        assert second.metadata_database[1]["count"] == 2
+        assert second.index.ntotal == 3
+        results = second.semantic_search("solar", agent_filter="researcher")
+        assert results[0]["metadata"]["fact"] == "solar"
+
+        assert len(first.text_database) == 2
+        first.refresh()
+        assert list(first.text_database) == texts
+        assert len(first.get_agent_facts("writer")) == 1
+
+        reloaded = EnhancedMemoryStore(*paths)
+        assert list(reloaded.text_database) == texts
+        assert reloaded.metadata_database[1]["count"] == 2
+
+    def test_retention_evicts_from_index_and_structured_store(self, tmp_path):
+        """Test max-entries LRU and TTL eviction across the index and JSON store."""
+        store = EnhancedMemoryStore(
+            str(tmp_path / "memory.json"),
+            str(tmp_path / "embeddings.index"),
+            retention=[
+                RetentionPolicy(memory_type="fact", max_entries=3),
+                RetentionPolicy("researcher", "interaction", ttl_seconds=3600),
+            ],
+        )
+        store.store_facts_bulk([("writer", f"draft note {i}") for i in range(3)])
+        # Retrieving the oldest note protects it from least-recently-retrieved eviction
+        assert store.semantic_search("draft note 0", top_k=1)
+        store.store_facts_bulk([("writer", f"draft note {i}") for i in range(3, 5)])
+
+        old = "2020-01-01T00:00:00+00:00"
+        store.add_many_to_vector_store(
+            ["stale interaction", "fresh interaction"],
+            [
+                {"agent_name": "researcher", "type": "interaction", "timestamp": old},
+                {
+                    "agent_name": "researcher",
+                    "type": "interaction",
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                },
+            ],
+        )
+
+        facts = [t for t in store.text_database if "Fact: " in t]
+        assert facts == [f"Agent: writer\nFact: draft note {i}" for i in (0, 3, 4)]
+        assert "stale interaction" not in store.text_database
+        assert store.index.ntotal == len(store.text_database) == 4
+        # Evicted facts are deleted from the structured store too
+        assert [f["fact"] for f in store.get_agent_facts("writer")] == [
+            "draft note 0",
+            "draft note 3",
+            "draft note 4",
+        ]
+        results = store.semantic_search("draft note 1", agent_filter="writer")
+        assert "draft note 1" not in [r["metadata"]["fact"] for r in results]
+
+        analytics = store.get_memory_analytics()
+        # Counters follow the evictions without a rescan
+        assert analytics["writer"]["fact_count"] == 3
+        assert analytics["embeddings"]["agent_distribution"] == {
+            "writer": 3,
+            "researcher": 1,
+        }
+        assert analytics["embeddings"]["type_distribution"] == {
+            "fact": 3,
+            "interaction": 1,
+        }
+        retention = analytics["retention"]
+        assert retention["evicted"] == 3
+        assert retention["evicted_by_reason"] == {"ttl": 1, "max_entries": 2}
+        assert retention["evicted_by_agent"] == {"writer": 2, "researcher": 1}
+        assert retention["structured_trimmed"] == 2
+
+    def test_row_removal_renumbers_indexes_incrementally(self, store, monkeypatch):
+        """Test that removing rows matches a full rebuild without reading texts."""
+        store.store_facts_bulk(
+            [(f"agent_{i % 4}", f"finding {i} on topic {i % 9}") for i in range(40)]
+        )
+        store.add_to_vector_store(
+            "undated note", {"agent_name": "agent_9", "type": "fact"}
+        )
+        store._stale_rows = {7, 30}
+        monkeypatch.setattr(
+            store, "_texts", lambda *args: pytest.fail("texts were re-read")
+        )
+
+        def row_indexes():
+            metadata_index, lexical_index = store.metadata_index, store.lexical_index
+            return (
+                store.content_ids,
+                {k: list(v) for k, v in metadata_index.agent_rows.items()},
+                {k: list(v) for k, v in metadata_index.type_rows.items()},
+                # NaN marks the undated row
+                np.nan_to_num(metadata_index.row_times, nan=-1.0).tolist(),
+                list(metadata_index.time_order),
+                {k: (list(r), list(f)) for k, (r, f) in lexical_index.postings.items()},
+                list(lexical_index.doc_lengths),
+                lexical_index.total_length,
+                store._stale_rows,
+                store._record_backed,
+            )
+
+        store._remove_rows(np.array([30, 3, 4, 17, 39]))
+        incremental = row_indexes()
+        monkeypatch.undo()
+        store._reindex_rows()
+        store._stale_rows = {5}
+        assert incremental == row_indexes()
+        assert store.semantic_search("finding 5 on topic 5", top_k=1)[0]["metadata"][
+            "fact"
+        ] == ("finding 5 on topic 5")
+
+    def test_deferred_ann_eviction_defers_structured_trim(self, tmp_path):
+        """Test that the structured store is trimmed with the rows, in policy order."""
+        store = EnhancedMemoryStore(
+            str(tmp_path / "memory.json"),
+            str(tmp_path / "embeddings.index"),
+            retention=[RetentionPolicy("writer", "fact", max_entries=300)],
+        )
+        store.store_facts_bulk([("writer", f"draft note {i}") for i in range(300)])
+        store.migrate_index(IndexConfig("hnsw"))
+        # Retrieving the oldest note protects it from least-recently-retrieved eviction
+        assert store.semantic_search("draft note 0", top_k=1, type_filter="fact")
+
+        def row_ids():
+            return {m["memory_id"] for m in store.metadata_database}
+
+        def structured_ids():
+            return {f["id"] for f in store.get_agent_facts("writer")}
+
+        # Two evictions are under 1% of the HNSW index, so both sides wait
+        store.store_facts_bulk([("writer", f"draft note {i}") for i in (300, 301)])
+        assert len(store.text_database) == 302
+        assert structured_ids() == row_ids()
+
+        store.store_facts_bulk([("writer", f"draft note {i}") for i in (302, 303, 304)])
+        assert len(store.text_database) == 300
+        assert structured_ids() == row_ids()
+        kept = {f["fact"] for f in store.get_agent_facts("writer")}
+        assert "draft note 0" in kept
+        assert not kept & {f"draft note {i}" for i in range(1, 6)}
+        assert store.eviction_stats["structured_trimmed"] == 5
+
+    def test_rows_reference_structured_memories(self, tmp_path):
+        """Test that the index keeps memory IDs, not second copies of memories."""
+        paths = (str(tmp_path / "memory.json"), str(tmp_path / "embeddings.index"))
+        store = EnhancedMemoryStore(*paths)
+        fact_id = store.store_fact("researcher", "Imatinib approved in 2001")
+        store.store_interaction("writer", "draft intro", "x" * 250)
+
+        result = store.semantic_search("Imatinib approved", top_k=1)[0]
+        assert result["metadata"]["fact"] == "Imatinib approved in 2001"
+        assert result["metadata"]["memory_id"] == fact_id
+        # Memory IDs have their own column, so rows need no per-row dict
+        assert not store.records._extras
+        result = store.semantic_search("draft intro", agent_filter="writer")[0]
+        assert result["metadata"]["output"] == "x" * 200 + "..."
+
+        store.save_embeddings()
+        with open(tmp_path / "embeddings.metadata.json") as f:
+            saved = json.load(f)
+        assert saved["texts"] == [None, None]
+        assert not any({"fact", "input", "output"} & set(m) for m in saved["metadata"])
+
+        # Cleared memories leave search at once and the index on the next save
+        store.clear_agent_memory("researcher")
+        assert store.semantic_search("Imatinib", agent_filter="researcher") == []
+        store.save_embeddings()
+        assert store.index.ntotal == 1
+
+        reloaded = EnhancedMemoryStore(*paths)
+        assert list(reloaded.text_database) == [
+            "Agent: writer\nInput: draft intro\nOutput: " + "x" * 250
+        ]
+
+    @pytest.mark.parametrize("suffix", ["ndjson", "parquet"])
+    def test_export_and_import_reuse_vectors(self, store, tmp_path, suffix):
+        """Test that a streamed export imports into a new store without encoding."""
+        if suffix == "parquet":
+            pytest.importorskip("pyarrow")
+        store.store_facts_bulk([("researcher", f"finding {i}") for i in range(3)])
+        # The repeat folds into the first row; its older copy exports on its own
+        store.store_fact("researcher", "finding 0")
+        store.add_to_vector_store("custom note", {"agent_name": "writer"})
+
+        path = tmp_path / f"backup.{suffix}"
+        assert store.export(path) == 5
+        store.embedding_model.encode_calls.clear()
+        target = EnhancedMemoryStore(
+            str(tmp_path / "copy" / "memory.json"),
+            str(tmp_path / "copy" / "embeddings.index"),
+        )
+        assert target.import_(path) == 4
+        assert target.embedding_model.encode_calls == []
+        assert len(target.get_agent_facts("researcher")) == 4
+        np.testing.assert_array_equal(
+            target.index.reconstruct_n(0, 4), store.index.reconstruct_n(0, 4)
+        )
+        result = target.semantic_search("finding 2", top_k=1)[0]
+        assert result["metadata"]["fact"] == "finding 2"
+        assert target.metadata_database[0]["count"] == 2
+        assert list(target.text_database)[-1] == "custom note"
+
+        # Importing again changes nothing, not even repeat counts
+        metadata = [dict(m) for m in target.metadata_database]
+        assert target.import_(path) == 0
+        assert len(target.get_agent_facts("researcher")) == 4
+        assert [dict(m) for m in target.metadata_database] == metadata
+        assert target.duplicates_skipped == 0
+
+    def test_import_structured_store_export(self, store, tmp_path):
+        """Test that a SimpleMemoryStore export is indexed for semantic search."""
+        source = SimpleMemoryStore(str(tmp_path / "simple.json"))
+        fact_id = source.store_fact("researcher", "Imatinib approved for leukemia")
+        source.store_interaction("writer", "draft intro", "intro about oncology")
+        path = tmp_path / "simple.ndjson"
+        assert source.export(path) == 2
+
+        assert store.import_(path) == 2
+        result = store.semantic_search("Imatinib leukemia", top_k=1)[0]
+        assert result["metadata"]["memory_id"] == fact_id
+        assert result["metadata"]["fact"] == "Imatinib approved for leukemia"
+        result = store.semantic_search("intro oncology", agent_filter="writer")[0]
+        assert result["metadata"]["type"] == "interaction"
+
+        # Stamped with the memory's time, not the import's
+        created = datetime.fromisoformat(source.get_record(fact_id)["timestamp"])
+        row = store.metadata_database[0]
+        assert datetime.fromisoformat(row["timestamp"]) == created.astimezone()
+        assert store.import_(path) == 0
+
+    def test_hybrid_and_lexical_search_find_exact_tokens(self, store):
+        """Test BM25 retrieval of exact tokens, with and without vector fusion."""
+        store.store_facts_bulk(
+            [(f"agent_{i % 2}", f"quarterly revenue review {i}") for i in range(20)]
+        )
+        store.store_fact("agent_1", "Imatinib approved in 2001 for leukemia")
+        store.embedding_model.encode_calls.clear()
+
+        lexical = store.semantic_search("imatinib", search_mode="lexical")
+        assert [r["metadata"]["fact"] for r in lexical] == [
+            "Imatinib approved in 2001 for leukemia"
+        ]
+        assert lexical[0]["bm25"] > 0 and "similarity" not in lexical[0]
+        assert store.embedding_model.encode_calls == []
+        assert (
+            store.semantic_search(
+                "imatinib", agent_filter="agent_0", search_mode="lexical"
+            )
+            == []
+        )
+
+        hybrid = store.semantic_search("revenue in 2001", top_k=3, search_mode="hybrid")
+        assert hybrid[0]["metadata"]["fact"] == "Imatinib approved in 2001 for leukemia"
+        assert {"similarity", "bm25", "fused_score"} <= hybrid[0].keys()
+        assert len(hybrid) == 3
+
+        with pytest.raises(ValueError):
+            store.semantic_search("imatinib", search_mode="keyword")
+
+
+class TestAsyncEnhancedMemoryStore:
+    """Test cases for AsyncEnhancedMemoryStore."""
+
+    def test_concurrent_writes_share_one_encode(self, store):
+        """Test that concurrent astore_* calls are applied as one batch."""
+
+        async def scenario():
+            async with AsyncEnhancedMemoryStore(store) as memory:
+                memory_ids = await asyncio.gather(
+                    *(memory.astore_fact("agent_0", f"fact {i}") for i in range(5)),
+                    memory.astore_interaction("agent_1", "question", "answer"),
+                )
+                return memory._writes.batches_run, memory_ids
+
+        batches_run, memory_ids = asyncio.run(scenario())
+        assert batches_run == 1
+        assert store.embedding_model.encode_calls == [6]
+        assert len(store.get_agent_facts("agent_0")) == 5
+        # Each caller gets its own write's memory ID back
+        assert [
+            store.structured_store.get_record(i)["fact"] for i in memory_ids[:5]
+        ] == [f"fact {i}" for i in range(5)]
+        assert store.structured_store.get_record(memory_ids[5])["output"] == "answer"
+        assert store.embeddings_path.exists()
+
+    def test_concurrent_searches_share_one_encode(self, store):
+        """Test that concurrent searches are answered from one query encode."""
+        store.store_facts_bulk(
+            [("researcher", "solar panel efficiency"), ("writer", "wind farms")]
+        )
+        expected = store.get_relevant_context("writer", "solar panel efficiency")
+        store.query_cache.clear()
+        store.embedding_model.encode_calls.clear()
+
+        async def scenario():
+            async with AsyncEnhancedMemoryStore(store) as memory:
+                return await asyncio.gather(
+                    memory.asemantic_search("solar panel efficiency"),
+                    memory.asemantic_search("wind farms", agent_filter="writer"),
+                    memory.aget_relevant_context("writer", "solar panel efficiency"),
+                )
+
+        solar, wind, context = asyncio.run(scenario())
+        assert store.embedding_model.encode_calls == [2]
+        assert solar[0]["metadata"]["fact"] == "solar panel efficiency"
+        assert [r["metadata"]["agent_name"] for r in wind] == ["writer"]
+        assert [r["score"] for r in context] == pytest.approx(
+            [r["score"] for r in expected]
+        )
+
+
+class TestShardedMemoryStore:
+    """Test cases for ShardedMemoryStore."""
+
+    def test_scatter_gather_matches_single_store(self, store, tmp_path):
+        """Test that merged shard results equal one store's exact search."""
+        facts = [
+            (f"agent_{i % 3}", f"market report {i} on sector {i % 7}")
+            for i in range(30)
+        ]
+        store.store_facts_bulk(facts)
+        sharded = ShardedMemoryStore(
+            str(tmp_path / "sharded.json"), str(tmp_path / "sharded.index"), n_shards=3
+        )
+        sharded.store_facts_bulk(facts)
+        assert [len(shard.text_database) for shard in sharded.shards].count(0) == 0
+
+        store.embedding_model.encode_calls.clear()
+        results = sharded.semantic_search("market report 12 sector 5", top_k=4)
+        # One query encode shared by every shard
+        assert store.embedding_model.encode_calls == [1]
+        expected = store.semantic_search("market report 12 sector 5", top_k=4)
+        # Equal similarities may come back in either order
+        assert {r["text"] for r in results} == {r["text"] for r in expected}
+        assert [r["similarity"] for r in results] == pytest.approx(
+            [r["similarity"] for r in expected]
+        )
+        assert [r["rank"] for r in results] == [1, 2, 3, 4]
+
+        context = sharded.get_relevant_context("agent_1", "sector 5", context_limit=4)
+        expected = store.get_relevant_context("agent_1", "sector 5", context_limit=4)
+        assert [r["score"] for r in context] == pytest.approx(
+            [r["score"] for r in expected]
+        )
+        facts = sharded.get_agent_facts("agent_0")
+        assert sorted(f["fact"] for f in facts) == sorted(
+            f["fact"] for f in store.get_agent_facts("agent_0")
+        )
+        assert [f["timestamp"] for f in facts] == sorted(f["timestamp"] for f in facts)
+        assert sharded.get_memory_summary()["agent_2"]["fact_count"] == 10
+        sharded.close()
+
+    def test_agent_partition_and_dirty_shard_saves(self, tmp_path):
+        """Test agent routing, saving only changed shards and the layout check."""
+        paths = (str(tmp_path / "memory.json"), str(tmp_path / "embeddings.index"))
+        sharded = ShardedMemoryStore(*paths, n_shards=4, partition="agent")
+        sharded.store_facts_bulk([(f"agent_{i}", f"finding {i}") for i in range(8)])
+        assert sharded.save_embeddings() == 0
+
+        sharded.store_fact("agent_3", "late finding")
+        results = sharded.semantic_search("late finding", agent_filter="agent_3")
+        assert {r["shard"] for r in results} == {sharded._shard_index("agent_3")}
+        analytics = sharded.get_memory_analytics()
+        assert analytics["embeddings"]["total_embeddings"] == 9
+        assert sum(s["unsaved_changes"] for s in analytics["shards"]) == 1
+        assert sharded.save_embeddings() == 1
+        sharded.close()
+
+        with pytest.raises(ValueError, match="4 shards"):
+            ShardedMemoryStore(*paths, n_shards=2, partition="agent")
+        reopened = ShardedMemoryStore(*paths, n_shards=4, partition="agent")
+        facts = reopened.get_agent_facts("agent_3")
+        assert [f["fact"] for f in facts] == ["finding 3", "late finding"]
+        assert (
+            reopened.semantic_search("finding 5", top_k=1)[0]["metadata"]["agent_name"]
+            == "agent_5"
+        )
+
+    def test_count_limits_hold_across_hash_shards(self, tmp_path, monkeypatch):
+        """Test that max_entries counts an agent's memories on every shard."""
+        sharded = ShardedMemoryStore(
+            str(tmp_path / "memory.json"),
+            str(tmp_path / "embeddings.index"),
+            n_shards=4,
+            retention=[
+                RetentionPolicy("writer", "fact", max_entries=5, eviction="oldest")
+            ],
+        )
+        passes = []
+        enforce = sharded._enforce_count_limits
+        monkeypatch.setattr(
+            sharded, "_enforce_count_limits", lambda: passes.append(1) or enforce()
+        )
+        sharded.store_fact("researcher", "unlimited finding")
+        # One at a time, so eviction order does not hinge on equal timestamps
+        for i in range(20):
+            sharded.store_fact("writer", f"draft note {i}")
+        # Single writes leave the cross-shard pass to the save
+        assert passes == []
+        sharded.save_embeddings()
+        assert passes == [1]
+
+        facts = [f["fact"] for f in sharded.get_agent_facts("writer")]
+        assert facts == [f"draft note {i}" for i in range(15, 20)]
+        assert len(sharded.get_agent_facts("researcher")) == 1
+        assert sum(len(shard.text_database) for shard in sharded.shards) == 6
+        for shard in sharded.shards:
+            structured = shard.structured_store
+            stored = structured.get_agent_facts("writer") + structured.get_agent_facts(
+                "researcher"
+            )
+            assert {m["memory_id"] for m in shard.metadata_database} == {
+                f["id"] for f in stored
+            }
+        assert sharded.apply_retention()["evicted_by_reason"]["max_entries"] == 15
@@ -0,0 +1,63 @@
+"""Cold-start import budget for the CLI entry points."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+# Cumulative import time allowed per entry module, in milliseconds
+IMPORT_BUDGET_MS = float(os.environ.get("CREWAI_TEST_IMPORT_BUDGET_MS", "300"))
+
+# Libraries that must only be imported once they are actually used
+HEAVY_MODULES = {"crewai", "sentence_transformers", "torch", "transformers"}
+
+
+def import_profile(module: str) -> dict[str, int]:
+    """Import a module in a fresh interpreter and return cumulative times in us."""
+    env = dict(os.environ, PYTHONPATH=str(SRC_DIR))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    profile = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "crewai_test.main",
+        "crewai_test.echo_main",
+        "crewai_test.research_main",
+        "crewai_test.memory_store",
+        "crewai_test.sqlite_memory_store",
+    ],
+)
+def test_entry_point_import_budget(module):
+    """Test that entry modules import fast and without heavy dependencies."""
+    profile = import_profile(module)
+
+    assert not HEAVY_MODULES & set(profile)
+    assert profile[module] / 1000 < IMPORT_BUDGET_MS
+
+
+def test_enhanced_memory_store_defers_model_libraries():
+    """Test that the vector store does not import the transformer stack eagerly."""
+    pytest.importorskip("faiss")
+    profile = import_profile("crewai_test.enhanced_memory_store")
+
+    assert not HEAVY_MODULES & set(profile)
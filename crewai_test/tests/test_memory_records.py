@@ -0,0 +1,117 @@
+"""Test cases for MemoryRecords."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from crewai_test.memory_records import MemoryRecords  # noqa: E402
+
+
+class TestMemoryRecords:
+    """Test cases for MemoryRecords."""
+
+    @pytest.fixture
+    def entries(self):
+        """Texts and metadata shaped like EnhancedMemoryStore writes, plus oddities."""
+        output = "x" * 250
+        return (
+            [
+                "Agent: researcher\nFact: Imatinib approved in 2001",
+                f"Agent: writer\nInput: draft intro\nOutput: {output}",
+                "custom text",
+            ],
+            [
+                {
+                    "agent_name": "researcher",
+                    "type": "fact",
+                    "timestamp": "2024-03-01T12:00:00.123456+00:00",
+                    "memory_id": "9f86d081884c7d65",
+                    "fact": "Imatinib approved in 2001",
+                },
+                {
+                    "agent_name": "writer",
+                    "type": "interaction",
+                    "timestamp": "2024-03-02T08:30:00+00:00",
+                    "memory_id": "00000000000000ff",
+                    "input": "draft intro",
+                    "output": output[:200] + "...",
+                },
+                {
+                    "agent_name": "researcher",
+                    "timestamp": "2024-03-03T10:00:00",
+                    "memory_id": "0x0000000000000f",
+                    "fact": "not in the text",
+                    "count": 2.5,
+                    "tags": ["a", "b"],
+                },
+            ],
+        )
+
+    def test_metadata_round_trips(self, entries):
+        """Test that columnar rows materialize back to the original dicts."""
+        texts, metadatas = entries
+        records = MemoryRecords.from_lists(texts, metadatas)
+
+        assert list(records.iter_metadata()) == metadatas
+        # Store-shaped rows need no per-row dict; odd IDs fall back to one
+        assert list(records._extras) == [2]
+        assert records._extras[2]["memory_id"] == "0x0000000000000f"
+        assert records.metadata[-1] == metadatas[-1]
+        assert records.metadata[0].epoch == pytest.approx(1709294400.123456)
+        # Naive timestamps stay strings, read as UTC like the metadata index does
+        assert records.epochs("timestamp")[2] == pytest.approx(1709460000.0)
+        assert records.value_counts("agent_name") == {"researcher": 2, "writer": 1}
+        assert records.value_counts("type", "unknown") == {
+            "fact": 1,
+            "interaction": 1,
+            "unknown": 1,
+        }
+
+    def test_views_write_through_and_take(self, entries):
+        """Test view updates and row selection with renumbering."""
+        records = MemoryRecords.from_lists(*entries)
+        view = records.metadata[0]
+        view["count"] = 3
+        view["last_seen"] = "2024-03-05T00:00:00+00:00"
+        view["fact"] = "edited fact"
+        del records.metadata[2]["tags"]
+
+        taken = records.take(np.array([0, 2]))
+        assert taken.texts == [entries[0][0], entries[0][2]]
+        assert taken.metadata_dict(0) == {
+            **entries[1][0],
+            "fact": "edited fact",
+            "count": 3,
+            "last_seen": "2024-03-05T00:00:00+00:00",
+        }
+        assert "tags" not in taken.metadata[1]
+        assert taken.metadata[1]["count"] == 2.5
+        with pytest.raises(KeyError):
+            taken.metadata[1]["type"]
+
+    def test_memory_id_column(self):
+        """Test that memory IDs are columnar unless they do not fit a uint64."""
+        records = MemoryRecords()
+        for memory_id in ("ffffffffffffffff", "0000000000000000", "ABCDEF0123456789"):
+            records.append(None, {"agent_name": "writer", "memory_id": memory_id})
+
+        assert [m["memory_id"] for m in records.metadata] == [
+            "ffffffffffffffff",
+            "0000000000000000",
+            "ABCDEF0123456789",
+        ]
+        assert sorted(records._extras) == [1, 2]
+        ids, other_ids = records.sorted_ids()
+        assert ids.tolist() == [2**64 - 1]
+        assert other_ids == {"0000000000000000", "ABCDEF0123456789"}
+
+        view = records.metadata[2]
+        view["memory_id"] = "abcdef0123456789"
+        assert not records._extras.get(2)
+        taken = records.take(np.array([2, 0]))
+        assert taken.metadata_dict(0) == {
+            "agent_name": "writer",
+            "memory_id": "abcdef0123456789",
+        }
+        del taken.metadata[1]["memory_id"]
+        assert "memory_id" not in taken.metadata[1]
@@ -0,0 +1,162 @@
+"""Test cases for SimpleMemoryStore persistence."""
+
+import json
+import multiprocessing
+from datetime import datetime
+
+import pytest
+from crewai_test.memory_store import SimpleMemoryStore
+
+
+def _write_facts(storage_path, worker, n_facts):
+    """Store facts from a separate process."""
+    store = SimpleMemoryStore(storage_path, journal=True, compact_threshold=25)
+    for i in range(n_facts):
+        store.store_fact(f"worker_{worker}", f"fact {i}")
+
+
+class TestSimpleMemoryStore:
+    """Test cases for SimpleMemoryStore."""
+
+    @pytest.fixture
+    def storage_path(self, tmp_path):
+        """Path to a fresh storage file."""
+        return str(tmp_path / "memory_store.json")
+
+    def test_snapshot_round_trip(self, storage_path):
+        """Test that interactions and facts survive a reload."""
+        store = SimpleMemoryStore(storage_path)
+        store.store_interaction("echo_agent", "Hello", "Hello")
+        store.store_fact("echo_agent", "User's name is Alice")
+
+        reloaded = SimpleMemoryStore(storage_path)
+        assert reloaded.get_agent_history("echo_agent")[0]["input"] == "Hello"
+        assert reloaded.get_agent_facts("echo_agent")[0]["fact"] == (
+            "User's name is Alice"
+        )
+
+    def test_journal_replay_matches_snapshot_mode(self, storage_path):
+        """Test that journal mode appends records and replays them on load."""
+        store = SimpleMemoryStore(storage_path, journal=True)
+        for i in range(4):
+            store.store_interaction("echo_agent", f"in {i}", f"out {i}")
+        store.store_fact("echo_agent", "fact")
+
+        assert not store.storage_path.exists()
+        assert len(store.journal_path.read_text().splitlines()) == 5
+
+        reloaded = SimpleMemoryStore(storage_path, journal=True)
+        recent = reloaded.get_recent_interactions("echo_agent", limit=2)
+        assert [i["input"] for i in recent] == ["in 2", "in 3"]
+        assert reloaded.get_memory_summary() == store.get_memory_summary()
+
+    def test_time_range_queries(self, storage_path):
+        """Test that entries are kept in time order and range queried."""
+        with open(storage_path, "w") as f:
+            json.dump(
+                {
+                    "echo_agent": {
+                        "interactions": [
+                            {"timestamp": f"2024-01-0{day}T09:00:00", "input": str(day)}
+                            for day in (1, 3, 2, 5, 4)
+                        ],
+                        "facts": [],
+                    }
+                },
+                f,
+            )
+        store = SimpleMemoryStore(storage_path, journal=True)
+        store.store_interaction("echo_agent", "now", "output")
+
+        def inputs(entries):
+            return [e["input"] for e in entries]
+
+        assert inputs(
+            store.get_memories_between(
+                "echo_agent", since="2024-01-02T00:00:00", until="2024-01-04T09:00:00"
+            )
+        ) == ["2", "3", "4"]
+        assert inputs(store.get_recent_interactions("echo_agent", 2)) == ["5", "now"]
+        assert inputs(
+            store.get_memories_between("echo_agent", since=datetime(2024, 1, 5))
+        ) == ["5", "now"]
+        assert store.get_memories_between("echo_agent", "fact") == []
+
+    def test_journal_compaction(self, storage_path):
+        """Test that the journal is folded into the snapshot past the threshold."""
+        store = SimpleMemoryStore(storage_path, journal=True, compact_threshold=3)
+        for i in range(3):
+            store.store_fact("echo_agent", f"fact {i}")
+        store.store_fact("other_agent", "late fact")
+        store.clear_agent_memory("echo_agent")
+
+        assert store.storage_path.exists()
+        assert len(store.journal_path.read_text().splitlines()) == 2
+
+        reloaded = SimpleMemoryStore(storage_path, journal=True)
+        assert reloaded.get_agent_facts("echo_agent") == []
+        assert reloaded.get_agent_facts("other_agent")[0]["fact"] == "late fact"
+
+    def test_batch_persists_once(self, storage_path, monkeypatch):
+        """Test that writes inside batch() are flushed with a single save."""
+        store = SimpleMemoryStore(storage_path)
+        saves = []
+        original_save = store.save_memory
+        monkeypatch.setattr(
+            store, "save_memory", lambda: saves.append(1) or original_save()
+        )
+
+        with store.batch():
+            store.store_interaction("research_crew", "topic", "output")
+            with store.batch():
+                store.store_fact("research_crew", "fact one")
+            store.store_fact("research_crew", "fact two")
+            assert saves == []
+
+        assert saves == [1]
+        reloaded = SimpleMemoryStore(storage_path)
+        assert len(reloaded.get_agent_facts("research_crew")) == 2
+
+    def test_batch_in_journal_mode(self, storage_path):
+        """Test that a batch appends all of its records to the journal at once."""
+        store = SimpleMemoryStore(storage_path, journal=True)
+        with store.batch():
+            store.store_interaction("research_crew", "topic", "output")
+            store.store_fact("research_crew", "fact")
+            assert not store.journal_path.exists()
+
+        assert len(store.journal_path.read_text().splitlines()) == 2
+
+    @pytest.mark.parametrize("journal", [False, True])
+    def test_concurrent_stores_merge_writes(self, storage_path, journal):
+        """Test that stores sharing files merge their writes instead of clobbering."""
+        first = SimpleMemoryStore(storage_path, journal=journal)
+        second = SimpleMemoryStore(storage_path, journal=journal)
+        first.store_fact("researcher", "first fact")
+        second.store_fact("writer", "second fact")
+        first.store_interaction("researcher", "topic", "output")
+
+        assert first.get_agent_facts("writer")[0]["fact"] == "second fact"
+        assert second.get_agent_history("researcher") == []
+        second.refresh()
+        assert second.get_agent_history("researcher")[0]["input"] == "topic"
+
+        reloaded = SimpleMemoryStore(storage_path, journal=journal)
+        assert reloaded.get_memory_summary() == first.get_memory_summary()
+
+    def test_processes_share_journal(self, storage_path):
+        """Test that writes from several processes all survive, across compactions."""
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=_write_facts, args=(storage_path, worker, 30))
+            for worker in range(4)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+
+        reloaded = SimpleMemoryStore(storage_path, journal=True)
+        for worker in range(4):
+            facts = reloaded.get_agent_facts(f"worker_{worker}")
+            assert [f["fact"] for f in facts] == [f"fact {i}" for i in range(30)]
@@ -0,0 +1,155 @@
+"""Test cases for SqliteMemoryStore."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from crewai_test.memory_store import SimpleMemoryStore
+from crewai_test.sqlite_memory_store import SqliteMemoryStore
+
+
+class TestSqliteMemoryStore:
+    """Test cases for SqliteMemoryStore."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        """A fresh SQLite store."""
+        store = SqliteMemoryStore(str(tmp_path / "memory_store.db"))
+        yield store
+        store.close()
+
+    def test_matches_simple_store_interface(self, store, tmp_path):
+        """Test that query results match SimpleMemoryStore for the same writes."""
+        simple = SimpleMemoryStore(str(tmp_path / "memory_store.json"))
+        for target in (simple, store):
+            for i in range(6):
+                target.store_interaction("echo_agent", f"in {i}", f"out {i}")
+            target.store_fact("echo_agent", "User's name is Alice")
+            target.store_fact("fact_only_agent", "Only facts here")
+
+        def strip(entries):
+            return [
+                {k: v for k, v in e.items() if k not in ("id", "timestamp")}
+                for e in entries
+            ]
+
+        assert strip(store.get_recent_interactions("echo_agent", limit=3)) == strip(
+            simple.get_recent_interactions("echo_agent", limit=3)
+        )
+        assert strip(store.get_agent_facts("echo_agent")) == strip(
+            simple.get_agent_facts("echo_agent")
+        )
+
+        summary = store.get_memory_summary()
+        assert summary["echo_agent"]["interaction_count"] == 6
+        assert summary["echo_agent"]["fact_count"] == 1
+        assert summary["fact_only_agent"]["last_interaction"] is None
+
+    def test_persistence_and_clear(self, store):
+        """Test that data survives reopening and can be cleared per agent."""
+        store.store_interaction("a", "hello", "world")
+        store.store_fact("b", "fact")
+
+        reopened = SqliteMemoryStore(str(store.storage_path))
+        assert reopened.get_agent_history("a")[0]["output"] == "world"
+
+        reopened.clear_agent_memory("a")
+        assert reopened.get_agent_history("a") == []
+        assert list(reopened.get_memory_summary()) == ["b"]
+        reopened.close()
+
+    def test_trim_matches_simple_store(self, store, tmp_path):
+        """Test that retention trimming drops the same entries in both stores."""
+        simple_path = str(tmp_path / "memory_store.json")
+        simple = SimpleMemoryStore(simple_path, journal=True)
+        for target in (store, simple):
+            for i in range(5):
+                target.store_fact("researcher", f"fact {i}")
+            target.store_interaction("researcher", "topic", "output")
+
+        future = datetime.now(timezone.utc) + timedelta(seconds=1)
+        for target in (store, simple):
+            assert target.trim("researcher", "fact", max_entries=2) == 3
+            assert target.trim("researcher", "interaction", since=future) == 1
+            assert target.trim("researcher", "fact", max_entries=2) == 0
+
+        reloaded = SimpleMemoryStore(simple_path, journal=True)
+        for target in (store, reloaded):
+            facts = [f["fact"] for f in target.get_agent_facts("researcher")]
+            assert facts == ["fact 3", "fact 4"]
+            assert target.get_agent_history("researcher") == []
+
+    def test_time_range_matches_simple_store(self, store, tmp_path):
+        """Test that range queries return the same entries in both stores."""
+        simple = SimpleMemoryStore(str(tmp_path / "memory_store.json"))
+        for target in (store, simple):
+            for i in range(4):
+                target.store_fact("researcher", f"fact {i}")
+            target.store_interaction("researcher", "topic", "output")
+
+        for target in (store, simple):
+            facts = target.get_agent_facts("researcher")
+            since, until = facts[1]["timestamp"], facts[2]["timestamp"]
+            in_range = target.get_memories_between("researcher", "fact", since, until)
+            assert [f["fact"] for f in in_range] == ["fact 1", "fact 2"]
+            assert target.get_memories_between("researcher", until="2000-01-01") == []
+            assert len(target.get_memories_between("researcher", since=since)) == 1
+
+    def test_summary_counters_match_simple_store(self, store, tmp_path):
+        """Test that write-maintained counters agree across stores and reopening."""
+        simple_path = str(tmp_path / "memory_store.json")
+        simple = SimpleMemoryStore(simple_path, journal=True)
+        for target in (store, simple):
+            ids = [target.store_fact("researcher", f"résumé {i}") for i in range(4)]
+            target.store_interaction("researcher", "topic", "output")
+            target.store_interaction("writer", "draft", "text")
+            assert target.delete(ids[:1]) == 1
+            assert target.trim("researcher", "fact", max_entries=2) == 1
+            target.clear_agent_memory("writer")
+
+        summary = store.get_memory_summary()
+        assert list(summary) == ["researcher"]
+        counters = summary["researcher"]
+        assert counters["fact_count"] == 2
+        assert counters["content_bytes"] == 2 * len("résumé 0".encode()) + 11
+        facts = store.get_agent_facts("researcher")
+        assert counters["last_fact"] == facts[-1]["timestamp"]
+
+        def strip(summary):
+            return {
+                agent: {k: v for k, v in entry.items() if not k.startswith("last_")}
+                for agent, entry in summary.items()
+            }
+
+        reloaded = SimpleMemoryStore(simple_path, journal=True)
+        assert strip(summary) == strip(simple.get_memory_summary())
+        assert strip(summary) == strip(reloaded.get_memory_summary())
+
+        # Databases from before the counters are counted once on open
+        store.conn.execute("DROP TABLE memory_stats")
+        store.conn.commit()
+        reopened = SqliteMemoryStore(str(store.storage_path))
+        assert reopened.get_memory_summary() == summary
+        reopened.close()
+
+    def test_export_and_import_between_stores(self, store, tmp_path):
+        """Test streaming NDJSON export from one store class into the other."""
+        simple = SimpleMemoryStore(str(tmp_path / "memory_store.json"))
+        simple.store_interaction("researcher", "topic", "output")
+        for i in range(3):
+            simple.store_fact("writer", f"fact {i}")
+
+        path = tmp_path / "backup.ndjson"
+        assert simple.export(path) == 4
+        assert store.import_(path) == 4
+        assert store.import_(path) == 0
+        assert sorted(store.iter_records(), key=lambda r: r["id"]) == sorted(
+            simple.iter_records(), key=lambda r: r["id"]
+        )
+
+        store.store_fact("writer", "fact 3")
+        store.export(tmp_path / "back.jsonl")
+        reloaded = SimpleMemoryStore(str(tmp_path / "memory_store.json"))
+        assert reloaded.import_(tmp_path / "back.jsonl") == 1
+        assert reloaded.get_agent_facts("writer")[-1]["fact"] == "fact 3"
+        with pytest.raises(ValueError):
+            store.export(tmp_path / "backup.csv")